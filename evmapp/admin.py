@@ -1,9 +1,9 @@
 from django.contrib import admin
-from django.core.mail import send_mail
-from django.conf import settings
 from django.contrib import messages
-from django.template.loader import render_to_string
-from .models import Sponsor, Event, Booking, UserProfile, Volunteer, Payment
+from django.utils import timezone
+from .models import Sponsor, Event, Booking, UserProfile, Volunteer, Payment, SeatHold, WaitingRoom, ExportJob, OutboxEmail
+from .search import search_booking_ids
+from .verification import verify_bookings
 
 # Set the header for the dashboard
 admin.site.site_header = 'Event Management Admin'
@@ -11,56 +11,21 @@ admin.site.site_header = 'Event Management Admin'
 # --- 1. Custom Action for One-Click Verification ---
 @admin.action(description='Verify Payment & Send Confirmation Email')
 def verify_payment_and_notify(modeladmin, request, queryset):
-    success_count = 0
-    email_fail_count = 0
-    already_verified_count = 0
+    # One UPDATE for the whole selection; emails are queued for `manage.py send_outbox`
+    result = verify_bookings(queryset)
 
-    for booking in queryset:
-        if not booking.is_verified:
-            # 1. Update status flags (Verify FIRST, so DB is updated even if email fails)
-            booking.is_verified = True
-            booking.is_paid = True
-            booking.paid = True
-            booking.save()
+    # Feedback messages to Admin
+    if result.queued > 0:
+        modeladmin.message_user(request, f"Successfully verified {result.verified} users; {result.queued} emails are queued.", level=messages.SUCCESS)
+    elif result.verified > 0:
+        modeladmin.message_user(request, f"Successfully verified {result.verified} users.", level=messages.SUCCESS)
 
-            # 2. Prepare the Email
-            subject = f" Payment Verified: {booking.event.event_name}"
-            
-            # Load the HTML file
-            context = {'booking': booking}
-            html_message = render_to_string('evmapp/email/payment_verified.html', context)
-            
-            # Plain text fallback
-            plain_message = f"Your booking for {booking.event.event_name} is confirmed. Ticket ID: {booking.ticket_id}"
-
-            # 3. Send the Email
-            try:
-                send_mail(
-                    subject,
-                    plain_message, 
-                    settings.EMAIL_HOST_USER,
-                    [booking.email],
-                    fail_silently=False,
-                    html_message=html_message
-                )
-                success_count += 1
-            except Exception as e:
-                # If email fails (Network/Auth error), just count it. Don't crash.
-                email_fail_count += 1
-                print(f"EMAIL FAILED for {booking.email}: {e}")
-        else:
-            already_verified_count += 1
-
-    # 4. Feedback messages to Admin
-    if success_count > 0:
-        modeladmin.message_user(request, f"Successfully verified and emailed {success_count} users.", level=messages.SUCCESS)
-    
-    if email_fail_count > 0:
+    if result.failed > 0:
         # This warns you that the DB is updated, but emails didn't go out
-        modeladmin.message_user(request, f" Verified {email_fail_count} users, but emails failed to send (Check Network/Settings).", level=messages.WARNING)
-        
-    if already_verified_count > 0:
-        modeladmin.message_user(request, f"{already_verified_count} users were already verified.", level=messages.INFO)
+        modeladmin.message_user(request, f" Verified {result.failed} users, but their emails could not be queued (missing address or template error).", level=messages.WARNING)
+
+    if result.already_verified > 0:
+        modeladmin.message_user(request, f"{result.already_verified} users were already verified.", level=messages.INFO)
 
 
 # --- 2. Admin Model Configurations ---
@@ -72,6 +37,21 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ("name", "email", "ticket_id", "payment_ref")
     readonly_fields = ("booking_date", "ticket_id")
     actions = [verify_payment_and_notify]
+    search_limit = 1000  # matches listed for a search term
+
+    def get_search_results(self, request, queryset, search_term):
+        """Uses the attendee search index instead of an icontains scan per search field"""
+        if not search_term.strip():
+            return queryset, False
+        ids = search_booking_ids(search_term, limit=self.search_limit + 1)
+        if len(ids) > self.search_limit:
+            # The count and pages below only cover the best matches, so say so
+            self.message_user(
+                request, f"Showing the best {self.search_limit} matches only; refine the search to see the rest.",
+                level=messages.WARNING,
+            )
+            ids = ids[:self.search_limit]
+        return queryset.filter(pk__in=ids), False
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -93,7 +73,25 @@ class VolunteerAdmin(admin.ModelAdmin):
     list_filter = ('status', 'volunteer_role')
     search_fields = ('first_name', 'email')
 
+@admin.action(description='Retry selected emails now')
+def retry_outbox_emails(modeladmin, request, queryset):
+    retried = queryset.exclude(status=OutboxEmail.SENT).update(
+        status=OutboxEmail.PENDING, attempts=0, next_attempt_at=timezone.now(), claim_token=None,
+    )
+    modeladmin.message_user(request, f"{retried} email(s) queued for another attempt.", level=messages.SUCCESS)
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject',)
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'claim_token', 'last_error')
+    actions = [retry_outbox_emails]
+
 # --- 3. Register Remaining Models ---
 admin.site.register(Sponsor)
 admin.site.register(UserProfile)
-admin.site.register(Payment)
\ No newline at end of file
+admin.site.register(Payment)
+admin.site.register(SeatHold)
+admin.site.register(WaitingRoom)
+admin.site.register(ExportJob)
\ No newline at end of file
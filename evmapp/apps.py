@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class EvmappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'evmapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(install_search_index, sender=self)
+
+
+def install_search_index(sender, verbosity=1, **kwargs):
+    # Recreates the attendee search index if a migration rebuilt evmapp_booking
+    from django.db import DatabaseError
+    from .search import install
+    try:
+        install()
+    except DatabaseError as exc:
+        # Search still works without it, as a slower icontains scan
+        if verbosity:
+            print(f'Attendee search index not installed: {exc}')
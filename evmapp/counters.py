@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import kpis, rollups
+from .models import Booking, Event
+
+COUNTER_FIELDS = ('booking_count', 'tickets_sold', 'tickets_paid', 'tickets_verified', 'revenue')
+
+
+def booking_contribution(booking):
+    """Returns what a single booking adds to its event's counters"""
+    tickets = booking.number_of_tickets or 0
+    return {
+        'booking_count': 1,
+        'tickets_sold': tickets,
+        'tickets_paid': tickets if booking.is_paid else 0,
+        'tickets_verified': tickets if booking.is_verified else 0,
+        'revenue': Decimal(booking.total_cost or 0) if booking.is_paid else Decimal('0'),
+    }
+
+
+def apply_counter_delta(event_id, delta, sign=1, booked_at=None, rollup=True):
+    """
+    Adds (sign=1) or subtracts (sign=-1) a counter delta with a single UPDATE, and records it
+    in the rollup hour of `booked_at` (the booking's booking_date). Callers covering bookings
+    from different hours pass rollup=False and use rollups.record_bookings() instead.
+    """
+    changes = {
+        field: F(field) + sign * value
+        for field, value in delta.items()
+        if value
+    }
+    if event_id and changes:
+        Event.objects.filter(pk=event_id).update(**changes)
+        if rollup:
+            rollups.record(event_id, delta, booked_at, sign)
+        kpis.apply_delta(
+            series_changed=bool(delta.get('revenue')),
+            total_funds=sign * delta.get('revenue', 0),
+            tickets_sold=sign * delta.get('tickets_paid', 0),
+        )
+
+
+def booking_changed(event_id_before, before, event_id_after, after, booked_at=None):
+    """Moves counters from a booking's old state to its new state"""
+    if event_id_before != event_id_after:
+        if before:
+            apply_counter_delta(event_id_before, before, sign=-1, booked_at=booked_at)
+        if after:
+            apply_counter_delta(event_id_after, after, booked_at=booked_at)
+        return
+
+    delta = {}
+    for field in COUNTER_FIELDS:
+        old = before[field] if before else 0
+        new = after[field] if after else 0
+        delta[field] = new - old
+    apply_counter_delta(event_id_after, delta, booked_at=booked_at)
+
+
+def aggregate_counters(bookings=None):
+    """Computes counters from scratch, grouped by event_id, in one pass over Booking"""
+    if bookings is None:
+        bookings = Booking.objects.all()
+    zero_money = Value(Decimal('0'))
+    rows = (
+        bookings.values('event_id')
+        .annotate(
+            booking_count=Count('id'),
+            tickets_sold=Coalesce(Sum('number_of_tickets'), 0),
+            tickets_paid=Coalesce(Sum('number_of_tickets', filter=Q(is_paid=True)), 0),
+            tickets_verified=Coalesce(Sum('number_of_tickets', filter=Q(is_verified=True)), 0),
+            revenue=Coalesce(Sum('total_cost', filter=Q(is_paid=True)), zero_money),
+        )
+        .order_by()
+    )
+    return {row.pop('event_id'): row for row in rows}
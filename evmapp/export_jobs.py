@@ -0,0 +1,169 @@
+"""
+Background participant/payment exports.
+
+Staff queue an ExportJob from the web; `manage.py run_export_jobs` claims queued jobs one at a
+time, writes the file in chunks under MEDIA_ROOT/exports/ (reporting rows_written as it goes so
+the page can poll progress), and deletes files once EXPORT_RETENTION_HOURS have passed.
+"""
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from . import exports, typed_exports
+from .models import ExportJob
+
+SOURCES = {
+    ExportJob.PARTICIPANTS: (exports.participants, exports.COLUMNS, exports.DEFAULT_COLUMNS),
+    ExportJob.PAYMENTS: (exports.payments, exports.PAYMENT_COLUMNS, tuple(exports.PAYMENT_COLUMNS)),
+}
+DATASETS = {ExportJob.PARTICIPANTS: 'bookings', ExportJob.PAYMENTS: 'payments'}  # typed_exports dataset per kind
+PROGRESS_EVERY = 5  # chunks between rows_written updates
+
+
+def retention():
+    return timedelta(hours=getattr(settings, 'EXPORT_RETENTION_HOURS', 48))
+
+
+def queue_export(kind, user=None, event=None, columns=None, gzip=False, fmt='csv'):
+    """
+    Validates the options and queues a job; raises ValueError for an unknown kind, format or
+    column. Column selection applies to CSV; the typed formats always carry the full schema.
+    """
+    if kind not in SOURCES:
+        raise ValueError(f'Unknown export kind: {kind}')
+    if fmt != 'csv' and fmt not in typed_exports.FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Choose from: csv, {', '.join(typed_exports.FORMATS)}")
+    try:
+        typed_exports.require(fmt)
+    except typed_exports.MissingDependency as e:
+        raise ValueError(str(e))
+    _, column_map, default = SOURCES[kind]
+    columns = exports.parse_columns(columns, column_map, default) if fmt == 'csv' else None
+    return ExportJob.objects.create(
+        kind=kind, event=event, requested_by=user if user and user.is_authenticated else None,
+        options={'format': fmt, 'columns': columns, 'gzip': bool(gzip) and fmt in ('csv', 'jsonl')},
+    )
+
+
+def claim_next():
+    """Moves the oldest queued job to running; the conditional UPDATE lets several workers share the queue"""
+    for job_id in ExportJob.objects.filter(status=ExportJob.QUEUED).order_by('created_at', 'id').values_list('id', flat=True)[:10]:
+        claimed = ExportJob.objects.filter(id=job_id, status=ExportJob.QUEUED).update(
+            status=ExportJob.RUNNING, started_at=timezone.now(),
+        )
+        if claimed:
+            return ExportJob.objects.get(id=job_id)
+    return None
+
+
+def file_name(job):
+    # Random name: the download view checks permissions, but the file should not be guessable either
+    fmt = job.options.get('format', 'csv')
+    extension = '.csv' if fmt == 'csv' else typed_exports.FORMATS[fmt][1]
+    if job.options.get('gzip'):
+        extension += '.gz'
+    return f'exports/{job.kind}-{job.pk}-{uuid.uuid4().hex}{extension}'
+
+
+def counted(rows, job_id):
+    """Passes rows through, bumping rows_written every PROGRESS_EVERY chunks"""
+    step = exports.chunk_size() * PROGRESS_EVERY
+    written = 0
+    for written, row in enumerate(rows, 1):
+        yield row
+        if written % step == 0:
+            ExportJob.objects.filter(id=job_id).update(rows_written=written)
+    ExportJob.objects.filter(id=job_id).update(rows_written=written)
+
+
+def file_chunks(job, queryset):
+    """Encoded pieces of a CSV or JSONL job (the formats that can be streamed)"""
+    if job.options.get('format', 'csv') == 'jsonl':
+        return typed_exports.jsonl_chunks(DATASETS[job.kind], job.event_id, progress=lambda rows: report(job, rows))
+    _, column_map, default = SOURCES[job.kind]
+    columns = job.options.get('columns') or list(default)
+    return exports.csv_chunks(
+        counted(exports.export_rows(queryset, columns, column_map), job.pk),
+        exports.headers(columns, column_map), rows_per_chunk=exports.chunk_size(),
+    )
+
+
+def report(job, rows):
+    ExportJob.objects.filter(id=job.pk).update(rows_written=rows)
+
+
+def run_job(job):
+    """Writes the export file for a claimed job and marks it done (or failed with the error)"""
+    source, _, _ = SOURCES[job.kind]
+    queryset = source(job.event_id)
+    ExportJob.objects.filter(id=job.pk).update(total_rows=queryset.count())
+
+    fmt = job.options.get('format', 'csv')
+    name = file_name(job)
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        if fmt in ('parquet', 'xlsx'):
+            typed_exports.write(DATASETS[job.kind], fmt, path, job.event_id, progress=lambda rows: report(job, rows))
+        else:
+            chunks = file_chunks(job, queryset)
+            if job.options.get('gzip'):
+                chunks = exports.gzip_chunks(chunks)
+            with open(path, 'wb') as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        ExportJob.objects.filter(id=job.pk).update(
+            status=ExportJob.FAILED, error=str(e), finished_at=timezone.now(),
+        )
+        raise
+
+    now = timezone.now()
+    ExportJob.objects.filter(id=job.pk).update(
+        status=ExportJob.DONE, file=name, finished_at=now, expires_at=now + retention(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def requeue_stale(minutes=60):
+    """Jobs left running by a crashed worker go back to the queue"""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return ExportJob.objects.filter(status=ExportJob.RUNNING, started_at__lt=cutoff).update(
+        status=ExportJob.QUEUED, started_at=None, rows_written=0,
+    )
+
+
+def expire_jobs(now=None):
+    """Deletes files past their retention period and marks those jobs expired"""
+    now = now or timezone.now()
+    expired = 0
+    for job in ExportJob.objects.filter(status=ExportJob.DONE, expires_at__lte=now).only('id', 'file'):
+        if job.file and default_storage.exists(job.file.name):
+            default_storage.delete(job.file.name)
+        expired += ExportJob.objects.filter(id=job.pk, status=ExportJob.DONE).update(
+            status=ExportJob.EXPIRED, file='',
+        )
+    return expired
+
+
+def status(job):
+    """JSON-friendly job state for the polling endpoint"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_written': job.rows_written,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'download_url': reverse('export_job_download', args=[job.pk]) if job.status == ExportJob.DONE else None,
+    }
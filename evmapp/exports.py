@@ -0,0 +1,109 @@
+import csv
+import io
+import zlib
+
+from django.conf import settings
+
+from .models import Booking, Payment
+
+
+def yes_no(value):
+    return 'Yes' if value else 'No'
+
+
+def iso(value):
+    return value.isoformat() if value else ''
+
+
+# column key: (CSV header, Booking value path, formatter or None)
+COLUMNS = {
+    'name': ('Name', 'name', None),
+    'contact_number': ('Contact Number', 'contact_number', None),
+    'tickets': ('Tickets', 'number_of_tickets', None),
+    'total_cost': ('Total Cost', 'total_cost', None),
+    'ticket_id': ('Ticket ID', 'ticket_id', None),
+    'payment_ref': ('Payment Ref', 'payment_ref', None),
+    'verified': ('Verified', 'is_verified', yes_no),
+    'paid': ('Paid', 'is_paid', yes_no),
+    'email': ('Email', 'email', None),
+    'event': ('Event', 'event__event_name', None),
+    'booking_date': ('Booking Date', 'booking_date', iso),
+    'group_ref': ('Group Ref', 'group_ref', None),
+}
+DEFAULT_COLUMNS = ('name', 'contact_number', 'tickets', 'total_cost', 'ticket_id', 'payment_ref', 'verified')
+
+PAYMENT_COLUMNS = {
+    'order_id': ('Order ID', 'razorpay_order_id', None),
+    'payment_id': ('Payment ID', 'razorpay_payment_id', None),
+    'ticket_id': ('Ticket ID', 'booking__ticket_id', None),
+    'event': ('Event', 'booking__event__event_name', None),
+    'amount': ('Amount', 'amount', None),
+    'currency': ('Currency', 'currency', None),
+    'status': ('Status', 'status', None),
+    'method': ('Method', 'method', None),
+    'created_at': ('Created', 'created_at', iso),
+}
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def parse_columns(value, column_map=COLUMNS, default=DEFAULT_COLUMNS):
+    """'name,email' -> ['name', 'email']; raises ValueError naming any unknown column"""
+    if not value:
+        return list(default)
+    columns = [column.strip() for column in value.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in column_map]
+    if unknown or not columns:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown) or '(none)'}. Choose from: {', '.join(column_map)}")
+    return columns
+
+
+def participants(event_id=None):
+    bookings = Booking.objects.all()
+    if event_id:
+        bookings = bookings.filter(event_id=event_id)
+    return bookings.order_by('id')
+
+
+def payments(event_id=None):
+    rows = Payment.objects.all()
+    if event_id:
+        rows = rows.filter(booking__event_id=event_id)
+    return rows.order_by('id')
+
+
+def export_rows(queryset, columns, column_map=COLUMNS):
+    """Formatted row tuples straight from a values_list cursor, chunk_size() rows at a time"""
+    fields = [column_map[column][1] for column in columns]
+    formatters = [column_map[column][2] for column in columns]
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size()):
+        yield [fmt(value) if fmt else value for fmt, value in zip(formatters, row)]
+
+
+def headers(columns, column_map=COLUMNS):
+    return [column_map[column][0] for column in columns]
+
+
+def csv_chunks(rows, header, rows_per_chunk=500):
+    """Encoded CSV in pieces of rows_per_chunk rows, so only one piece is ever in memory"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
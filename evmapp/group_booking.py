@@ -0,0 +1,183 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.template.loader import render_to_string
+from django.core.mail import EmailMessage
+from django.urls import reverse
+
+from . import outbox, rollups, search, versions
+from .counters import COUNTER_FIELDS, apply_counter_delta, booking_contribution
+from .holds import claim_holds, hold_ttl, reserve_for_checkout
+from .inventory import Reservation, seats_remaining
+from .models import Booking, SeatHold
+from .ticket_ids import allocator
+
+
+class GroupBookingError(Exception):
+    pass
+
+
+def normalise_contact_number(contact_number):
+    contact_number = (contact_number or '').strip()
+    if contact_number and not contact_number.startswith('+'):
+        contact_number = f'+91{contact_number}'
+    return contact_number
+
+
+def discounted_price(event, group_size):
+    """Per-ticket price after Event.group_discount, which applies from GROUP_BOOKING_MIN_SIZE attendees"""
+    price = Decimal(event.price_per_ticket or 0)
+    discount = Decimal(event.group_discount or 0)
+    if group_size < getattr(settings, 'GROUP_BOOKING_MIN_SIZE', 2) or discount <= 0:
+        return price
+    discount = min(discount, Decimal('100'))
+    return (price * (Decimal('100') - discount) / Decimal('100')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def clean_attendees(attendees, contact):
+    """Validates the attendee list, falling back to the group contact for missing email/phone"""
+    if not isinstance(attendees, list) or not attendees:
+        raise GroupBookingError('Please provide at least one attendee.')
+    max_size = getattr(settings, 'GROUP_BOOKING_MAX_SIZE', 200)
+    if len(attendees) > max_size:
+        raise GroupBookingError(f'A group booking can have at most {max_size} attendees.')
+
+    cleaned = []
+    for index, attendee in enumerate(attendees, start=1):
+        if not isinstance(attendee, dict) or not str(attendee.get('name') or '').strip():
+            raise GroupBookingError(f'Attendee {index} needs a name.')
+        cleaned.append({
+            'name': str(attendee['name']).strip(),
+            'email': str(attendee.get('email') or contact['email']).strip(),
+            'contact_number': normalise_contact_number(attendee.get('contact_number') or contact['contact_number']),
+        })
+    return cleaned
+
+
+def create_group_booking(event, contact, attendees, site_url=''):
+    """
+    Books one ticket per attendee in a single transaction: one seat reservation for
+    the whole group, one ticket-ID block, one bulk_create for the Booking rows (and
+    their seat holds for paid events), and one counter update.
+
+    Returns (bookings, reservation); bookings is empty when the event can't fit the group.
+    site_url (scheme and host) is used to build the payment link in the confirmation email.
+    """
+    attendees = clean_attendees(attendees, contact)
+    unit_price = discounted_price(event, len(attendees))
+    is_free = unit_price <= 0
+
+    with transaction.atomic():
+        reservation = reserve_for_checkout(event.id, len(attendees))
+        if not reservation.ok:
+            return [], reservation
+
+        ticket_ids = allocator.allocate(len(attendees))
+        group_ref = ticket_ids[0]
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                event=event,
+                number_of_tickets=1,
+                name=attendee['name'],
+                contact_number=attendee['contact_number'],
+                email=attendee['email'],
+                total_cost=unit_price,
+                ticket_id=ticket_id,
+                group_ref=group_ref,
+                is_paid=False,
+                is_verified=is_free,
+                paid=False,
+            )
+            for attendee, ticket_id in zip(attendees, ticket_ids)
+        ])
+        if any(booking.pk is None for booking in bookings):
+            bookings = list(Booking.objects.filter(group_ref=group_ref).order_by('id'))
+
+        # bulk_create skips the post_save signals, so apply the counters for the whole group at once
+        delta = {field: sum(booking_contribution(b)[field] for b in bookings) for field in COUNTER_FIELDS}
+        apply_counter_delta(event.id, delta, rollup=False)
+        rollups.record_bookings((event.id, b.booking_date, booking_contribution(b)) for b in bookings)
+        search.index_bookings(bookings)
+        versions.bump('booking', 'event')
+
+        if not is_free:
+            expires_at = bookings[0].booking_date + hold_ttl()
+            SeatHold.objects.bulk_create([
+                SeatHold(booking=b, event_id=event.id, quantity=b.number_of_tickets, expires_at=expires_at)
+                for b in bookings
+            ])
+
+        send_group_confirmation_email(event, contact, bookings, unit_price, site_url)
+
+    return bookings, reservation
+
+
+def group_members(group_ref):
+    return Booking.objects.filter(group_ref=group_ref)
+
+
+def settle_group_payment(lead, payment_ref, screenshot=None):
+    """
+    Records one payment reference for every unpaid booking in the lead's group, converting
+    their seat holds (or re-reserving seats whose holds lapsed) in the same transaction.
+    """
+    with transaction.atomic():
+        members = group_members(lead.group_ref).select_for_update().filter(is_paid=False, is_verified=False)
+        ids = list(members.values_list('id', flat=True))
+        if not ids:
+            return Reservation(ok=True, requested=0, remaining=seats_remaining(lead.event_id))
+
+        unpaid = Booking.objects.filter(id__in=ids)
+        totals = unpaid.aggregate(tickets=Sum('number_of_tickets'), revenue=Sum('total_cost'))
+        missing = (totals['tickets'] or 0) - claim_holds(unpaid)
+        if missing > 0:
+            reservation = reserve_for_checkout(lead.event_id, missing)
+            if not reservation.ok:
+                transaction.set_rollback(True)
+                return reservation
+
+        paying = list(unpaid.values_list('booking_date', 'number_of_tickets', 'total_cost'))
+        unpaid.update(is_paid=True, is_verified=False, payment_ref=payment_ref)
+        search.index_bookings(unpaid.only('id', *search.SEARCH_FIELDS))
+        apply_counter_delta(
+            lead.event_id, {'tickets_paid': totals['tickets'] or 0, 'revenue': totals['revenue'] or 0}, rollup=False,
+        )
+        rollups.record_bookings(
+            (lead.event_id, booked_at, {'tickets_paid': tickets, 'revenue': cost or 0})
+            for booked_at, tickets, cost in paying
+        )
+        versions.bump('booking', 'event')
+
+        if screenshot:
+            lead.refresh_from_db()
+            lead.payment_screenshot = screenshot
+            lead.save(update_fields=['payment_screenshot'])
+
+    return Reservation(ok=True, requested=totals['tickets'] or 0, remaining=seats_remaining(lead.event_id))
+
+
+def send_group_confirmation_email(event, contact, bookings, unit_price, site_url=''):
+    """Queues one consolidated email with every ticket in the group for the group contact"""
+    paid = unit_price > 0
+    context = {
+        'event': event,
+        'contact_name': contact['name'],
+        'bookings': bookings,
+        'group_ref': bookings[0].group_ref,
+        'total_cost': unit_price * len(bookings),
+        'discount': event.group_discount if unit_price < event.price_per_ticket else None,
+        'paid': paid,
+        'payment_url': site_url + reverse('qr_payment', args=[bookings[0].id]),
+    }
+    try:
+        subject = f'🎫 Group Booking: {event.event_name} | {len(bookings)} tickets | Ref {bookings[0].group_ref}'
+        message = render_to_string('evmapp/email/group_booking_confirmation.html', context)
+        email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [contact['email']])
+        email.content_subtype = "html"
+        outbox.enqueue_message(email, kind='group_booking_confirmation')
+        return True
+    except Exception as e:
+        print(f"Failed to queue group booking email to {contact['email']}: {str(e)}")
+        return False
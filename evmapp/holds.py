@@ -0,0 +1,116 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .inventory import Reservation, release_seats, reserve_seats, seats_remaining
+from .models import SeatHold
+
+
+def hold_ttl():
+    return timedelta(minutes=getattr(settings, 'SEAT_HOLD_MINUTES', 15))
+
+
+def is_settled(booking):
+    """A settled booking (paid or verified) keeps its seats without a hold"""
+    return bool(booking.is_paid or booking.is_verified)
+
+
+def reserve_for_checkout(event_id, quantity):
+    """
+    Reserves seats, sweeping this event's expired holds once if it looks sold out,
+    so availability only counts live holds plus settled bookings.
+    """
+    reservation = reserve_seats(event_id, quantity)
+    if not reservation.ok and release_expired_holds(event_id=event_id):
+        reservation = reserve_seats(event_id, quantity)
+    return reservation
+
+
+def place_hold(booking):
+    """Holds the booking's (already reserved) seats until the payment window closes"""
+    return SeatHold.objects.create(
+        booking=booking,
+        event_id=booking.event_id,
+        quantity=booking.number_of_tickets,
+        expires_at=timezone.now() + hold_ttl(),
+    )
+
+
+def hold_expires_at(booking):
+    return (
+        SeatHold.objects.filter(booking=booking, sweep_token__isnull=True)
+        .values_list('expires_at', flat=True)
+        .first()
+    )
+
+
+def claim_hold(booking):
+    """
+    Removes the booking's live hold and returns how many seats it was holding.
+    The single DELETE races safely with the sweeper's claim UPDATE, so a hold is
+    either converted here or released there, never both.
+    """
+    quantity = (
+        SeatHold.objects.filter(booking=booking, sweep_token__isnull=True)
+        .values_list('quantity', flat=True)
+        .first()
+    )
+    if quantity is None:
+        return 0
+    deleted, _ = SeatHold.objects.filter(booking=booking, sweep_token__isnull=True).delete()
+    return quantity if deleted else 0
+
+
+def claim_holds(bookings):
+    """Claims the live holds of several bookings at once and returns the seats they were holding"""
+    token = uuid.uuid4()
+    if not SeatHold.objects.filter(booking__in=bookings, sweep_token__isnull=True).update(sweep_token=token):
+        return 0
+    claimed = SeatHold.objects.filter(sweep_token=token)
+    seats = claimed.aggregate(seats=Sum('quantity'))['seats'] or 0
+    claimed.delete()
+    return seats
+
+
+def confirm_hold(booking, force=False):
+    """
+    Turns the booking's hold into a settled reservation. If the hold has already
+    expired, the seats are reserved again; with force=True they are reserved even
+    when the event has since sold out (used when a payment is already verified).
+    """
+    if claim_hold(booking):
+        return Reservation(ok=True, requested=booking.number_of_tickets, remaining=seats_remaining(booking.event_id))
+    if force:
+        return reserve_seats(booking.event_id, booking.number_of_tickets, force=True)
+    return reserve_for_checkout(booking.event_id, booking.number_of_tickets)
+
+
+def release_expired_holds(now=None, event_id=None):
+    """
+    Releases every expired hold in bulk and returns the number of seats freed.
+
+    Expired rows are claimed with one indexed UPDATE on expires_at, their seats
+    are returned with one UPDATE per affected event, and the claimed rows are
+    removed with one DELETE.
+    """
+    now = now or timezone.now()
+    token = uuid.uuid4()
+    expired = SeatHold.objects.filter(expires_at__lte=now, sweep_token__isnull=True)
+    if event_id is not None:
+        expired = expired.filter(event_id=event_id)
+
+    with transaction.atomic():
+        if not expired.update(sweep_token=token):
+            return 0
+        claimed = SeatHold.objects.filter(sweep_token=token)
+        per_event = claimed.values('event_id').annotate(seats=Sum('quantity')).order_by()
+        released = 0
+        for row in per_event:
+            release_seats(row['event_id'], row['seats'])
+            released += row['seats']
+        claimed.delete()
+    return released
@@ -0,0 +1,154 @@
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .page_cache import CSRF_INPUT
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+FORM_FIELD = 'idempotency_key'
+IGNORED_FIELDS = {'csrfmiddlewaretoken', FORM_FIELD}
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_HOURS', 24))
+
+
+def stale_after():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_STALE_SECONDS', 120))
+
+
+def owner(request):
+    """Keys are only shared within one user (or anonymous session), never across visitors"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if not request.session.session_key:
+        request.session.save()
+    return f'session:{request.session.session_key}'
+
+
+def request_key(request):
+    key = request.META.get(HEADER) or request.POST.get(FORM_FIELD) or ''
+    return key.strip()[:64]
+
+
+def fingerprint(request):
+    """Hash of what the request would write, so a reused key with a different payload is rejected"""
+    digest = hashlib.sha256(request.path.encode())
+    if request.content_type == 'application/json':
+        digest.update(request.body)
+    else:
+        for field in sorted(request.POST):
+            if field not in IGNORED_FIELDS:
+                digest.update(f'{field}={request.POST.getlist(field)}'.encode())
+        for field in sorted(request.FILES):
+            upload = request.FILES[field]
+            digest.update(f'{field}:{upload.name}:{upload.size}'.encode())
+    return digest.hexdigest()
+
+
+def replay(request, record):
+    if record.location:
+        response = HttpResponse(status=record.status_code)
+        response['Location'] = record.location
+    else:
+        # The stored page's form carries the first request's CSRF token; give it this visitor's current one
+        body = CSRF_INPUT.sub(lambda match: match.group(1) + get_token(request) + match.group(2), record.body)
+        response = HttpResponse(body, status=record.status_code, content_type=record.content_type or None)
+    response['Idempotent-Replay'] = 'true'
+    return response
+
+
+def store(record, response):
+    """Keeps successful responses and redirects; after an error the key is freed so a retry runs again"""
+    if isinstance(response, StreamingHttpResponse) or response.status_code >= 400:
+        record.delete()
+        return
+    record.status_code = response.status_code
+    record.location = response.get('Location', '')
+    record.content_type = response.get('Content-Type', '')
+    record.body = '' if record.location else response.content.decode(response.charset or 'utf-8', errors='replace')
+    record.save(update_fields=['status_code', 'location', 'content_type', 'body'])
+
+
+def wait_for(record_id, timeout):
+    """Polls for a concurrent request holding the same key to finish"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = IdempotencyKey.objects.filter(pk=record_id).first()
+        if record is None or record.status_code is not None:
+            return record
+        time.sleep(0.1)
+    return None
+
+
+def idempotent(scope):
+    """
+    Makes a POST view safe to retry. Clients send an Idempotency-Key header (or the
+    idempotency_key form field that templates render from request.idempotency_key);
+    the first response for a key is stored and replayed for every repeat, so retries
+    don't create extra bookings or send extra emails.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # A fresh key for the form this response renders; the incoming key is only used for this POST
+            request.idempotency_key = uuid.uuid4().hex
+            key = request_key(request) if request.method == 'POST' else ''
+            if not key:
+                return view(request, *args, **kwargs)
+
+            request_print = fingerprint(request)
+            visitor = owner(request)
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        scope=scope, owner=visitor, key=key, fingerprint=request_print,
+                        expires_at=timezone.now() + key_ttl(),
+                    )
+            except IntegrityError:
+                existing = IdempotencyKey.objects.filter(scope=scope, owner=visitor, key=key).first()
+                if existing is None:
+                    return view(request, *args, **kwargs)
+                now = timezone.now()
+                if existing.expires_at <= now:
+                    existing.delete()
+                    return wrapper(request, *args, **kwargs)
+                if existing.fingerprint != request_print:
+                    return JsonResponse({'error': 'Idempotency key was already used for a different request.'}, status=422)
+                if existing.status_code is None:
+                    if existing.created_at <= now - stale_after():
+                        # The first request died without storing a response; the retry takes the key over
+                        IdempotencyKey.objects.filter(pk=existing.pk, status_code__isnull=True).delete()
+                        return wrapper(request, *args, **kwargs)
+                    existing = wait_for(existing.pk, getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 5))
+                    if existing is None:
+                        # The first request failed and freed the key
+                        return wrapper(request, *args, **kwargs)
+                    if existing.status_code is None:
+                        return JsonResponse({'error': 'An identical request is still being processed.'}, status=409)
+                return replay(request, existing)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            store(record, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(now=None):
+    """Deletes expired keys with one range DELETE on the indexed expires_at column"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
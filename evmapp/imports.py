@@ -0,0 +1,404 @@
+"""
+Bulk CSV import of events, bookings and volunteers.
+
+The file is read IMPORT_BATCH_SIZE rows at a time. Each batch is validated with vectorised
+pandas checks, and the good rows go in with one bulk_create inside one transaction. bulk_create
+skips the model signals, so each batch then does their work itself: seat reservation, event
+counters, KPIs, search postings and cache invalidation. Bad rows are reported with their CSV
+line number and never block the rest of the file.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+import pandas as pd
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import kpis, notifications, outbox, rollups, search, versions
+from .counters import COUNTER_FIELDS, apply_counter_delta, booking_contribution
+from .inventory import reserve_seats, seats_remaining
+from .models import Booking, Event, SeatHold, Volunteer, start_of
+from .ticket_ids import allocator
+
+KINDS = ('events', 'bookings', 'volunteers')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f', ''}
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+PHONE_PATTERN = r'^\+\d{6,14}$'
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)  # [(csv line, message), ...]
+    notified: int = 0
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def batch_size():
+    return getattr(settings, 'IMPORT_BATCH_SIZE', 2000)
+
+
+class Batch:
+    """One chunk of the CSV plus the first error found on each row"""
+
+    def __init__(self, frame, first_line):
+        frame.columns = [str(column).strip().lower() for column in frame.columns]
+        frame = frame.apply(lambda column: column.str.strip())
+        # The chunk still holds blank lines (as empty rows), and a quoted value may span lines,
+        # so each row's CSV line is counted here before the blank rows are dropped
+        spans = 1 + frame.apply(lambda column: column.str.count('\n')).sum(axis=1)
+        lines = first_line + spans.cumsum() - spans
+        self.next_line = first_line + int(spans.sum())
+        blank = (frame == '').all(axis=1)
+        self.frame = frame[~blank]
+        self.lines = lines[~blank]
+        self.problems = pd.Series('', index=self.frame.index)
+
+    def column(self, name, default=''):
+        if name in self.frame:
+            return self.frame[name]
+        return pd.Series(default, index=self.frame.index, dtype=object)
+
+    def flag(self, mask, message):
+        self.problems = self.problems.mask(mask & (self.problems == ''), message)
+
+    def required(self, *names):
+        for name in names:
+            self.flag(self.column(name) == '', f'{name} is required')
+
+    def max_length(self, name, length):
+        self.flag(self.column(name).str.len() > length, f'{name} is longer than {length} characters')
+
+    def integer(self, name, default=None, minimum=0):
+        raw = self.column(name).replace('', default if default is not None else pd.NA)
+        values = pd.to_numeric(raw, errors='coerce')
+        self.flag(values.isna() | (values % 1 != 0) | (values < minimum), f'{name} must be a whole number of at least {minimum}')
+        return values.fillna(0).astype('int64')
+
+    def decimal(self, name, default=None, limit=10 ** 8):
+        raw = self.column(name)
+        values = pd.to_numeric(raw.replace('', pd.NA), errors='coerce')
+        given = raw != ''
+        self.flag(given & (values.isna() | (values < 0) | (values >= limit)), f'{name} must be an amount from 0 to {limit - 1}')
+        if default is None:
+            return raw
+        return raw.where(given, default)
+
+    def boolean(self, name, default=False):
+        raw = self.column(name, 'true' if default else '').str.lower()
+        self.flag(~raw.isin(TRUE_VALUES | FALSE_VALUES), f'{name} must be yes/no')
+        return raw.isin(TRUE_VALUES)
+
+    def email(self, name, required=False):
+        values = self.column(name)
+        invalid = ~values.str.match(EMAIL_PATTERN)
+        if not required:
+            invalid &= values != ''
+        self.flag(invalid, f'{name} is not a valid email address')
+        self.max_length(name, 254)
+        return values
+
+    def phone(self, name):
+        values = self.column(name).str.replace(r'[\s\-()]', '', regex=True)
+        values = values.where(values.str.startswith('+') | (values == ''), '+91' + values)
+        self.flag((values != '') & ~values.str.match(PHONE_PATTERN), f'{name} is not a valid phone number')
+        return values
+
+    def choice(self, name, choices, default):
+        by_key = {key.lower(): key for key, _ in choices}
+        by_label = {str(label).lower(): key for key, label in choices}
+        raw = self.column(name).str.lower()
+        values = raw.map(lambda value: by_key.get(value) or by_label.get(value) or (default if value == '' else None))
+        self.flag(values.isna(), f"{name} must be one of: {', '.join(key for key, _ in choices)}")
+        return values
+
+    @property
+    def valid(self):
+        return self.problems == ''
+
+    def records(self, values, *names):
+        """The valid rows as plain dicts of the raw `names` columns plus the validated `values`"""
+        valid = self.valid
+        data = {name: self.column(name)[valid] for name in names}
+        data.update({name: series[valid] for name, series in values.items()})
+        return pd.DataFrame(data, index=self.frame.index[valid]).to_dict('records')
+
+    def errors(self):
+        bad = ~self.valid
+        return list(zip(self.lines[bad].tolist(), self.problems[bad].tolist()))
+
+
+# --- events ---
+
+def validate_events(batch):
+    batch.required('event_name', 'organiser', 'date', 'time', 'venue', 'total_tickets')
+    for name, length in (('event_name', 200), ('organiser', 100), ('venue', 200), ('theme', 200), ('description', 250)):
+        batch.max_length(name, length)
+    dates = pd.to_datetime(batch.column('date'), format='ISO8601', errors='coerce')
+    batch.flag(dates.isna(), 'date must be YYYY-MM-DD')
+    times = pd.to_datetime('2000-01-01 ' + batch.column('time'), format='mixed', errors='coerce')
+    batch.flag(times.isna(), 'time must be HH:MM')
+    return {
+        'date': dates,
+        'time': times,
+        'total_tickets': batch.integer('total_tickets'),
+        'price_per_ticket': batch.decimal('price_per_ticket', default='0'),
+        'category': batch.choice('category', Event.EVENT_CATEGORIES, Event.OTHER),
+        'status': batch.boolean('status', default=True),
+    }
+
+
+def create_events(batch, values, options):
+    default_description = Event._meta.get_field('description').default
+    events = [
+        Event(
+            event_name=row['event_name'],
+            organiser=row['organiser'],
+            date=row['date'].date(),
+            time=row['time'].time(),
+            starts_at=start_of(row['date'].date(), row['time'].time()),
+            venue=row['venue'],
+            theme=row['theme'],
+            total_tickets=row['total_tickets'],
+            price_per_ticket=Decimal(row['price_per_ticket']),
+            free_ticket=Decimal(row['price_per_ticket']) == 0,
+            category=row['category'],
+            status=row['status'],
+            description=row['description'] or default_description,
+        )
+        for row in batch.records(values, 'event_name', 'organiser', 'venue', 'theme', 'description')
+    ]
+    if options['dry_run'] or not events:
+        return events
+    with transaction.atomic():
+        Event.objects.bulk_create(events)
+        kpis.apply_delta(total_events=len(events))
+    versions.bump('event')
+    return events
+
+
+# --- bookings ---
+
+def validate_bookings(batch):
+    batch.required('event_id', 'name', 'contact_number')
+    batch.max_length('name', 200)
+    batch.max_length('payment_ref', 255)
+    event_ids = batch.integer('event_id', minimum=1)
+    known = set(Event.objects.filter(id__in=set(event_ids.tolist())).values_list('id', flat=True))
+    batch.flag(~event_ids.isin(known), 'event_id does not match an event')
+    return {
+        'event_id': event_ids,
+        'email': batch.email('email'),
+        'contact_number': batch.phone('contact_number'),
+        'number_of_tickets': batch.integer('number_of_tickets', default='1', minimum=1),
+        'total_cost': batch.decimal('total_cost'),
+        'is_paid': batch.boolean('is_paid'),
+        'is_verified': batch.boolean('is_verified'),
+    }
+
+
+def reserve_for_import(batch, values, ignore_capacity):
+    """
+    Claims seats per event with one conditional UPDATE each. Rows beyond what an event can
+    still seat (or any rows for an inactive event) are flagged instead of being imported.
+    """
+    valid = batch.valid
+    for event_id, tickets in values['number_of_tickets'][valid].groupby(values['event_id'][valid]):
+        event_id = int(event_id)
+        if ignore_capacity:
+            reserve_seats(event_id, int(tickets.sum()), force=True)
+            continue
+        fits = tickets.cumsum() <= seats_remaining(event_id)
+        wanted = int(tickets[fits].sum())
+        if wanted and not reserve_seats(event_id, wanted).ok:
+            fits[:] = False
+        batch.flag(batch.lines.index.to_series().isin(tickets.index[~fits]), 'the event has no seats left (or is not active)')
+
+
+def import_hold_expiry(events, hold_minutes):
+    """
+    {event_id: hold expiry} for imported unpaid rows. They are reservations made elsewhere, so by
+    default they keep their seats until the event starts; hold_minutes gives them a payment window.
+    """
+    if hold_minutes is not None:
+        expires_at = timezone.now() + timedelta(minutes=hold_minutes)
+        return {event_id: expires_at for event_id in events}
+    return {event_id: starts_at for event_id, (_, starts_at) in events.items()}
+
+
+def create_bookings(batch, values, options):
+    events = {
+        event_id: (price, starts_at)
+        for event_id, price, starts_at in Event.objects.filter(id__in=set(values['event_id'].tolist()))
+        .values_list('id', 'price_per_ticket', 'starts_at')
+    }
+    prices = {event_id: price for event_id, (price, _) in events.items()}
+    with transaction.atomic():
+        if not options['dry_run']:
+            reserve_for_import(batch, values, options['ignore_capacity'])
+        rows = batch.records(values, 'name', 'payment_ref')
+        ticket_ids = allocator.allocate(len(rows)) if rows and not options['dry_run'] else [''] * len(rows)
+        bookings = [
+            Booking(
+                event_id=row['event_id'],
+                number_of_tickets=row['number_of_tickets'],
+                name=row['name'],
+                contact_number=row['contact_number'],
+                email=row['email'],
+                total_cost=Decimal(row['total_cost']) if row['total_cost'] else (prices.get(row['event_id']) or 0) * row['number_of_tickets'],
+                ticket_id=ticket_id,
+                payment_ref=row['payment_ref'] or None,
+                is_paid=row['is_paid'],
+                paid=row['is_paid'],
+                is_verified=row['is_verified'],
+            )
+            for row, ticket_id in zip(rows, ticket_ids)
+        ]
+        if options['dry_run'] or not bookings:
+            return bookings
+
+        bookings = Booking.objects.bulk_create(bookings)
+        if any(booking.pk is None for booking in bookings):
+            bookings = list(Booking.objects.filter(ticket_id__in=ticket_ids).order_by('id'))
+
+        # Unsettled rows hold their seats until paid; the hold is what payment converts
+        expiry = import_hold_expiry(events, options['hold_minutes'])
+        SeatHold.objects.bulk_create([
+            SeatHold(booking=b, event_id=b.event_id, quantity=b.number_of_tickets, expires_at=expiry[b.event_id])
+            for b in bookings if not (b.is_paid or b.is_verified)
+        ])
+
+        deltas = {}
+        for booking in bookings:
+            delta = deltas.setdefault(booking.event_id, dict.fromkeys(COUNTER_FIELDS, 0))
+            for name, value in booking_contribution(booking).items():
+                delta[name] += value
+        for event_id, delta in deltas.items():
+            apply_counter_delta(event_id, delta, rollup=False)
+        rollups.record_bookings((b.event_id, b.booking_date, booking_contribution(b)) for b in bookings)
+        search.index_bookings(bookings)
+    versions.bump('booking', 'event')
+    return bookings
+
+
+def booking_email(booking, events):
+    """A "Ticket Confirmed" email for settled (paid, verified or free) rows; rows still awaiting payment get none"""
+    if not (booking.is_paid or booking.is_verified or booking.total_cost == 0):
+        return None, None, None
+    event = events[booking.event_id]
+    payment_info = {'amount': booking.total_cost, 'currency': 'INR', 'is_free': booking.total_cost == 0}
+    subject = f'🎫 Ticket Confirmed: {event.event_name} | Ticket ID: {booking.ticket_id}'
+    try:
+        body = notifications.render('evmapp/email/booking_confirmation.html', booking, event, payment_info=payment_info)
+    except Exception:
+        body = f"Your ticket for {event.event_name} is confirmed. Ticket ID: {booking.ticket_id}"
+    return subject, body, booking.email
+
+
+# --- volunteers ---
+
+def validate_volunteers(batch):
+    batch.required('first_name', 'email', 'phone')
+    for name, length in (('first_name', 50), ('last_name', 50), ('city', 100), ('state', 100)):
+        batch.max_length(name, length)
+    return {
+        'email': batch.email('email', required=True),
+        'phone': batch.phone('phone'),
+        'volunteer_role': batch.choice('volunteer_role', Volunteer.ROLE_CHOICES, 'General'),
+        'status': batch.choice('status', Volunteer.STATUS_CHOICES, 'Pending'),
+        'availability': batch.column('availability').str.split(r'\s*[;|]\s*', regex=True),
+    }
+
+
+def create_volunteers(batch, values, options):
+    volunteers = [
+        Volunteer(
+            first_name=row['first_name'],
+            last_name=row['last_name'] or None,
+            email=row['email'],
+            phone=row['phone'],
+            address=row['address'] or None,
+            city=row['city'] or None,
+            state=row['state'] or None,
+            volunteer_role=row['volunteer_role'],
+            skills=row['skills'] or None,
+            availability=[slot for slot in row['availability'] if slot],
+            status=row['status'],
+        )
+        for row in batch.records(values, 'first_name', 'last_name', 'address', 'city', 'state', 'skills')
+    ]
+    if options['dry_run'] or not volunteers:
+        return volunteers
+    with transaction.atomic():
+        Volunteer.objects.bulk_create(volunteers)
+        kpis.apply_delta(series_changed=False, total_volunteers=len(volunteers))
+    versions.bump('volunteer')
+    return volunteers
+
+
+def volunteer_email(volunteer, events):
+    try:
+        body = render_to_string('evmapp/email/volunteer_confirmation.html', {'volunteer': volunteer})
+    except Exception:
+        body = f"Hello {volunteer.first_name}, thanks for volunteering!"
+    return 'Volunteer Application Received', body, volunteer.email
+
+
+PIPELINES = {
+    'events': (validate_events, create_events, None),
+    'bookings': (validate_bookings, create_bookings, booking_email),
+    'volunteers': (validate_volunteers, create_volunteers, volunteer_email),
+}
+
+
+def queue_notifications(objects, build_email):
+    """Queues one email per imported row (unless build_email gives no recipient) in the outbox with a single INSERT; returns how many"""
+    events = Event.objects.in_bulk({obj.event_id for obj in objects if hasattr(obj, 'event_id')})
+    messages = []
+    for obj in objects:
+        subject, body, to = build_email(obj, events)
+        if to:
+            message = EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [to])
+            message.content_subtype = 'html'
+            messages.append(message)
+    return len(outbox.enqueue_messages(messages, kind='import_confirmation'))
+
+
+def import_csv(kind, source, notify=False, ignore_capacity=False, dry_run=False, size=None, hold_minutes=None):
+    """
+    Imports a CSV (path or file object) of `kind` rows. Emails are off by default; with
+    notify=True each batch queues its confirmations in the outbox in the same transaction
+    (bookings only once settled: unpaid rows are not confirmed).
+    Unpaid bookings keep their seats until the event starts unless hold_minutes is given.
+    """
+    if kind not in PIPELINES:
+        raise ValueError(f"Unknown import kind: {kind}. Choose from: {', '.join(KINDS)}")
+    validate, create, build_email = PIPELINES[kind]
+    options = {'ignore_capacity': ignore_capacity, 'dry_run': dry_run, 'hold_minutes': hold_minutes}
+    result = ImportResult(kind)
+    first_line = 2  # line 1 is the header
+    reader = pd.read_csv(
+        source, dtype=str, keep_default_na=False, chunksize=size or batch_size(), skip_blank_lines=False,
+    )
+    for frame in reader:
+        batch = Batch(frame, first_line)
+        first_line = batch.next_line
+        values = validate(batch)
+        with transaction.atomic():
+            created = create(batch, values, options)
+            if notify and build_email and created and not dry_run:
+                result.notified += queue_notifications(created, build_email)
+        result.rows += len(batch.frame)
+        result.created += len(created)
+        result.errors.extend(batch.errors())
+    return result
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Event
+
+
+@dataclass
+class Reservation:
+    ok: bool
+    requested: int
+    remaining: int
+
+    @property
+    def message(self):
+        if self.ok:
+            return f"Reserved {self.requested} ticket(s)."
+        if self.remaining <= 0:
+            return "Sorry, this event is sold out."
+        return f"Only {self.remaining} ticket(s) left for this event."
+
+
+def seats_remaining(event_id):
+    """Returns the number of seats that can still be reserved (single pk lookup)"""
+    row = Event.objects.filter(pk=event_id).values('total_tickets', 'seats_reserved').first()
+    if row is None:
+        return 0
+    return max(row['total_tickets'] - row['seats_reserved'], 0)
+
+
+def reserve_seats(event_id, quantity, force=False):
+    """
+    Atomically claims `quantity` seats on an active event.
+
+    The capacity check and the increment happen in one conditional UPDATE, so
+    concurrent requests can never push seats_reserved past total_tickets. Call it
+    inside the same transaction.atomic block that creates the Booking so the seats
+    are given back if the booking insert fails. force=True skips the capacity and
+    status checks, for seats that are already paid for.
+    """
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+
+    events = Event.objects.filter(pk=event_id)
+    if not force:
+        events = events.filter(status=True, seats_reserved__lte=F('total_tickets') - quantity)
+    updated = events.update(seats_reserved=F('seats_reserved') + quantity)
+
+    if updated:
+        return Reservation(ok=True, requested=quantity, remaining=seats_remaining(event_id))
+    return Reservation(ok=False, requested=quantity, remaining=seats_remaining(event_id))
+
+
+def release_seats(event_id, quantity):
+    """Gives seats back to the pool, never letting the counter drop below zero"""
+    if quantity <= 0:
+        return
+    with transaction.atomic():
+        updated = Event.objects.filter(
+            pk=event_id, seats_reserved__gte=quantity
+        ).update(seats_reserved=F('seats_reserved') - quantity)
+        if not updated:
+            Event.objects.filter(pk=event_id).update(seats_reserved=0)
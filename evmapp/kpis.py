@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import DashboardSnapshot, Event, Sponsor, Volunteer
+
+SNAPSHOT_ID = 1
+
+
+def series_length():
+    return getattr(settings, 'DASHBOARD_SERIES_LENGTH', 30)
+
+
+def get_snapshot():
+    snapshot, _ = DashboardSnapshot.objects.get_or_create(pk=SNAPSHOT_ID)
+    return snapshot
+
+
+def revenue_series():
+    """Revenue per event for the most recent events, read from the per-event counters"""
+    rows = Event.objects.order_by('-starts_at', '-id').values_list('event_name', 'revenue')[:series_length()]
+    return [[name, str(revenue or 0)] for name, revenue in rows]
+
+
+def refresh_snapshot():
+    """Recomputes every KPI from the source tables (the periodic full refresh)"""
+    totals = Event.objects.aggregate(funds=Sum('revenue'), tickets=Sum('tickets_paid'))
+    now = timezone.now()
+    DashboardSnapshot.objects.update_or_create(pk=SNAPSHOT_ID, defaults={
+        'total_funds': totals['funds'] or Decimal('0'),
+        'tickets_sold': totals['tickets'] or 0,
+        'sponsor_funds': Sponsor.objects.aggregate(total=Sum('cost'))['total'] or Decimal('0'),
+        'total_events': Event.objects.count(),
+        'total_sponsors': Sponsor.objects.count(),
+        'total_volunteers': Volunteer.objects.count(),
+        'revenue_series': revenue_series(),
+        'series_stale': False,
+        'refreshed_at': now,
+        'updated_at': now,
+    })
+    return get_snapshot()
+
+
+def apply_delta(series_changed=True, **deltas):
+    """
+    Applies an incremental change (e.g. total_funds=Decimal('250')) to the snapshot with one
+    UPDATE, once the surrounding transaction commits. Every booking changes the same snapshot
+    row, so writing it inside the booking transaction would serialize bookings for different events.
+    """
+    changes = {field: F(field) + value for field, value in deltas.items() if value}
+    if series_changed:
+        changes['series_stale'] = True
+    if changes:
+        # robust: the booking is already committed; a failed delta is repaired by the next full refresh
+        transaction.on_commit(lambda: write_delta(changes), robust=True)
+
+
+def write_delta(changes):
+    changes['updated_at'] = timezone.now()
+    if not DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).update(**changes):
+        # No snapshot yet: build one from scratch, which already includes this change
+        refresh_snapshot()
+
+
+def read_snapshot():
+    """The dashboard's read path: one row, plus one bounded series query if bookings changed since"""
+    snapshot = get_snapshot()
+    if snapshot.refreshed_at is None:
+        return refresh_snapshot()
+    if snapshot.series_stale:
+        snapshot.revenue_series = revenue_series()
+        snapshot.series_stale = False
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).update(revenue_series=snapshot.revenue_series, series_stale=False)
+    return snapshot
+
+
+def is_stale(snapshot, now=None):
+    """True when the last full refresh is older than DASHBOARD_SNAPSHOT_MAX_AGE_MINUTES"""
+    if snapshot.refreshed_at is None:
+        return True
+    max_age = timedelta(minutes=getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_AGE_MINUTES', 60))
+    return (now or timezone.now()) - snapshot.refreshed_at > max_age
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from evmapp.rollups import drift, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or with --check, verify) the hourly sales rollup table from Booking.booking_date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events', help='Only rebuild these event ids (repeatable)')
+        parser.add_argument('--check', action='store_true', help='Only report drift; exit non-zero if any row is wrong')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            wrong = drift(options['events'])
+            for event_id, bucket, diff in wrong:
+                details = ', '.join(f'{field} {old} -> {new}' for field, (old, new) in diff.items())
+                self.stdout.write(self.style.WARNING(f'#{event_id} @ {bucket:%Y-%m-%d %H:00}: {details}'))
+            if wrong:
+                raise CommandError(f'{len(wrong)} rollup row(s) have drifted')
+            self.stdout.write(self.style.SUCCESS('Rollup checked: no drift'))
+            return
+        created = rebuild(options['events'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} hourly rollup row(s)'))
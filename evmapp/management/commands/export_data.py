@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from evmapp.typed_exports import DATASETS, FORMATS, MissingDependency, write
+
+
+class Command(BaseCommand):
+    help = 'Write bookings, payments or events as typed JSONL, Parquet or XLSX, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('output', help='File to write')
+        parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the output file extension')
+        parser.add_argument('--event', type=int, help='Only rows for this event id')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['output'].rsplit('.', 1)[-1].lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Cannot tell the format from {options['output']}; pass --format")
+        try:
+            rows = write(options['dataset'], fmt, options['output'], options['event'])
+        except (MissingDependency, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} {options['dataset']} row(s) to {options['output']}"))
@@ -0,0 +1,47 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from evmapp.imports import KINDS, import_csv
+
+
+class Command(BaseCommand):
+    help = 'Bulk import events, bookings or volunteers from a CSV file, in validated batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--batch-size', type=int, help='Rows per batch (default: IMPORT_BATCH_SIZE)')
+        parser.add_argument('--notify', action='store_true', help='Queue confirmation emails in the outbox for settled rows (off by default)')
+        parser.add_argument('--ignore-capacity', action='store_true', help='Import bookings even past an event\'s capacity')
+        parser.add_argument(
+            '--hold-minutes', type=int, metavar='MINUTES',
+            help='Release unpaid imported bookings\' seats after MINUTES (default: hold them until the event starts)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+        parser.add_argument('--errors', metavar='CSV', help='Write the rejected rows (line, error) to this file')
+
+    def handle(self, *args, **options):
+        try:
+            result = import_csv(
+                options['kind'], options['path'], notify=options['notify'], ignore_capacity=options['ignore_capacity'],
+                dry_run=options['dry_run'], size=options['batch_size'], hold_minutes=options['hold_minutes'],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {result.created} of {result.rows} {result.kind} row(s)'))
+        if result.notified:
+            self.stdout.write(f'Queued {result.notified} notification(s) for send_outbox')
+        if result.errors:
+            self.stdout.write(self.style.WARNING(f'{result.failed} row(s) rejected'))
+            for line, message in result.errors[:20]:
+                self.stdout.write(f'  line {line}: {message}')
+            if result.failed > 20 and not options['errors']:
+                self.stdout.write('  ... (use --errors to save them all)')
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(['line', 'error'])
+                writer.writerows(result.errors)
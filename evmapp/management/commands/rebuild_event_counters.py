@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from evmapp.counters import COUNTER_FIELDS, aggregate_counters
+from evmapp.models import Booking, Event, SeatHold
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or with --check, verify) the denormalized per-event booking counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift; exit non-zero if any counter is wrong')
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        drifted = 0
+
+        with transaction.atomic():
+            expected_by_event = aggregate_counters()
+            seats_by_event = self.expected_seats()
+            events = Event.objects.select_for_update().only('id', 'event_name', 'seats_reserved', *COUNTER_FIELDS)
+
+            for event in events:
+                expected = expected_by_event.get(event.id) or {field: 0 for field in COUNTER_FIELDS}
+                expected['revenue'] = Decimal(expected['revenue'] or 0)
+                expected['seats_reserved'] = seats_by_event.get(event.id, 0)
+
+                wrong = {
+                    field: (getattr(event, field), value)
+                    for field, value in expected.items()
+                    if getattr(event, field) != value
+                }
+                if not wrong:
+                    continue
+
+                drifted += 1
+                details = ', '.join(f'{field} {old} -> {new}' for field, (old, new) in wrong.items())
+                self.stdout.write(self.style.WARNING(f'{event.event_name} (#{event.id}): {details}'))
+                if not check_only:
+                    Event.objects.filter(pk=event.id).update(**expected)
+
+        if check_only and drifted:
+            raise CommandError(f'{drifted} event(s) have drifted counters')
+
+        verb = 'checked' if check_only else 'rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'Counters {verb}: {drifted} event(s) out of sync'))
+
+    def expected_seats(self):
+        """Seats held by settled (paid or verified) bookings plus live seat holds"""
+        seats = {}
+        settled = (
+            Booking.objects.filter(Q(is_paid=True) | Q(is_verified=True))
+            .values('event_id')
+            .annotate(seats=Sum('number_of_tickets'))
+            .order_by()
+        )
+        held = (
+            SeatHold.objects.filter(sweep_token__isnull=True, booking__is_paid=False, booking__is_verified=False)
+            .values('event_id')
+            .annotate(seats=Sum('quantity'))
+            .order_by()
+        )
+        for row in list(settled) + list(held):
+            seats[row['event_id']] = seats.get(row['event_id'], 0) + (row['seats'] or 0)
+        return seats
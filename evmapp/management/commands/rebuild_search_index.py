@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from evmapp.search import install
+
+
+class Command(BaseCommand):
+    help = 'Create (if missing) and fully rebuild the attendee search index for the current database'
+
+    def handle(self, *args, **options):
+        kind = install(rebuild=True)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the attendee search index ({kind})'))
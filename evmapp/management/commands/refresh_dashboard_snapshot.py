@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from evmapp.kpis import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized dashboard KPI snapshot from scratch'
+
+    def handle(self, *args, **options):
+        snapshot = refresh_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Dashboard snapshot refreshed: funds {snapshot.total_funds}, tickets {snapshot.tickets_sold}, '
+            f'sponsors {snapshot.sponsor_funds}, {len(snapshot.revenue_series)} series points'
+        ))
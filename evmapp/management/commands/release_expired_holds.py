@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from evmapp.holds import release_expired_holds
+from evmapp.models import Booking
+
+
+class Command(BaseCommand):
+    help = 'Release seats held by unpaid bookings whose payment window has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge-abandoned', type=int, metavar='HOURS', default=None,
+            help='Also delete unpaid bookings older than HOURS that no longer hold any seats',
+        )
+        parser.add_argument('--loop', action='store_true', help='Keep running, sweeping every --interval seconds')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.sweep(options)
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def sweep(self, options):
+        released = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Released {released} seat(s) from expired holds'))
+
+        hours = options['purge_abandoned']
+        if hours is not None:
+            cutoff = timezone.now() - timedelta(hours=hours)
+            abandoned = Booking.objects.filter(
+                is_paid=False,
+                is_verified=False,
+                booking_date__lt=cutoff,
+                seat_hold__isnull=True,
+            ).filter(Q(payment_ref__isnull=True) | Q(payment_ref=''))
+            deleted, _ = abandoned.delete()
+            self.stdout.write(self.style.SUCCESS(f'Purged {deleted} abandoned booking row(s)'))
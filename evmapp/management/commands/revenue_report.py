@@ -0,0 +1,47 @@
+import json
+import os
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from evmapp.reports import build_report
+from evmapp.rollups import parse_range
+
+TABLES = ('by_category', 'by_organiser', 'by_day', 'by_status', 'sponsors', 'conversion_by_category', 'conversion_by_event')
+
+
+class Command(BaseCommand):
+    help = 'Compute the revenue report (pivots by category, organiser, day, status, sponsors and conversion)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Only bookings made on/after this ISO date')
+        parser.add_argument('--end', help='Only bookings made before this ISO date')
+        parser.add_argument('--category', help='Only events in this category code')
+        parser.add_argument('--chunk-size', type=int, help='Bookings per chunk (default: REPORT_CHUNK_SIZE)')
+        parser.add_argument('--json', action='store_true', help='Print the whole report as JSON')
+        parser.add_argument('--csv-dir', help='Also write one CSV per table into this directory')
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        try:
+            if start or end:
+                start, end = parse_range(start, end)
+        except ValueError:
+            raise CommandError('--start and --end must be ISO dates or datetimes')
+
+        report = build_report(start, end, options['category'], size=options['chunk_size'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f"Scanned {report['bookings_scanned']} booking(s)")
+            for name, value in report['totals'].items():
+                self.stdout.write(f'  {name}: {value}')
+            for table in TABLES:
+                self.stdout.write(f'\n{table}')
+                self.stdout.write(pd.DataFrame(report[table]).to_string(index=False) if report[table] else '  (empty)')
+
+        if options['csv_dir']:
+            os.makedirs(options['csv_dir'], exist_ok=True)
+            for table in TABLES:
+                pd.DataFrame(report[table]).to_csv(os.path.join(options['csv_dir'], f'{table}.csv'), index=False)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(TABLES)} CSV file(s) to {options['csv_dir']}"))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from evmapp.export_jobs import claim_next, expire_jobs, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = 'Work through queued export jobs, writing each file in chunks under MEDIA_ROOT/exports/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit instead of polling')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--stale-minutes', type=int, default=60, help='Requeue jobs left running longer than this')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_jobs()
+            if expired:
+                self.stdout.write(f'Expired {expired} export file(s)')
+            requeued = requeue_stale(options['stale_minutes'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stalled job(s)'))
+
+            job = claim_next()
+            while job:
+                try:
+                    job = run_job(job)
+                    self.stdout.write(self.style.SUCCESS(f'{job}: {job.rows_written} row(s) -> {job.file.name}'))
+                except Exception as e:
+                    self.stderr.write(f'Export job #{job.pk} failed: {e}')
+                job = claim_next()
+
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
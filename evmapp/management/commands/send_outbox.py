@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from evmapp.outbox import DrainStats, backlog, drain, purge_sent, requeue_stale
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox in batches over one SMTP connection per batch and thread'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain what is due and exit instead of polling')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when nothing is due')
+        parser.add_argument('--batch-size', type=int, help='Emails per batch/connection (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Sending threads, each with its own connection (default: OUTBOX_WORKERS)')
+        parser.add_argument('--rate', type=float, help='Max emails per second across all threads (default: OUTBOX_RATE_PER_SECOND)')
+        parser.add_argument('--stale-minutes', type=int, default=15, help='Requeue emails stuck in sending longer than this')
+        parser.add_argument('--purge-sent-days', type=int, help='Also delete sent emails older than this many days')
+        parser.add_argument('--stats', action='store_true', help='Print the queue backlog and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for name, value in backlog().items():
+                self.stdout.write(f'{name}: {value}')
+            return
+
+        total = DrainStats()
+        try:
+            while True:
+                requeued = requeue_stale(options['stale_minutes'])
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} email(s) stuck in sending'))
+                if options['purge_sent_days'] is not None:
+                    purge_sent(options['purge_sent_days'])
+
+                stats = drain(size=options['batch_size'], workers=options['workers'], rate=options['rate'])
+                if stats.batches:
+                    total.add(stats)
+                    self.stdout.write(f'{stats} {stats.errors or ""}'.rstrip())
+                if options['once']:
+                    break
+                if not stats.batches:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Outbox: {total}'))
@@ -1,71 +1,34 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from evmapp.views import send_event_reminder_email
-from evmapp.models import Booking
-from datetime import timedelta
-import logging
+import time
 
-logger = logging.getLogger(__name__)
+from django.core.management.base import BaseCommand
 
-class Command(BaseCommand):
-    help = 'Send event reminders to participants'
+from evmapp import outbox, reminders
 
-    def handle(self, *args, **options):
-        now = timezone.now()
-        sent_count = 0
-        error_count = 0
 
-        # Send 24-hour reminders
-        tomorrow = now + timedelta(days=1)
-        day_before_bookings = Booking.objects.filter(
-            event__date=tomorrow.date(),
-            reminder_24h_sent=False
-        ).select_related('event')
-        
-        for booking in day_before_bookings:
-            try:
-                send_event_reminder_email(booking, hours_remaining=24)
-                booking.reminder_24h_sent = True
-                booking.last_reminder_sent = now
-                booking.save()
-                sent_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Sent 24h reminder for {booking.event.event_name} to {booking.email}'
-                    )
-                )
-            except Exception as e:
-                error_count += 1
-                logger.error(f'Failed to send 24h reminder to {booking.email}: {str(e)}')
+class Command(BaseCommand):
+    help = 'Queue the 24h and 2h event reminders that are due and deliver them through the outbox'
 
-        # Send 2-hour reminders
-        two_hours_from_now = now + timedelta(hours=2)
-        upcoming_bookings = Booking.objects.filter(
-            event__date=now.date(),
-            event__time__hour=two_hours_from_now.hour,
-            event__time__minute=two_hours_from_now.minute,
-            reminder_2h_sent=False
-        ).select_related('event')
-        
-        for booking in upcoming_bookings:
-            try:
-                send_event_reminder_email(booking, hours_remaining=2)
-                booking.reminder_2h_sent = True
-                booking.last_reminder_sent = now
-                booking.save()
-                sent_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Sent 2h reminder for {booking.event.event_name} to {booking.email}'
-                    )
-                )
-            except Exception as e:
-                error_count += 1
-                logger.error(f'Failed to send 2h reminder to {booking.email}: {str(e)}')
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running, checking every --interval seconds')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between checks with --loop')
+        parser.add_argument('--batch-size', type=int, help='Bookings claimed per transaction (default: REMINDER_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Sending threads (default: OUTBOX_WORKERS)')
+        parser.add_argument('--rate', type=float, help='Max emails per second across all threads (default: OUTBOX_RATE_PER_SECOND)')
+        parser.add_argument('--queue-only', action='store_true', help='Only queue the emails; leave delivery to send_outbox')
 
-        # Print summary
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Reminder task completed: {sent_count} reminders sent, {error_count} errors'
-            )
-        )
\ No newline at end of file
+    def handle(self, *args, **options):
+        try:
+            while True:
+                counts = reminders.schedule(size=options['batch_size'])
+                for hours, count in counts.items():
+                    if count:
+                        self.stdout.write(self.style.SUCCESS(f'Queued {count} {hours}h reminder(s)'))
+                if not options['queue_only']:
+                    stats = outbox.drain(workers=options['workers'], rate=options['rate'], kinds=[reminders.KIND])
+                    if stats.batches:
+                        self.stdout.write(f'Reminders: {stats} {stats.errors or ""}'.rstrip())
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:04
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_seats_reserved(apps, schema_editor):
+    Event = apps.get_model("evmapp", "Event")
+    Booking = apps.get_model("evmapp", "Booking")
+    totals = (
+        Booking.objects.values("event_id")
+        .annotate(seats=Sum("number_of_tickets"))
+        .order_by()
+    )
+    for row in totals:
+        Event.objects.filter(pk=row["event_id"]).update(
+            seats_reserved=max(row["seats"] or 0, 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="seats_reserved",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Seats claimed by bookings, kept in sync by evmapp.inventory",
+            ),
+        ),
+        migrations.RunPython(backfill_seats_reserved, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    Event = apps.get_model("evmapp", "Event")
+    Booking = apps.get_model("evmapp", "Booking")
+    rows = (
+        Booking.objects.values("event_id")
+        .annotate(
+            booking_count=Count("id"),
+            tickets_sold=Sum("number_of_tickets"),
+            tickets_paid=Sum("number_of_tickets", filter=Q(is_paid=True)),
+            tickets_verified=Sum("number_of_tickets", filter=Q(is_verified=True)),
+            revenue=Sum("total_cost", filter=Q(is_paid=True)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        Event.objects.filter(pk=row["event_id"]).update(
+            booking_count=row["booking_count"],
+            tickets_sold=row["tickets_sold"] or 0,
+            tickets_paid=row["tickets_paid"] or 0,
+            tickets_verified=row["tickets_verified"] or 0,
+            revenue=row["revenue"] or Decimal("0"),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0002_event_seats_reserved"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="booking_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="revenue",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="tickets_paid",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="tickets_sold",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="tickets_verified",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
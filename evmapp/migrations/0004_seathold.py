@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def recount_settled_seats(apps, schema_editor):
+    # Unpaid bookings from before seat holds existed no longer keep their seats.
+    Event = apps.get_model("evmapp", "Event")
+    Booking = apps.get_model("evmapp", "Booking")
+    settled = dict(
+        Booking.objects.filter(Q(is_paid=True) | Q(is_verified=True))
+        .values("event_id")
+        .annotate(seats=Sum("number_of_tickets"))
+        .order_by()
+        .values_list("event_id", "seats")
+    )
+    for event_id in Event.objects.values_list("pk", flat=True):
+        Event.objects.filter(pk=event_id).update(
+            seats_reserved=max(settled.get(event_id) or 0, 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0003_event_booking_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.IntegerField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "sweep_token",
+                    models.UUIDField(
+                        blank=True, db_index=True, editable=False, null=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "booking",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_hold",
+                        to="evmapp.booking",
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to="evmapp.event",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(recount_settled_seats, migrations.RunPython.noop),
+    ]
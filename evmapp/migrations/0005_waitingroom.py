@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0004_seathold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WaitingRoom",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "admit_per_minute",
+                    models.PositiveIntegerField(
+                        default=60,
+                        help_text="Visitors let through to booking per minute",
+                    ),
+                ),
+                (
+                    "initial_batch",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Visitors admitted straight away when the room opens",
+                    ),
+                ),
+                ("opened_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "last_position",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                (
+                    "event",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waiting_room",
+                        to="evmapp.event",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:09
+
+from django.db import migrations, models
+
+
+def create_ticket_sequence(apps, schema_editor):
+    TicketSequence = apps.get_model("evmapp", "TicketSequence")
+    TicketSequence.objects.get_or_create(name="tickets", defaults={"next_value": 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0005_waitingroom"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("next_value", models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_ticket_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0006_ticketsequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="group_ref",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Shared by all bookings made together through the group booking API.",
+                max_length=10,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0008_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_funds",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "sponsor_funds",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("total_events", models.IntegerField(default=0)),
+                ("total_sponsors", models.IntegerField(default=0)),
+                ("total_volunteers", models.IntegerField(default=0)),
+                (
+                    "revenue_series",
+                    models.JSONField(
+                        default=list,
+                        help_text="[[event name, revenue], ...] for the most recent events",
+                    ),
+                ),
+                ("series_stale", models.BooleanField(default=True)),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(
+                        blank=True, help_text="Last full recompute.", null=True
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        blank=True, help_text="Last incremental change.", null=True
+                    ),
+                ),
+            ],
+        ),
+    ]
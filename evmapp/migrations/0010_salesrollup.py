@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0009_dashboardsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField(help_text="Start of the hour (UTC).")),
+                ("booking_count", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                ("tickets_paid", models.IntegerField(default=0)),
+                ("tickets_verified", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="evmapp.event",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["bucket"], name="sales_rollup_bucket_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event", "bucket"), name="unique_sales_rollup_bucket"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0011_modelversion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["event", "booking_date", "id"], name="booking_event_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="volunteer",
+            index=models.Index(
+                fields=["created_at", "id"], name="volunteer_created_idx"
+            ),
+        ),
+    ]
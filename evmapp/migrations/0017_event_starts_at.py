@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:40
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_starts_at(apps, schema_editor):
+    Event = apps.get_model("evmapp", "Event")
+    events = list(Event.objects.only("id", "date", "time"))
+    for event in events:
+        event.starts_at = timezone.make_aware(datetime.combine(event.date, event.time))
+    Event.objects.bulk_update(events, ["starts_at"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0016_outboxemail"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="event",
+            name="event_status_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="event",
+            name="event_date_time_idx",
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="starts_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_starts_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="event",
+            name="starts_at",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["status", "starts_at"], name="event_status_starts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["starts_at"], name="event_starts_at_idx"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0017_event_starts_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="waitingroom",
+            name="admitted_at",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="When admitted_position was last advanced.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="waitingroom",
+            name="admitted_position",
+            field=models.PositiveIntegerField(
+                editable=False,
+                help_text="High-water mark of admitted positions; empty until first advanced.",
+                null=True,
+            ),
+        ),
+    ]
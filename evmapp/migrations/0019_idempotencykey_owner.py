@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evmapp", "0018_waitingroom_admitted_position"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="idempotencykey",
+            name="unique_idempotency_key",
+        ),
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="owner",
+            field=models.CharField(
+                default="",
+                help_text="user:<id> or session:<key>; keys are only shared within one visitor.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="idempotencykey",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "owner", "key"), name="unique_idempotency_key"
+            ),
+        ),
+    ]
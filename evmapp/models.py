@@ -1,5 +1,12 @@
+from datetime import datetime
+
 from django.db import models
-import uuid
+from django.utils import timezone
+
+
+def start_of(day, at):
+    """The aware datetime at which an event on local `day` at `at` starts"""
+    return timezone.make_aware(datetime.combine(day, at))
 
 class Sponsor(models.Model):
     name = models.CharField(max_length=100)
@@ -39,11 +46,14 @@ class Event(models.Model):
     organiser = models.CharField(max_length=100)
     time = models.TimeField()
     date = models.DateField()
+    # date + time as one aware timestamp for range scans; set on save() from date and time
+    starts_at = models.DateTimeField(editable=False)
     venue = models.CharField(max_length=200)
     venue_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     venue_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     theme = models.CharField(max_length=200)
     total_tickets = models.IntegerField()
+    seats_reserved = models.PositiveIntegerField(default=0, editable=False, help_text="Seats claimed by bookings, kept in sync by evmapp.inventory")
     price_per_ticket = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     sponsors = models.ManyToManyField(Sponsor)
     status = models.BooleanField(default=True)
@@ -51,15 +61,55 @@ class Event(models.Model):
     free_ticket = models.BooleanField(default=False, null=True)
     group_discount = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="Discount percentage for group bookings")
     
+    # Denormalized booking stats, kept exact by evmapp.counters (rebuild with `manage.py rebuild_event_counters`)
+    booking_count = models.IntegerField(default=0, editable=False)
+    tickets_sold = models.IntegerField(default=0, editable=False)
+    tickets_paid = models.IntegerField(default=0, editable=False)
+    tickets_verified = models.IntegerField(default=0, editable=False)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
     # --- ADDED FIELD ---
     payment_qr = models.ImageField(upload_to='event_qrs/', blank=True, null=True, help_text="Upload QR Code for payment here")
 
+    class Meta:
+        indexes = [
+            # Active events in start order (home, ticketbooking)
+            models.Index(fields=['status', 'starts_at'], name='event_status_starts_idx'),
+            # Reminder windows and the dashboard's latest-events series
+            models.Index(fields=['starts_at'], name='event_starts_at_idx'),
+        ]
+
     def __str__(self):
         return self.event_name
 
+    def sync_starts_at(self):
+        """Recomputes starts_at from date and time (which may still be form strings)"""
+        self.date = self._meta.get_field('date').to_python(self.date)
+        self.time = self._meta.get_field('time').to_python(self.time)
+        self.starts_at = start_of(self.date, self.time)
+
+    def save(self, *args, **kwargs):
+        self.sync_starts_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'starts_at'}
+        super().save(*args, **kwargs)
+
+
+class TicketSequence(models.Model):
+    """Monotonic counters handed out in blocks by evmapp.ticket_ids"""
+    TICKETS = 'tickets'
 
-def generate_ticket_id(length=5):
-    return uuid.uuid4().hex[:length].upper()
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+def generate_ticket_id():
+    from .ticket_ids import next_ticket_id
+    return next_ticket_id()
 
 
 class Booking(models.Model):
@@ -73,6 +123,7 @@ class Booking(models.Model):
     paid = models.BooleanField(default=False)
     payment_id = models.CharField(max_length=100, default='000', blank=True)
     ticket_id = models.CharField(max_length=10, unique=True, default=generate_ticket_id)
+    group_ref = models.CharField(max_length=10, blank=True, null=True, db_index=True, help_text="Shared by all bookings made together through the group booking API.")
     booking_date = models.DateTimeField(auto_now_add=True, null=True)
 
     # Email reminder tracking
@@ -86,10 +137,138 @@ class Booking(models.Model):
     payment_ref = models.CharField(max_length=255, blank=True, null=True, help_text="Transaction ID entered by user.")
     payment_screenshot = models.ImageField(upload_to='payment_screenshots/', blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of an event's guest list (evmapp.pagination)
+            models.Index(fields=['event', 'booking_date', 'id'], name='booking_event_date_idx'),
+            # Verification queue and exports per event
+            models.Index(fields=['event', 'is_verified'], name='booking_event_verified_idx'),
+            # my_bookings: one email's bookings, newest first
+            models.Index(fields=['email', 'booking_date', 'id'], name='booking_email_date_idx'),
+            # Partial indexes only hold the rows still waiting on something, so they stay small
+            models.Index(fields=['event'], condition=models.Q(is_paid=False), name='booking_unpaid_idx'),
+            models.Index(fields=['event'], condition=models.Q(reminder_24h_sent=False), name='booking_reminder_24h_idx'),
+            models.Index(fields=['event'], condition=models.Q(reminder_2h_sent=False), name='booking_reminder_2h_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.event.event_name}"
 
 
+class BookingSearchGram(models.Model):
+    """Trigram postings for attendee search on databases without FTS5/pg_trgm (see evmapp.search)"""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='search_grams')
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gram', 'booking'], name='unique_booking_search_gram'),
+        ]
+
+
+class SeatHold(models.Model):
+    """Seats reserved for an unpaid booking until expires_at; released by `manage.py release_expired_holds`"""
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='seat_hold')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='seat_holds')
+    quantity = models.IntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    sweep_token = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hold {self.quantity} for {self.booking_id} until {self.expires_at:%Y-%m-%d %H:%M}"
+
+
+class WaitingRoom(models.Model):
+    """Optional admission queue for flash-sale events; see evmapp.waiting_room"""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='waiting_room')
+    is_active = models.BooleanField(default=True)
+    admit_per_minute = models.PositiveIntegerField(default=60, help_text="Visitors let through to booking per minute")
+    initial_batch = models.PositiveIntegerField(default=0, help_text="Visitors admitted straight away when the room opens")
+    opened_at = models.DateTimeField(default=timezone.now)
+    last_position = models.PositiveIntegerField(default=0, editable=False)
+    admitted_position = models.PositiveIntegerField(null=True, editable=False, help_text="High-water mark of admitted positions; empty until first advanced.")
+    admitted_at = models.DateTimeField(null=True, editable=False, help_text="When admitted_position was last advanced.")
+
+    def __str__(self):
+        return f"Waiting room for {self.event}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored first response for a retried POST; see evmapp.idempotency"""
+    scope = models.CharField(max_length=50)
+    owner = models.CharField(max_length=64, default='', help_text="user:<id> or session:<key>; keys are only shared within one visitor.")
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Empty while the first request is still running.")
+    location = models.CharField(max_length=500, blank=True, default='')
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    body = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.owner}:{self.key}"
+
+
+class SalesRollup(models.Model):
+    """Hourly per-event booking totals (same fields as the Event counters); see evmapp.rollups"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='sales_rollups')
+    bucket = models.DateTimeField(help_text="Start of the hour (UTC).")
+    booking_count = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+    tickets_paid = models.IntegerField(default=0)
+    tickets_verified = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'bucket'], name='unique_sales_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='sales_rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} @ {self.bucket:%Y-%m-%d %H:00}"
+
+
+class DashboardSnapshot(models.Model):
+    """Single-row materialized dashboard KPIs, kept current by evmapp.kpis"""
+    total_funds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tickets_sold = models.IntegerField(default=0)
+    sponsor_funds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_events = models.IntegerField(default=0)
+    total_sponsors = models.IntegerField(default=0)
+    total_volunteers = models.IntegerField(default=0)
+    revenue_series = models.JSONField(default=list, help_text="[[event name, revenue], ...] for the most recent events")
+    series_stale = models.BooleanField(default=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True, help_text="Last full recompute.")
+    updated_at = models.DateTimeField(null=True, blank=True, help_text="Last incremental change.")
+
+    @property
+    def net_revenue(self):
+        return self.total_funds - self.sponsor_funds
+
+    def __str__(self):
+        return f"Dashboard snapshot ({self.refreshed_at})"
+
+
+class ModelVersion(models.Model):
+    """Per-model change counter, bumped on every write; the source of ETag/Last-Modified validators (see evmapp.versions)"""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField('auth.User', on_delete=models.CASCADE)
 
@@ -132,6 +311,9 @@ class Volunteer(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='volunteer_created_idx'),
+        ]
 
     def __str__(self):
         if self.first_name and self.last_name:
@@ -156,4 +338,85 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Payment {self.razorpay_order_id or self.razorpay_payment_id} - {self.status}"
\ No newline at end of file
+        return f"Payment {self.razorpay_order_id or self.razorpay_payment_id} - {self.status}"
+
+class ExportJob(models.Model):
+    """A queued participant/payment export, written to MEDIA_ROOT by `manage.py run_export_jobs` (see evmapp.export_jobs)"""
+    PARTICIPANTS = 'participants'
+    PAYMENTS = 'payments'
+    KIND_CHOICES = [(PARTICIPANTS, 'Participants'), (PAYMENTS, 'Payments')]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed'), (EXPIRED, 'Expired')]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=PARTICIPANTS)
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+    options = models.JSONField(default=dict, blank=True, help_text="columns, gzip")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    requested_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    total_rows = models.IntegerField(null=True, blank=True)
+    rows_written = models.IntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def progress(self):
+        if self.status == self.DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.total_rows))
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent. Written in the same transaction as the change it announces,
+    then delivered by `manage.py send_outbox` (see evmapp.outbox).
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENDING, 'Sending'), (SENT, 'Sent'), (DEAD, 'Dead letter')]
+
+    kind = models.CharField(max_length=40, blank=True, help_text="What triggered it, e.g. booking_confirmation")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html = models.BooleanField(default=True)
+    alternatives = models.JSONField(default=list, blank=True, help_text="[content, mimetype] pairs, e.g. an HTML part")
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    attachments = models.JSONField(default=list, blank=True, help_text="[filename, base64 content, mimetype] triples")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {', '.join(self.to)} ({self.status})"
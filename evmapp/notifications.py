@@ -0,0 +1,126 @@
+"""
+Pre-rendered notification emails.
+
+Booking emails differ between recipients of one event only in the booking's own fields
+(name, ticket id, ...). Each (template, event, extra context) is therefore rendered once
+with marker strings in place of those fields and split into literal parts; every recipient
+after that costs a join of the parts with their escaped, localized values. The first
+recipient of each compiled template is also rendered the normal way and compared, so a
+template that filters or branches on a booking field falls back to render_to_string.
+"""
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.translation import get_language
+
+from .counters import COUNTER_FIELDS
+from .models import Booking, Event
+
+FIELDS = ('name', 'email', 'ticket_id', 'number_of_tickets', 'total_cost', 'payment_ref')
+MARKER = re.compile(r'__notify_(\w+?)__')
+# Event fields that change with every booking and never appear in an email
+VOLATILE_EVENT_FIELDS = {*COUNTER_FIELDS, 'seats_reserved'}
+
+
+def marker(field):
+    return f'__notify_{field}__'
+
+
+def cache_size():
+    return getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_SIZE', 256)
+
+
+class CompiledTemplate:
+    def __init__(self, template_name, event, extra):
+        self.template_name = template_name
+        self.event = event
+        self.extra = extra
+        stand_in = Booking(event=event, **{field: marker(field) for field in FIELDS})
+        pieces = MARKER.split(self.full_render(stand_in))
+        # Even positions are literal HTML, odd positions are booking field names
+        self.parts = pieces if all(piece in FIELDS for piece in pieces[1::2]) else None
+        self.used = set(pieces[1::2])
+        self.checked = False
+
+    def full_render(self, booking):
+        return render_to_string(self.template_name, {'booking': booking, 'event': self.event, **self.extra})
+
+    def fill(self, booking):
+        language = get_language()
+        values = {}
+        for field in self.used:
+            value = getattr(booking, field)
+            values[field] = conditional_escape(value) if isinstance(value, str) else display(value, language)
+        return ''.join(piece if i % 2 == 0 else values[piece] for i, piece in enumerate(self.parts))
+
+    def render(self, booking):
+        if self.parts is None:
+            return self.full_render(booking)
+        if not self.checked:
+            html = self.full_render(booking)
+            if self.fill(booking) != html:
+                self.parts = None
+            self.checked = True
+            return html
+        return self.fill(booking)
+
+
+def display(value, language):
+    """A number (or None) as the template engine would print it in `language`"""
+    # Keyed on the text too: Decimal('250') == Decimal('250.00') but they print differently
+    return _display(value, str(value), language)
+
+
+@lru_cache(maxsize=1024)
+def _display(value, text, language):
+    return str(conditional_escape(localize(value)))
+
+
+EVENT_FIELDS = [field.attname for field in Event._meta.concrete_fields if field.attname not in VOLATILE_EVENT_FIELDS]
+
+
+def event_fingerprint(event):
+    """Changes whenever any event field an email could show changes"""
+    return tuple(str(getattr(event, name)) for name in EVENT_FIELDS)
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {'compiled': 0, 'reused': 0}
+
+
+def compiled(template_name, event, **extra):
+    key = (template_name, event.pk, event_fingerprint(event), repr(sorted(extra.items())))
+    with _lock:
+        template = _cache.get(key)
+        if template is not None:
+            _cache.move_to_end(key)
+            stats['reused'] += 1
+            return template
+    template = CompiledTemplate(template_name, event, extra)
+    with _lock:
+        _cache[key] = template
+        stats['compiled'] += 1
+        while len(_cache) > cache_size():
+            _cache.popitem(last=False)
+    return template
+
+
+def render(template_name, booking, event=None, **extra):
+    """The template rendered for `booking` (context: booking, event and `extra`)"""
+    if event is None:
+        event = booking.event
+    elif not Booking.event.is_cached(booking):
+        booking.event = event  # the full render reads booking.event; don't fetch it again
+    return compiled(template_name, event, **extra).render(booking)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
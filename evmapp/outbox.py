@@ -0,0 +1,321 @@
+"""
+Transactional email outbox.
+
+Request code calls enqueue()/enqueue_message() instead of sending: the OutboxEmail row is
+written in the caller's transaction, so an email exists exactly when the booking (or payment,
+or volunteer) it announces was committed, and no request ever waits on SMTP. The
+`send_outbox` worker claims due rows in batches and delivers each batch over one SMTP
+connection; failures are retried with exponential backoff and dead-lettered after
+OUTBOX_MAX_ATTEMPTS. Several worker threads (each with its own connection) can share a
+token-bucket rate limit to stay under the mail provider's sending quota.
+"""
+import base64
+import logging
+import random
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection is gone rather than this one message being bad
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def batch_size():
+    return getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+
+
+def max_attempts():
+    return getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+
+
+def worker_count():
+    return getattr(settings, 'OUTBOX_WORKERS', 1)
+
+
+def rate_limit():
+    return getattr(settings, 'OUTBOX_RATE_PER_SECOND', None)
+
+
+def backoff(attempts):
+    """Delay before attempt number attempts + 1: base * 2^(attempts - 1), capped, with +-10% jitter"""
+    base = getattr(settings, 'OUTBOX_BACKOFF_SECONDS', 60)
+    delay = min(base * 2 ** max(attempts - 1, 0), getattr(settings, 'OUTBOX_MAX_BACKOFF_SECONDS', 6 * 3600))
+    return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+
+def row_for(message, kind=''):
+    attachments = []
+    for attachment in message.attachments:
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+    return OutboxEmail(
+        kind=kind,
+        subject=message.subject,
+        body=message.body,
+        html=message.content_subtype == 'html',
+        alternatives=[list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        from_email=message.from_email or '',
+        to=list(message.to),
+        reply_to=list(message.reply_to),
+        attachments=attachments,
+    )
+
+
+def enqueue_message(message, kind=''):
+    """
+    Queues an EmailMessage (with any attachments) for the worker; call it inside the caller's
+    transaction. The savepoint lets callers catch a failure without breaking that transaction.
+    """
+    row = row_for(message, kind)
+    with transaction.atomic():
+        row.save()
+    return row
+
+
+def enqueue_messages(messages, kind=''):
+    """Queues many EmailMessages with one bulk INSERT"""
+    return OutboxEmail.objects.bulk_create([row_for(message, kind) for message in messages], batch_size=500)
+
+
+def enqueue(subject, body, to, kind='', html=True, from_email=None, reply_to=None):
+    message = EmailMessage(subject, body, from_email or settings.DEFAULT_FROM_EMAIL, to, reply_to=reply_to)
+    message.content_subtype = 'html' if html else 'plain'
+    return enqueue_message(message, kind)
+
+
+def to_message(row, connection=None):
+    message_class = EmailMultiAlternatives if row.alternatives else EmailMessage
+    message = message_class(
+        row.subject, row.body, row.from_email or settings.DEFAULT_FROM_EMAIL, row.to,
+        reply_to=row.reply_to or None, connection=connection,
+    )
+    if row.html:
+        message.content_subtype = 'html'
+    for content, mimetype in row.alternatives:
+        message.attach_alternative(content, mimetype)
+    for filename, content, mimetype in row.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def claim_batch(size=None, now=None, kinds=None):
+    """
+    Claims up to `size` due rows for this worker: one conditional UPDATE stamps them with a
+    fresh token, so concurrent workers never send the same email twice.
+    """
+    now = now or timezone.now()
+    due = OutboxEmail.objects.filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+    if kinds:
+        due = due.filter(kind__in=kinds)
+    due = (
+        due.order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:size or batch_size()]
+    )
+    token = uuid.uuid4()
+    claimed = OutboxEmail.objects.filter(id__in=list(due), status=OutboxEmail.PENDING).update(
+        status=OutboxEmail.SENDING, claim_token=token, claimed_at=now,
+    )
+    if not claimed:
+        return []
+    return list(OutboxEmail.objects.filter(claim_token=token).order_by('id'))
+
+
+def requeue_stale(minutes=15):
+    """Rows left in 'sending' by a worker that died go back to pending"""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return OutboxEmail.objects.filter(status=OutboxEmail.SENDING, claimed_at__lt=cutoff).update(
+        status=OutboxEmail.PENDING, claim_token=None,
+    )
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads: at most `rate` sends per second on average"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class DrainStats:
+    batches: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead: int = 0
+    seconds: float = 0.0
+    errors: dict = field(default_factory=dict)  # error class name -> count
+
+    @property
+    def rate(self):
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def add(self, other):
+        for name in ('batches', 'sent', 'retried', 'dead', 'seconds'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+
+    def __str__(self):
+        return (
+            f'{self.sent} sent, {self.retried} to retry, {self.dead} dead-lettered '
+            f'in {self.seconds:.2f}s ({self.rate:.1f}/s)'
+        )
+
+
+def fail(row, error, stats, now):
+    attempts = row.attempts + 1
+    stats.errors[type(error).__name__] = stats.errors.get(type(error).__name__, 0) + 1
+    if attempts >= max_attempts():
+        stats.dead += 1
+        changes = {'status': OutboxEmail.DEAD}
+    else:
+        stats.retried += 1
+        changes = {'status': OutboxEmail.PENDING, 'next_attempt_at': now + backoff(attempts)}
+    OutboxEmail.objects.filter(id=row.id, claim_token=row.claim_token).update(
+        attempts=attempts, last_error=f'{type(error).__name__}: {error}'[:2000], claim_token=None, **changes,
+    )
+
+
+def deliver(rows, connection=None, limiter=None):
+    """
+    Sends claimed rows over one connection, one send_messages() call per message so a bad
+    address fails only its own row. A dropped connection is reopened once per batch.
+    """
+    stats = DrainStats(batches=1)
+    started = time.monotonic()
+    connection = connection or get_connection(fail_silently=False)
+    sent_ids = []
+    reopened = False
+    try:
+        connection.open()
+    except Exception as error:
+        # Server unreachable: every claimed row goes back with its backoff instead of waiting to go stale
+        for row in rows:
+            fail(row, error, stats, timezone.now())
+        stats.seconds = time.monotonic() - started
+        return stats
+    try:
+        for row in rows:
+            now = timezone.now()
+            try:
+                message = to_message(row, connection)
+            except Exception as error:
+                fail(row, error, stats, now)
+                continue
+            if limiter:
+                limiter.acquire()
+            try:
+                connection.send_messages([message])
+                sent_ids.append(row.id)
+            except CONNECTION_ERRORS as error:
+                if reopened:
+                    fail(row, error, stats, now)
+                    continue
+                reopened = True
+                connection.close()
+                try:
+                    connection.open()
+                    connection.send_messages([message])
+                    sent_ids.append(row.id)
+                except Exception as retry_error:
+                    fail(row, retry_error, stats, now)
+            except Exception as error:
+                fail(row, error, stats, now)
+    finally:
+        connection.close()
+        if sent_ids:
+            OutboxEmail.objects.filter(id__in=sent_ids).update(
+                status=OutboxEmail.SENT, sent_at=timezone.now(), claim_token=None,
+                attempts=F('attempts') + 1,
+            )
+    stats.sent = len(sent_ids)
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+def drain_batches(max_batches=None, size=None, connection=None, limiter=None, kinds=None):
+    total = DrainStats()
+    while max_batches is None or total.batches < max_batches:
+        rows = claim_batch(size, kinds=kinds)
+        if not rows:
+            break
+        stats = deliver(rows, connection, limiter)
+        logger.info('outbox batch: %s', stats)
+        total.add(stats)
+    return total
+
+
+def drain_thread(max_batches, size, limiter, kinds):
+    try:
+        return drain_batches(max_batches, size, None, limiter, kinds)
+    finally:
+        connections.close_all()  # this thread's own database connections
+
+
+def drain(max_batches=None, size=None, connection=None, workers=None, rate=None, kinds=None):
+    """
+    Sends everything that is due, batch by batch; returns the combined DrainStats. With
+    workers > 1 a bounded pool of threads drains in parallel, each claiming its own batches
+    over its own connection (max_batches then applies per thread). `rate` caps sends per
+    second across all threads; `kinds` limits the drain to those email kinds.
+    """
+    workers = workers or worker_count()
+    rate = rate if rate is not None else rate_limit()
+    limiter = RateLimiter(rate) if rate else None
+    if workers <= 1:
+        return drain_batches(max_batches, size, connection, limiter, kinds)
+
+    started = time.monotonic()
+    total = DrainStats()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox') as pool:
+        for stats in pool.map(lambda _: drain_thread(max_batches, size, limiter, kinds), range(workers)):
+            total.add(stats)
+    total.seconds = time.monotonic() - started  # wall time, so rate is the pool's throughput
+    return total
+
+
+def purge_sent(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEmail.objects.filter(status=OutboxEmail.SENT, sent_at__lt=cutoff).delete()
+    return deleted
+
+
+def backlog():
+    """Queue health: rows per status plus the age of the oldest due email"""
+    counts = dict(OutboxEmail.objects.values_list('status').annotate(n=Count('id')).values_list('status', 'n'))
+    oldest = OutboxEmail.objects.filter(status=OutboxEmail.PENDING).aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        **{status: counts.get(status, 0) for status, _ in OutboxEmail.STATUS_CHOICES},
+        'oldest_pending_seconds': int((timezone.now() - oldest).total_seconds()) if oldest else 0,
+    }
@@ -0,0 +1,114 @@
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from . import versions
+
+# The cached pages list events and booking/volunteer totals
+PAGE_MODELS = ('event', 'booking', 'volunteer')
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = '__page_cache_csrf__'
+IDEMPOTENCY_PLACEHOLDER = '__page_cache_idempotency__'
+
+
+def page_ttl():
+    return getattr(settings, 'PAGE_CACHE_SECONDS', 300)
+
+
+def is_enabled():
+    return bool(page_ttl())
+
+
+def generation(request):
+    """
+    Current cache generation: the ModelVersion numbers of PAGE_MODELS, which every save or
+    delete moves on (evmapp.signals, and the bulk paths explicitly). They live in the shared
+    database, so an entry in any cache backend, even a per-process LocMemCache, goes stale
+    when another worker or a management command changes the data.
+    """
+    return '|'.join(str(version) for version, _ in versions.current(request, PAGE_MODELS).values())
+
+
+def invalidate():
+    """Marks every cached page stale once the surrounding transaction commits"""
+    versions.bump(*PAGE_MODELS)
+
+
+def page_key(request):
+    return 'page-cache:' + hashlib.sha1(request.get_full_path().encode()).hexdigest()
+
+
+def is_cacheable_request(request):
+    if request.method != 'GET' or request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page, so that response is personal
+    return not any(True for _ in get_messages(request))
+
+
+def freeze(request, response):
+    """Stores the page with the per-visitor CSRF token and idempotency key swapped for placeholders"""
+    content = CSRF_INPUT.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+    key = getattr(request, 'idempotency_key', None)
+    if key:
+        content = content.replace(key, IDEMPOTENCY_PLACEHOLDER)
+    return {'content': content, 'content_type': response['Content-Type']}
+
+
+def thaw(request, entry):
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    if IDEMPOTENCY_PLACEHOLDER in content:
+        content = content.replace(IDEMPOTENCY_PLACEHOLDER, getattr(request, 'idempotency_key', ''))
+    return HttpResponse(content, content_type=entry['content_type'])
+
+
+def cached_page(request, render_page):
+    """
+    Serves render_page() from the cache for anonymous GETs. After an invalidation only the
+    worker that wins the lock re-renders; the others keep serving the stale copy meanwhile
+    (or wait briefly for the new one when there is no copy at all).
+    """
+    if not is_enabled() or not is_cacheable_request(request):
+        return render_page()
+
+    key = page_key(request)
+    current = generation(request)
+    entry = cache.get(key)
+    if entry and entry['generation'] == current:
+        return thaw(request, entry)
+
+    lock_seconds = getattr(settings, 'PAGE_CACHE_LOCK_SECONDS', 10)
+    if cache.add(f'{key}:lock', 1, lock_seconds):
+        try:
+            response = render_page()
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, {'generation': current, **freeze(request, response)}, page_ttl())
+        finally:
+            cache.delete(f'{key}:lock')
+        return response
+
+    if entry:
+        return thaw(request, entry)
+    deadline = time.monotonic() + lock_seconds
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry:
+            return thaw(request, entry)
+    return render_page()
+
+
+def cache_anonymous_page(view):
+    """View decorator form of cached_page()"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return cached_page(request, lambda: view(request, *args, **kwargs))
+    return wrapper
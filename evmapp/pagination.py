@@ -0,0 +1,165 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+CURSOR_PARAM = 'cursor'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = None
+    previous_cursor: str = None
+    query: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _url(self, cursor):
+        query = self.query.copy()
+        query[CURSOR_PARAM] = cursor
+        return '?' + query.urlencode()
+
+    @property
+    def hidden_fields(self):
+        """The other form fields to carry along when paging through POST results"""
+        return [
+            (name, value) for name, value in self.query.items()
+            if name not in (CURSOR_PARAM, 'csrfmiddlewaretoken')
+        ]
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_url(self):
+        return self._url(self.previous_cursor) if self.has_previous else None
+
+
+def parse_ordering(model, ordering):
+    keys = []
+    for name in ordering:
+        field_name = name.lstrip('-')
+        nullable = model._meta.get_field('id' if field_name == 'pk' else field_name).null
+        keys.append((field_name, name.startswith('-'), nullable))
+    return keys
+
+
+def cursor_value(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds and skip rows
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot use {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values, direction):
+    raw = json.dumps([direction, values], default=cursor_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def seek_filter(keys, values, forward):
+    """
+    Rows strictly after (forward) or before the cursor row in keyset order, as
+    (a > x) OR (a = x AND b > y) ... so the database can seek on the index.
+    NULLs in a nullable key sort last in both directions.
+    """
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending, nullable), value in zip(keys, values):
+        if value is None:
+            step = Q(pk__in=[]) if forward else Q(**{f'{name}__isnull': False})
+            same = Q(**{f'{name}__isnull': True})
+        else:
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': value})
+            if forward and nullable:
+                step |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        condition |= equal & step
+        equal &= same
+    return condition
+
+
+def order_expressions(keys, reverse=False):
+    expressions = []
+    for name, descending, nullable in keys:
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        expression = F(name).desc if descending != reverse else F(name).asc
+        expressions.append(expression(**nulls) if nullable else expression())
+    return expressions
+
+
+def row_key(item, keys):
+    return [getattr(item, name) for name, _, _ in keys]
+
+
+def keyset_page(request, queryset, ordering, per_page=25, params=None):
+    """
+    One page of `queryset` in `ordering` (e.g. ('-booking_date', '-id'); the last key must be
+    unique). Pages are addressed by an opaque ?cursor= holding the boundary row's key values,
+    so each page is an index seek plus LIMIT per_page + 1 - no OFFSET and no COUNT(*).
+    `params` defaults to request.GET (pass request.POST for form-driven paging).
+    """
+    params = request.GET if params is None else params
+    keys = parse_ordering(queryset.model, ordering)
+    cursor = params.get(CURSOR_PARAM)
+    direction, values, rows = 'next', None, queryset
+    if cursor:
+        try:
+            direction, values = decode_cursor(cursor, len(keys))
+            rows = queryset.filter(seek_filter(keys, values, direction == 'next'))
+        except (InvalidCursor, ValidationError, ValueError, TypeError):
+            # A mangled or outdated link starts again from the first page
+            direction, values, rows = 'next', None, queryset
+    forward = direction == 'next'
+
+    rows = list(rows.order_by(*order_expressions(keys, reverse=not forward))[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    page = KeysetPage(items=rows, query=params.copy())
+    if rows:
+        # Going back from a later page there is always a next page; going forward, a previous one
+        has_next = more if forward else True
+        has_previous = values is not None if forward else more
+        if has_next:
+            page.next_cursor = encode_cursor(row_key(rows[-1], keys), 'next')
+        if has_previous:
+            page.previous_cursor = encode_cursor(row_key(rows[0], keys), 'prev')
+    return page
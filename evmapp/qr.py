@@ -0,0 +1,122 @@
+"""
+QR code PNGs, memoized by payload.
+
+Encoding a QR matrix and compressing it to PNG costs far more than anything else in a
+booking email, yet UPI payment URIs repeat: they only vary by amount and note. png() looks a
+payload up in an in-process LRU (QR_CACHE_SIZE entries), then in a content-addressed file
+under MEDIA_ROOT/qr/ (shared by every worker process and kept across restarts), and only
+encodes on a miss. Emails attach the bytes and the payment page serves the same bytes.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from urllib.parse import quote_plus
+
+import qrcode
+from django.conf import settings
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+def cache_size():
+    return getattr(settings, 'QR_CACHE_SIZE', 512)
+
+
+def upi_uri(amount, note=''):
+    """The UPI payment URI for `amount` INR, or None when no UPI_VPA is configured"""
+    if not getattr(settings, 'UPI_VPA', None) or not amount or float(amount) <= 0:
+        return None
+    note = getattr(settings, 'UPI_NOTE', '') or note
+    return f"upi://pay?pa={settings.UPI_VPA}&pn={quote_plus(getattr(settings, 'UPI_NAME', ''))}&am={amount}&cu=INR&tn={quote_plus(note)}"
+
+
+def digest(payload):
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def disk_path(key):
+    return os.path.join(settings.MEDIA_ROOT, 'qr', key[:2], f'{key}.png')
+
+
+def encode(payload):
+    buf = BytesIO()
+    qrcode.make(payload).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def remember(key, data):
+    with _lock:
+        _cache[key] = data
+        _cache.move_to_end(key)
+        while len(_cache) > cache_size():
+            _cache.popitem(last=False)
+
+
+def read_disk(key):
+    try:
+        with open(disk_path(key), 'rb') as handle:
+            return handle.read()
+    except OSError:
+        return None
+
+
+def write_disk(key, data):
+    """Writes via a temp file and rename, so readers never see a partial PNG"""
+    path = disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        # The disk cache is an optimisation; a read-only MEDIA_ROOT just means more encoding
+        print(f"Could not cache QR code {key}: {e}")
+
+
+def png(payload):
+    """PNG bytes of the QR code for `payload`"""
+    key = digest(payload)
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+            _counters['memory_hits'] += 1
+            return data
+    data = read_disk(key)
+    if data is not None:
+        count('disk_hits')
+    else:
+        count('misses')
+        data = encode(payload)
+        write_disk(key, data)
+    remember(key, data)
+    return data
+
+
+def stats():
+    """Hit/miss counters for this process plus the current LRU size"""
+    with _lock:
+        lookups = sum(_counters.values())
+        hits = _counters['memory_hits'] + _counters['disk_hits']
+        return {**_counters, 'entries': len(_cache), 'hit_rate': round(hits / lookups, 3) if lookups else 0.0}
+
+
+def clear(disk=False):
+    with _lock:
+        _cache.clear()
+        for name in _counters:
+            _counters[name] = 0
+    if disk:
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'qr'), ignore_errors=True)
@@ -0,0 +1,99 @@
+"""
+Event reminder scheduling.
+
+Each reminder covers a window of event start times rather than an exact minute: the 24h
+reminder goes to bookings whose event starts between 2 and 24 hours from now, the 2h
+reminder to those starting within the next 2 hours. A run that fires late (or after a
+missed cron tick) therefore still catches every booking. Due bookings are claimed a batch
+at a time with one conditional UPDATE of their reminder flag and their emails are queued in
+the outbox in the same transaction, so concurrent or overlapping runs never remind anyone
+twice; `send_outbox` (or `send_reminders` itself) delivers them.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from . import notifications, outbox
+from .models import Booking
+
+KIND = 'event_reminder'
+# (hours before the event, flag); each window ends where the next, shorter one begins
+REMINDERS = (
+    (24, 'reminder_24h_sent'),
+    (2, 'reminder_2h_sent'),
+)
+IMPORTANT_ITEMS = ['Your Ticket ID', 'Valid ID proof', 'Comfortable attire']
+
+
+def batch_size():
+    return getattr(settings, 'REMINDER_BATCH_SIZE', 1000)
+
+
+def windows(now):
+    """[(hours, flag, window start, window end), ...] for the reminders due at `now`"""
+    floors = [hours for hours, _ in REMINDERS[1:]] + [0]
+    return [
+        (hours, flag, now + timedelta(hours=floor), now + timedelta(hours=hours))
+        for (hours, flag), floor in zip(REMINDERS, floors)
+    ]
+
+
+def due(flag, start, end):
+    """Unreminded bookings for events starting in (start, end]: a range scan on Event.starts_at"""
+    return Booking.objects.filter(event__starts_at__gt=start, event__starts_at__lte=end, **{flag: False})
+
+
+def subject_for(event, hours_remaining):
+    if hours_remaining == 24:
+        return f'⏰ 24 Hours to Go: {event.event_name} Tomorrow!'
+    if hours_remaining == 2:
+        return f'🔔 Starting Soon: {event.event_name} in 2 Hours!'
+    return f'Reminder: {event.event_name} is Coming Up!'
+
+
+def reminder_message(booking, hours_remaining=24):
+    event = booking.event
+    message = notifications.render(
+        'evmapp/email/event_reminder.html', booking, hours_remaining=hours_remaining, important_items=IMPORTANT_ITEMS,
+    )
+    email = EmailMessage(subject_for(event, hours_remaining), message, settings.DEFAULT_FROM_EMAIL, [booking.email])
+    email.content_subtype = 'html'
+    return email
+
+
+def claim(hours, flag, start, end, size=None):
+    """
+    Marks up to `size` due bookings as reminded with one UPDATE and queues their emails in
+    the same transaction; returns the bookings this call claimed.
+    """
+    with transaction.atomic():
+        ids = list(due(flag, start, end).order_by('id').values_list('id', flat=True)[:size or batch_size()])
+        if not ids:
+            return []
+        stamp = timezone.now()
+        # A concurrent run that claimed some of these first has already flipped the flag
+        Booking.objects.filter(id__in=ids, **{flag: False}).update(**{flag: True, 'last_reminder_sent': stamp})
+        bookings = list(
+            Booking.objects.filter(id__in=ids, last_reminder_sent=stamp, **{flag: True}).select_related('event')
+        )
+        outbox.enqueue_messages(
+            [reminder_message(booking, hours) for booking in bookings if booking.email], kind=KIND,
+        )
+    return bookings
+
+
+def schedule(now=None, size=None):
+    """Claims and queues every reminder that is due; returns {hours: bookings reminded}"""
+    now = now or timezone.now()
+    counts = {}
+    for hours, flag, start, end in windows(now):
+        counts[hours] = 0
+        while True:
+            claimed = claim(hours, flag, start, end, size)
+            if not claimed:
+                break
+            counts[hours] += len(claimed)
+    return counts
@@ -0,0 +1,198 @@
+import hashlib
+import json
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BigIntegerField, DecimalField, F, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .models import Booking, DashboardSnapshot, Event, Sponsor
+
+BOOKING_COLUMNS = ['event_id', 'booking_date', 'number_of_tickets', 'cost_paise', 'is_paid', 'is_verified']
+GROUP_KEYS = ['event_id', 'day', 'status']
+MEASURES = ['bookings', 'tickets', 'booked_paise', 'collected_paise']
+STATUSES = np.array(['pending', 'paid', 'verified'])
+UNDATED = 'undated'  # day bucket for bookings without a booking_date
+
+
+def chunk_size():
+    return getattr(settings, 'REPORT_CHUNK_SIZE', 50000)
+
+
+def booking_rows(start=None, end=None, category=None):
+    """Booking columns as tuples; money arrives as integer paise so no Decimal objects are built"""
+    bookings = Booking.objects.all()
+    if start:
+        bookings = bookings.filter(booking_date__gte=start)
+    if end:
+        bookings = bookings.filter(booking_date__lt=end)
+    if category:
+        bookings = bookings.filter(event__category=category)
+    return (
+        bookings.annotate(cost_paise=Cast(Round(F('total_cost') * 100), BigIntegerField()))
+        .values_list(*BOOKING_COLUMNS)
+        .order_by()
+    )
+
+
+def booking_frames(rows, size=None):
+    """Yields DataFrames of at most `size` bookings, streaming from the database cursor"""
+    size = size or chunk_size()
+    iterator = rows.iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        frame = pd.DataFrame.from_records(chunk, columns=BOOKING_COLUMNS)
+        yield frame.astype({
+            'event_id': 'int64',
+            'number_of_tickets': 'int64',
+            'cost_paise': 'int64',
+            'is_paid': 'bool',
+            'is_verified': 'bool',
+        })
+
+
+def summarise_chunk(frame):
+    """Collapses one chunk to per (event, day, status) sums"""
+    paid = frame['is_paid'].to_numpy()
+    verified = frame['is_verified'].to_numpy()
+    cost = frame['cost_paise'].to_numpy()
+    booked_on = pd.to_datetime(frame['booking_date'], utc=True)
+    summary = pd.DataFrame({
+        'event_id': frame['event_id'].to_numpy(),
+        # groupby drops NaN keys, which would leave undated bookings out of every total
+        'day': booked_on.dt.strftime('%Y-%m-%d').fillna(UNDATED).to_numpy(),
+        # 0 = pending, 1 = paid but not verified, 2 = verified
+        'status': np.where(verified, 2, np.where(paid, 1, 0)),
+        'bookings': 1,
+        'tickets': frame['number_of_tickets'].to_numpy(),
+        'booked_paise': cost,
+        'collected_paise': np.where(paid, cost, 0),
+    })
+    return summary.groupby(GROUP_KEYS, sort=False)[MEASURES].sum()
+
+
+def booking_totals(rows, size=None):
+    """
+    Folds chunk summaries into one running total, so memory is bounded by one chunk plus
+    events x days x statuses, however many bookings there are.
+    """
+    totals = None
+    scanned = 0
+    for frame in booking_frames(rows, size):
+        scanned += len(frame)
+        part = summarise_chunk(frame)
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        totals = pd.DataFrame(columns=MEASURES, index=pd.MultiIndex.from_arrays([[], [], []], names=GROUP_KEYS))
+    return totals.astype('int64').reset_index(), scanned
+
+
+def event_frame():
+    zero_money = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+    rows = (
+        Event.objects.annotate(sponsor_cost=Coalesce(Sum('sponsors__cost'), zero_money))
+        .values_list('id', 'event_name', 'category', 'organiser', 'sponsor_cost')
+        .order_by()
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['event_id', 'event_name', 'category', 'organiser', 'sponsor_cost'])
+    frame['sponsor_cost_paise'] = (frame['sponsor_cost'].astype('float64') * 100).round().astype('int64')
+    return frame.drop(columns='sponsor_cost').set_index('event_id')
+
+
+def to_rupees(frame, columns):
+    for column in columns:
+        frame[column.replace('_paise', '')] = (frame.pop(column) / 100).round(2)
+    return frame
+
+
+def records(frame):
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def pivot(totals, key):
+    table = totals.groupby(key, sort=True)[MEASURES].sum().reset_index()
+    return records(to_rupees(table, ['booked_paise', 'collected_paise']))
+
+
+def status_pivot(totals):
+    table = totals.groupby('status')[['bookings', 'tickets', 'booked_paise', 'collected_paise']].sum()
+    table = table.reindex(range(len(STATUSES)), fill_value=0).reset_index()
+    table['status'] = STATUSES[table['status'].to_numpy()]
+    return records(to_rupees(table, ['booked_paise', 'collected_paise']))
+
+
+def conversion(totals, key):
+    """Share of booked tickets that reached verification"""
+    verified = np.where(totals['status'].to_numpy() == 2, totals['tickets'].to_numpy(), 0)
+    table = totals.assign(verified_tickets=verified).groupby(key)[['tickets', 'verified_tickets']].sum()
+    booked = table['tickets'].to_numpy()
+    table['rate'] = np.divide(
+        table['verified_tickets'].to_numpy(), booked,
+        out=np.zeros(len(table)), where=booked > 0,
+    ).round(4)
+    return records(table.rename(columns={'tickets': 'booked_tickets'}).reset_index())
+
+
+def sponsor_pivot(totals, events):
+    collected = totals.groupby('event_id')['collected_paise'].sum()
+    table = events[['event_name', 'sponsor_cost_paise']].join(collected, how='left').fillna({'collected_paise': 0})
+    table = table[(table['sponsor_cost_paise'] > 0) | (table['collected_paise'] > 0)].copy()
+    table['net_paise'] = table['collected_paise'] - table['sponsor_cost_paise']
+    table = to_rupees(table, ['sponsor_cost_paise', 'collected_paise', 'net_paise'])
+    return records(table.sort_values('net').reset_index())
+
+
+def build_report(start=None, end=None, category=None, size=None):
+    """Computes every revenue pivot in one streaming pass over Booking"""
+    totals, scanned = booking_totals(booking_rows(start, end, category), size)
+    events = event_frame()
+    if category:
+        events = events[events['category'] == category]
+    totals = totals.join(events[['category', 'organiser']], on='event_id')
+    verified = totals['status'] == 2
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'bookings_scanned': scanned,
+        'totals': {
+            'bookings': int(totals['bookings'].sum()),
+            'tickets': int(totals['tickets'].sum()),
+            'verified_tickets': int(totals.loc[verified, 'tickets'].sum()),
+            'booked': round(int(totals['booked_paise'].sum()) / 100, 2),
+            'collected': round(int(totals['collected_paise'].sum()) / 100, 2),
+            'sponsor_cost': float(Sponsor.objects.aggregate(total=Sum('cost'))['total'] or 0),
+        },
+        'by_category': pivot(totals, 'category'),
+        'by_organiser': pivot(totals, 'organiser'),
+        'by_day': pivot(totals, 'day'),
+        'by_status': status_pivot(totals),
+        'sponsors': sponsor_pivot(totals, events),
+        'conversion_by_category': conversion(totals, 'category'),
+        'conversion_by_event': conversion(totals.join(events[['event_name']], on='event_id'), ['event_id', 'event_name']),
+    }
+
+
+def data_version():
+    """Moves on every booking counter change and sponsor/event add or delete (see kpis.apply_delta); edits expire with REPORT_CACHE_SECONDS"""
+    stamp = DashboardSnapshot.objects.values_list('updated_at', flat=True).first()
+    return stamp.isoformat() if stamp else ''
+
+
+def cache_key(start=None, end=None, category=None):
+    params = json.dumps([str(start or ''), str(end or ''), category or '', data_version()])
+    return 'revenue-report:' + hashlib.sha1(params.encode()).hexdigest()
+
+
+def revenue_report(start=None, end=None, category=None, refresh=False):
+    """Cached build_report(); a new data version or a different parameter set is a different key"""
+    key = cache_key(start, end, category)
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = build_report(start, end, category)
+        cache.set(key, report, getattr(settings, 'REPORT_CACHE_SECONDS', 900))
+    return report
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import Booking, SalesRollup
+
+ROLLUP_FIELDS = ('booking_count', 'tickets_sold', 'tickets_paid', 'tickets_verified', 'revenue')
+
+
+def hour_bucket(moment=None):
+    moment = (moment or timezone.now()).astimezone(dt_timezone.utc)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record(event_id, delta, booked_at, sign=1):
+    """
+    Adds a booking counter delta to the event's rollup row for the hour the booking was made.
+    Payments and verifications land in that hour too, as in rebuild(); bookings without a
+    booking_date are left out of the rollup by both.
+    """
+    changes = {field: value * sign for field, value in delta.items() if field in ROLLUP_FIELDS and value}
+    if not event_id or not changes or booked_at is None:
+        return
+    bucket = hour_bucket(booked_at)
+    rows = SalesRollup.objects.filter(event_id=event_id, bucket=bucket)
+    if rows.update(**{field: F(field) + value for field, value in changes.items()}):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(event_id=event_id, bucket=bucket, **changes)
+    except IntegrityError:
+        # Another request created this hour's row first
+        rows.update(**{field: F(field) + value for field, value in changes.items()})
+
+
+def record_bookings(entries, sign=1):
+    """record() for many bookings: [(event_id, booked_at, delta), ...], one write per event and hour"""
+    totals = {}
+    for event_id, booked_at, delta in entries:
+        if booked_at is None:
+            continue
+        total = totals.setdefault((event_id, hour_bucket(booked_at)), dict.fromkeys(ROLLUP_FIELDS, 0))
+        for field in ROLLUP_FIELDS:
+            total[field] += delta.get(field) or 0
+    for (event_id, bucket), delta in totals.items():
+        record(event_id, delta, bucket, sign)
+
+
+def expected_rows(event_ids=None):
+    """Rollup rows computed from Booking.booking_date (paid/verified sales land in the booking's hour)"""
+    bookings = Booking.objects.all()
+    if event_ids:
+        bookings = bookings.filter(event_id__in=event_ids)
+    rows = (
+        bookings.annotate(bucket=TruncHour('booking_date', tzinfo=dt_timezone.utc))
+        .values('event_id', 'bucket')
+        .annotate(
+            booking_count=Count('id'),
+            tickets_sold=Coalesce(Sum('number_of_tickets'), 0),
+            tickets_paid=Coalesce(Sum('number_of_tickets', filter=Q(is_paid=True)), 0),
+            tickets_verified=Coalesce(Sum('number_of_tickets', filter=Q(is_verified=True)), 0),
+            revenue=Coalesce(Sum('total_cost', filter=Q(is_paid=True)), Value(Decimal('0'))),
+        )
+        .order_by()
+    )
+    return [row for row in rows if row['bucket'] is not None]
+
+
+def drift(event_ids=None):
+    """[(event_id, bucket, {field: (stored, expected)}), ...] for rollup rows that differ from the bookings"""
+    stored = SalesRollup.objects.all()
+    if event_ids:
+        stored = stored.filter(event_id__in=event_ids)
+    stored = {(row['event_id'], row['bucket']): row for row in stored.values('event_id', 'bucket', *ROLLUP_FIELDS)}
+    zero = dict.fromkeys(ROLLUP_FIELDS, 0)
+    wrong = []
+    for row in expected_rows(event_ids):
+        have = stored.pop((row['event_id'], row['bucket']), zero)
+        diff = {field: (have[field], row[field]) for field in ROLLUP_FIELDS if have[field] != row[field]}
+        if diff:
+            wrong.append((row['event_id'], row['bucket'], diff))
+    for (event_id, bucket), have in stored.items():
+        diff = {field: (have[field], 0) for field in ROLLUP_FIELDS if have[field]}
+        if diff:
+            wrong.append((event_id, bucket, diff))
+    return wrong
+
+
+def rebuild(event_ids=None):
+    """Replaces the rollup rows with expected_rows()"""
+    rows = expected_rows(event_ids)
+    with transaction.atomic():
+        existing = SalesRollup.objects.all()
+        if event_ids:
+            existing = existing.filter(event_id__in=event_ids)
+        existing.delete()
+        created = SalesRollup.objects.bulk_create(
+            [SalesRollup(**row) for row in rows],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def series(start, end, event_id=None, category=None, granularity='hour'):
+    """
+    Sales per time bucket between start and end. Reads only rollup rows, so the cost
+    grows with the number of buckets in the range, not with the number of bookings.
+    """
+    rows = SalesRollup.objects.filter(bucket__gte=start, bucket__lt=end)
+    if event_id:
+        rows = rows.filter(event_id=event_id)
+    if category:
+        rows = rows.filter(event__category=category)
+    if granularity == 'day':
+        rows = rows.annotate(period=TruncDay('bucket', tzinfo=dt_timezone.utc))
+    else:
+        rows = rows.annotate(period=F('bucket'))
+    rows = (
+        rows.values('period')
+        .annotate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+        .order_by('period')
+    )
+    return [
+        {
+            'bucket': row['period'].isoformat(),
+            **{field: row[field] if field != 'revenue' else str(row[field]) for field in ROLLUP_FIELDS},
+        }
+        for row in rows
+    ]
+
+
+def parse_range(start, end, default_days=7):
+    """Parses ISO dates/datetimes from the query string; defaults to the last `default_days` days"""
+    def parse(value):
+        if not value:
+            return None
+        parsed = datetime.fromisoformat(value)
+        return parsed if timezone.is_aware(parsed) else parsed.replace(tzinfo=dt_timezone.utc)
+
+    end_at = parse(end) or hour_bucket() + timedelta(hours=1)
+    start_at = parse(start) or end_at - timedelta(days=default_days)
+    return start_at, end_at
@@ -0,0 +1,213 @@
+"""
+Attendee search over Booking name, email, contact number, ticket ID and payment reference.
+
+Each database gets a trigram index that answers substring queries without a full scan:
+SQLite uses an FTS5 table with the trigram tokenizer (kept current by triggers), PostgreSQL
+a pg_trgm GIN expression index, and anything else the BookingSearchGram postings table.
+"""
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Q
+
+from .models import Booking, BookingSearchGram
+
+SEARCH_FIELDS = ('name', 'email', 'contact_number', 'ticket_id', 'payment_ref')
+GRAM = 3
+FTS_TABLE = 'evmapp_booking_search'
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, email, contact_number, ticket_id, payment_ref,
+        content='evmapp_booking', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON evmapp_booking BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email, contact_number, ticket_id, payment_ref)
+        VALUES (new.id, new.name, new.email, new.contact_number, new.ticket_id, new.payment_ref);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON evmapp_booking BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, contact_number, ticket_id, payment_ref)
+        VALUES ('delete', old.id, old.name, old.email, old.contact_number, old.ticket_id, old.payment_ref);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF name, email, contact_number, ticket_id, payment_ref ON evmapp_booking BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, contact_number, ticket_id, payment_ref)
+        VALUES ('delete', old.id, old.name, old.email, old.contact_number, old.ticket_id, old.payment_ref);
+        INSERT INTO {FTS_TABLE}(rowid, name, email, contact_number, ticket_id, payment_ref)
+        VALUES (new.id, new.name, new.email, new.contact_number, new.ticket_id, new.payment_ref);
+    END""",
+]
+
+# Must match the index expression exactly for PostgreSQL to use it
+PG_DOCUMENT = (
+    "lower(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(contact_number, '')"
+    " || ' ' || coalesce(ticket_id, '') || ' ' || coalesce(payment_ref, ''))"
+)
+PG_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS booking_search_trgm_idx ON evmapp_booking USING gin (({PG_DOCUMENT}) gin_trgm_ops)",
+]
+
+
+def backend():
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return 'grams'
+
+
+def result_limit():
+    return getattr(settings, 'ATTENDEE_SEARCH_LIMIT', 100)
+
+
+def sqlite_trigger_count(cursor):
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f'{FTS_TABLE}_a_'],
+    )
+    return cursor.fetchone()[0]
+
+
+def install(rebuild=False):
+    """
+    Creates the index for the current database if it is missing (safe to run repeatedly;
+    called after every migrate). SQLite table rebuilds drop triggers, so missing triggers
+    are recreated and the FTS table is rebuilt from evmapp_booking.
+    """
+    kind = backend()
+    with connection.cursor() as cursor:
+        if kind == 'sqlite':
+            rebuild = rebuild or sqlite_trigger_count(cursor) < 3
+            for statement in SQLITE_INSTALL:
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif kind == 'postgresql':
+            for statement in PG_INSTALL:
+                cursor.execute(statement)
+    if kind == 'grams' and rebuild:
+        BookingSearchGram.objects.all().delete()
+        for start in range(0, Booking.objects.order_by('-id').values_list('id', flat=True).first() or 0, 5000):
+            index_bookings(Booking.objects.filter(id__gt=start, id__lte=start + 5000))
+    return kind
+
+
+def document(booking):
+    return ' '.join(str(getattr(booking, field) or '') for field in SEARCH_FIELDS).lower()
+
+
+def grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def index_bookings(bookings):
+    """
+    Refreshes the postings of these bookings; only the grams backend needs this (the others
+    index in the database). Booking.save() does it through a signal, so code that changes a
+    SEARCH_FIELDS column with bulk_create() or update() must call it too, or the grams
+    postings go stale until `manage.py rebuild_search_index`.
+    """
+    if backend() != 'grams':
+        return
+    bookings = list(bookings)
+    with transaction.atomic():
+        BookingSearchGram.objects.filter(booking__in=bookings).delete()
+        BookingSearchGram.objects.bulk_create(
+            [BookingSearchGram(booking_id=booking.pk, gram=gram) for booking in bookings for gram in grams(document(booking))],
+            batch_size=1000,
+        )
+
+
+def terms(query):
+    return [term for term in (query or '').lower().split() if term]
+
+
+def scan(words, event_id, limit):
+    """Plain icontains scan, used for terms shorter than a trigram"""
+    rows = Booking.objects.all()
+    if event_id:
+        rows = rows.filter(event_id=event_id)
+    for word in words:
+        matches = Q()
+        for field in SEARCH_FIELDS:
+            matches |= Q(**{f'{field}__icontains': word})
+        rows = rows.filter(matches)
+    return list(rows.order_by('-id').values_list('id', flat=True)[:limit])
+
+
+def fts_phrase(word):
+    return '"%s"' % word.replace('"', '""')
+
+
+def search_sqlite(words, event_id, limit):
+    sql = (
+        f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE}"
+        + (f" JOIN evmapp_booking ON evmapp_booking.id = {FTS_TABLE}.rowid AND evmapp_booking.event_id = %s" if event_id else "")
+        + f" WHERE {FTS_TABLE} MATCH %s ORDER BY {FTS_TABLE}.rank LIMIT %s"
+    )
+    params = ([event_id] if event_id else []) + [' '.join(fts_phrase(word) for word in words), limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def like_pattern(word):
+    return '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def search_postgresql(words, event_id, limit):
+    where = ' AND '.join([f'{PG_DOCUMENT} LIKE %s'] * len(words))
+    params = [like_pattern(word) for word in words]
+    if event_id:
+        where += ' AND event_id = %s'
+        params.append(event_id)
+    sql = f"SELECT id FROM evmapp_booking WHERE {where} ORDER BY similarity({PG_DOCUMENT}, %s) DESC, id DESC LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [' '.join(words), limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_grams(words, event_id, limit):
+    wanted = set().union(*(grams(word) for word in words))
+    candidates = (
+        BookingSearchGram.objects.filter(gram__in=wanted)
+        .values('booking_id')
+        .annotate(hits=Count('gram'))
+        .filter(hits=len(wanted))
+        .values('booking_id')
+    )
+    # Every trigram present is necessary, not sufficient, so confirm the substrings on the candidates
+    rows = Booking.objects.filter(id__in=candidates)
+    if event_id:
+        rows = rows.filter(event_id=event_id)
+    found = []
+    for booking in rows.order_by('-id').only(*SEARCH_FIELDS).iterator():
+        text = document(booking)
+        if all(word in text for word in words):
+            found.append(booking.pk)
+            if len(found) == limit:
+                break
+    return found
+
+
+SEARCHERS = {'sqlite': search_sqlite, 'postgresql': search_postgresql, 'grams': search_grams}
+
+
+def search_booking_ids(query, event_id=None, limit=None):
+    """Booking ids matching every word of `query` as a substring, best match first"""
+    words = terms(query)
+    limit = limit or result_limit()
+    if not words:
+        return []
+    if any(len(word) < GRAM for word in words):
+        return scan(words, event_id, limit)
+    try:
+        return SEARCHERS[backend()](words, event_id, limit)
+    except DatabaseError:
+        # Index not installed yet (run `manage.py migrate` or `rebuild_search_index`)
+        return scan(words, event_id, limit)
+
+
+def search_bookings(query, event_id=None, limit=None):
+    """Ranked Booking objects for search_booking_ids()"""
+    ids = search_booking_ids(query, event_id, limit)
+    found = Booking.objects.select_related('event').in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
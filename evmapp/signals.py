@@ -0,0 +1,163 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import kpis, search, versions
+from .counters import apply_counter_delta, booking_changed, booking_contribution
+from .holds import claim_hold, confirm_hold, is_settled
+from .inventory import release_seats
+from .models import Booking, Event, Sponsor, Volunteer
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_counters(sender, instance, raw=False, **kwargs):
+    """Captures the stored state of a booking so post_save can apply an exact delta"""
+    instance._counters_before = None
+    instance._settled_before = False
+    if raw or instance._state.adding or not instance.pk:
+        return
+    stored = (
+        Booking.objects.filter(pk=instance.pk)
+        .only('event_id', 'number_of_tickets', 'total_cost', 'is_paid', 'is_verified')
+        .first()
+    )
+    if stored is not None:
+        instance._counters_before = (stored.event_id, booking_contribution(stored))
+        instance._settled_before = is_settled(stored)
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    event_id_before, before = getattr(instance, '_counters_before', None) or (instance.event_id, None)
+    booking_changed(event_id_before, before, instance.event_id, booking_contribution(instance), instance.booking_date)
+    instance._counters_before = None
+
+
+@receiver(post_save, sender=Booking)
+def settle_booking_hold(sender, instance, created, raw=False, **kwargs):
+    """Converts a seat hold into a permanent reservation once the booking is paid or verified"""
+    if raw or created:
+        return
+    if getattr(instance, '_hold_confirmed', False):
+        instance._hold_confirmed = False
+        return
+    settled_before = getattr(instance, '_settled_before', False)
+    if is_settled(instance) and not settled_before:
+        confirm_hold(instance, force=True)
+    elif settled_before and not is_settled(instance):
+        release_seats(instance.event_id, instance.number_of_tickets)
+
+
+def deleted_with_event(origin):
+    """True when a booking is being deleted by the cascade from its Event"""
+    return isinstance(origin, Event) or (isinstance(origin, QuerySet) and origin.model is Event)
+
+
+@receiver(pre_delete, sender=Booking)
+def release_booking_hold(sender, instance, origin=None, **kwargs):
+    if not is_settled(instance) and not deleted_with_event(origin):
+        release_seats(instance.event_id, claim_hold(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def release_booking_seats(sender, instance, origin=None, **kwargs):
+    """Returns a deleted booking's seats and counters to its event"""
+    if deleted_with_event(origin):
+        # The event and its rollup rows go too; writing them now would recreate rows the
+        # cascade already collected. event_deleted takes the event's totals off the KPIs.
+        return
+    if is_settled(instance):
+        release_seats(instance.event_id, instance.number_of_tickets)
+    apply_counter_delta(instance.event_id, booking_contribution(instance), sign=-1, booked_at=instance.booking_date)
+
+
+# --- Dashboard KPI snapshot ---
+
+@receiver(pre_save, sender=Sponsor)
+def remember_sponsor_cost(sender, instance, raw=False, **kwargs):
+    instance._cost_before = None
+    if not raw and instance.pk:
+        instance._cost_before = Sponsor.objects.filter(pk=instance.pk).values_list('cost', flat=True).first()
+
+
+@receiver(post_save, sender=Sponsor)
+def sponsor_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    cost_before = getattr(instance, '_cost_before', None) or 0
+    kpis.apply_delta(
+        series_changed=False,
+        sponsor_funds=(instance.cost or 0) - cost_before,
+        total_sponsors=1 if created else 0,
+    )
+
+
+@receiver(post_delete, sender=Sponsor)
+def sponsor_deleted(sender, instance, **kwargs):
+    kpis.apply_delta(series_changed=False, sponsor_funds=-(instance.cost or 0), total_sponsors=-1)
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        kpis.apply_delta(total_events=1 if created else 0)
+
+
+@receiver(pre_delete, sender=Event)
+def remember_event_totals(sender, instance, **kwargs):
+    # Read from the row: the instance being deleted may predate its latest bookings
+    instance._totals_before_delete = Event.objects.filter(pk=instance.pk).values('revenue', 'tickets_paid').first()
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    # Its bookings are deleted without touching the counters, so their totals leave here
+    totals = getattr(instance, '_totals_before_delete', None) or {}
+    kpis.apply_delta(
+        total_events=-1, total_funds=-(totals.get('revenue') or 0), tickets_sold=-(totals.get('tickets_paid') or 0),
+    )
+
+
+@receiver(post_save, sender=Volunteer)
+def volunteer_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        kpis.apply_delta(series_changed=False, total_volunteers=1)
+
+
+@receiver(post_delete, sender=Volunteer)
+def volunteer_deleted(sender, instance, **kwargs):
+    kpis.apply_delta(series_changed=False, total_volunteers=-1)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Volunteer)
+@receiver(post_delete, sender=Volunteer)
+@receiver(post_save, sender=Sponsor)
+@receiver(post_delete, sender=Sponsor)
+def bump_model_version(sender, raw=False, **kwargs):
+    """Also what makes cached anonymous pages stale (evmapp.page_cache)"""
+    if raw:
+        return
+    if sender is Booking:
+        # A booking write also moves its event's counters
+        versions.bump('booking', 'event')
+    else:
+        versions.bump(sender._meta.model_name)
+
+
+@receiver(m2m_changed, sender=Event.sponsors.through)
+def event_sponsors_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versions.bump('event')
+
+
+@receiver(post_save, sender=Booking)
+def index_booking_for_search(sender, instance, raw=False, **kwargs):
+    # SQLite and PostgreSQL index inside the database; only the postings-table fallback needs this
+    if not raw:
+        search.index_bookings([instance])
@@ -1,3 +1,1049 @@
-from django.test import TestCase
+import base64
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pandas as pd
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.template.loader import render_to_string
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from evmapp import counters, export_jobs, idempotency, imports, kpis, notifications, outbox, page_cache, qr, reminders, reports, rollups, ticket_ids, typed_exports, verification, waiting_room
+from evmapp.admin import BookingAdmin
+from evmapp.holds import place_hold, release_expired_holds, reserve_for_checkout
+from evmapp.inventory import reserve_seats
+from evmapp.models import Booking, DashboardSnapshot, Event, ExportJob, IdempotencyKey, ModelVersion, OutboxEmail, SalesRollup, SeatHold, WaitingRoom, start_of
+from evmapp.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, order_expressions, parse_ordering
+
+
+def keyset_order(queryset, ordering):
+    return queryset.order_by(*order_expressions(parse_ordering(queryset.model, ordering)))
+
+
+def make_event(total_tickets=100, **fields):
+    return Event.objects.create(
+        event_name='Booking check', organiser='QA', date=date(2030, 1, 1), time=time(18, 0),
+        venue='Hall', theme='Test', total_tickets=total_tickets, **fields,
+    )
+
+
+def book(event, tickets=1, paid=True):
+    """The ticketbooking view's write path: reserve seats and create the booking in one transaction"""
+    with transaction.atomic():
+        reservation = reserve_for_checkout(event.id, tickets)
+        if not reservation.ok:
+            return None
+        return Booking.objects.create(
+            event=event, number_of_tickets=tickets, name='Guest', contact_number='+910000000000',
+            email='guest@example.com', total_cost=100 * tickets, is_paid=paid, paid=paid,
+        )
+
+
+class HotQueryPlanTests(TestCase):
+    """EXPLAIN the hot queries from views.py and send_reminders.py; none may fall back to a table scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            event_name='Plan check', organiser='QA', time=time(18, 0), date=date.today() + timedelta(days=1),
+            venue='Hall', theme='Test', total_tickets=100,
+        )
+        Booking.objects.create(
+            event=cls.event, number_of_tickets=1, name='Guest', contact_number='+910000000000',
+            email='guest@example.com', total_cost=100,
+        )
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                return [row[-1] for row in cursor.fetchall()]
+            if connection.vendor == 'postgresql':
+                # Tiny test tables make a seq scan cheapest; ask whether an index path exists at all
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+                return [row[0] for row in cursor.fetchall()]
+        self.skipTest(f'No plan check for {connection.vendor}')
+
+    def assertUsesIndex(self, queryset, *tables):
+        plan = self.plan(queryset)
+        for line in plan:
+            for table in tables:
+                if connection.vendor == 'sqlite':
+                    scanned = line.startswith(f'SCAN {table}') and 'INDEX' not in line
+                else:
+                    scanned = 'Seq Scan on ' + table in line
+                self.assertFalse(scanned, f'{table} is scanned:\n' + '\n'.join(plan))
+
+    def test_home_active_events(self):
+        self.assertUsesIndex(Event.objects.filter(status=True).order_by('starts_at'), 'evmapp_event')
+
+    def test_event_guest_list(self):
+        bookings = Booking.objects.filter(event=self.event)
+        self.assertUsesIndex(keyset_order(bookings, ('-booking_date', '-id'))[:51], 'evmapp_booking')
+
+    def test_my_bookings(self):
+        bookings = Booking.objects.filter(email='guest@example.com').select_related('event')
+        self.assertUsesIndex(keyset_order(bookings, ('-booking_date', '-id'))[:21], 'evmapp_booking')
+
+    def test_participants_csv(self):
+        self.assertUsesIndex(Booking.objects.filter(event_id=self.event.id), 'evmapp_booking')
+
+    def test_verification_queue(self):
+        self.assertUsesIndex(Booking.objects.filter(event=self.event, is_verified=False), 'evmapp_booking')
+
+    def test_unpaid_bookings(self):
+        self.assertUsesIndex(Booking.objects.filter(event=self.event, is_paid=False), 'evmapp_booking')
+
+    def test_24h_reminders(self):
+        start = timezone.now()
+        bookings = reminders.due('reminder_24h_sent', start + timedelta(hours=2), start + timedelta(hours=24))
+        self.assertUsesIndex(bookings.order_by('id').values('id')[:1000], 'evmapp_booking', 'evmapp_event')
+
+    def test_2h_reminders(self):
+        start = timezone.now()
+        bookings = reminders.due('reminder_2h_sent', start, start + timedelta(hours=2))
+        self.assertUsesIndex(bookings.order_by('id').values('id')[:1000], 'evmapp_booking', 'evmapp_event')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+    """The outbox worker against the locmem backend"""
+
+    def test_drain_sends_in_batches(self):
+        for i in range(5):
+            outbox.enqueue(f'Ticket {i}', '<p>Hi</p>', [f'guest{i}@example.com'])
+        stats = outbox.drain(size=2)
+        self.assertEqual((stats.batches, stats.sent), (3, 5))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 5)
+
+    def test_failure_backs_off_then_dead_letters(self):
+        row = outbox.enqueue('Ticket', 'Hi', ['guest@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=ValueError('boom')):
+            self.assertEqual(outbox.drain().retried, 1)
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), (OutboxEmail.PENDING, 1))
+            self.assertEqual(outbox.drain().batches, 0)  # not due yet
+            OutboxEmail.objects.filter(id=row.id).update(next_attempt_at=row.created_at)
+            self.assertEqual(outbox.drain().dead, 1)
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboxEmail.DEAD)
+        self.assertEqual(mail.outbox, [])
+
+    def test_claims_do_not_overlap(self):
+        for i in range(5):
+            outbox.enqueue(f'Ticket {i}', 'Hi', ['guest@example.com'])
+        first, second = outbox.claim_batch(3), outbox.claim_batch(3)
+        self.assertEqual((len(first), len(second)), (3, 2))
+        self.assertFalse({row.id for row in first} & {row.id for row in second})
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ReminderTests(TestCase):
+    """Reminders are picked by start-time window, once per booking"""
+
+    def book(self, starts_in):
+        starts = timezone.localtime() + starts_in
+        event = Event.objects.create(
+            event_name='Reminder check', organiser='QA', date=starts.date(), time=starts.time().replace(microsecond=0),
+            venue='Hall', theme='Test', total_tickets=100,
+        )
+        return Booking.objects.create(
+            event=event, number_of_tickets=1, name='Guest', contact_number='+910000000000', email='guest@example.com',
+            total_cost=0,
+        )
+
+    def test_windows_catch_up_and_send_once(self):
+        soon, tomorrow, later = self.book(timedelta(minutes=97)), self.book(timedelta(hours=20)), self.book(timedelta(hours=30))
+        self.assertEqual(reminders.schedule(), {24: 1, 2: 1})
+        self.assertEqual(reminders.schedule(), {24: 0, 2: 0})
+        for booking in (soon, tomorrow, later):
+            booking.refresh_from_db()
+        self.assertTrue(soon.reminder_2h_sent)
+        self.assertTrue(tomorrow.reminder_24h_sent)
+        self.assertFalse(later.reminder_24h_sent or later.reminder_2h_sent)
+        self.assertEqual(outbox.drain().sent, 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_edited_date_and_time_move_starts_at(self):
+        event = make_event()
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.client.post(f'/edit_event/{event.id}/', {
+            'event_name': 'Moved', 'category': 'OTHER', 'organiser_name': 'QA', 'venue': 'Hall', 'theme': 'Test',
+            'description': '', 'date': '2031-02-03', 'time': '09:30',
+        })
+        self.assertRedirects(response, '/viewevent', fetch_redirect_response=False)
+        event.refresh_from_db()
+        self.assertEqual(event.starts_at, start_of(date(2031, 2, 3), time(9, 30)))
+
+        event.time = time(21, 0)
+        event.save(update_fields=['time'])
+        self.assertEqual(Event.objects.get(pk=event.pk).starts_at, start_of(date(2031, 2, 3), time(21, 0)))
+
+    def test_reminder_window_follows_rescheduled_event(self):
+        postponed, brought_forward = self.book(timedelta(hours=20)), self.book(timedelta(hours=30))
+        for booking, starts_in in ((postponed, timedelta(hours=30)), (brought_forward, timedelta(hours=20))):
+            starts = timezone.localtime() + starts_in
+            event = booking.event
+            event.date, event.time = starts.date(), starts.time().replace(microsecond=0)
+            event.save()
+        self.assertEqual(reminders.schedule(), {24: 1, 2: 0})
+        postponed.refresh_from_db()
+        brought_forward.refresh_from_db()
+        self.assertFalse(postponed.reminder_24h_sent)
+        self.assertTrue(brought_forward.reminder_24h_sent)
+
+
+class NotificationTests(TestCase):
+    """Pre-rendered emails match a per-booking render_to_string"""
+
+    def test_prerendered_matches_full_render(self):
+        event = Event.objects.create(
+            event_name='Q&A <Night>', organiser='QA', date=date(2030, 1, 1), time=time(18, 0),
+            venue='Hall', theme='Test', total_tickets=100,
+        )
+        template = 'evmapp/email/event_reminder.html'
+        extra = {'hours_remaining': 24, 'important_items': reminders.IMPORTANT_ITEMS}
+        for i, name in enumerate(["O'Brien & Sons", '<script>x</script>', 'Guest']):
+            booking = Booking(
+                event=event, name=name, email='guest@example.com', ticket_id=f'T{i}', number_of_tickets=i + 1,
+                total_cost=Decimal('250.00'),
+            )
+            expected = render_to_string(template, {'booking': booking, 'event': event, **extra})
+            self.assertEqual(notifications.render(template, booking, event, **extra), expected)
+
+
+SHARED_TABLES = (DashboardSnapshot._meta.db_table, ModelVersion._meta.db_table)
+
+
+class BookingTransactionTests(TestCase):
+    """A booking transaction only writes rows of its own event; shared rows change after commit"""
+
+    def test_no_shared_rows_written_before_commit(self):
+        event = make_event()
+        kpis.refresh_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertIsNotNone(book(event, tickets=2))
+        written = [q['sql'] for q in queries if not q['sql'].startswith('SELECT')]
+        for table in SHARED_TABLES:
+            self.assertFalse([sql for sql in written if table in sql], f'{table} written inside the booking transaction')
+        snapshot = kpis.get_snapshot()
+        self.assertEqual((snapshot.tickets_sold, snapshot.total_funds), (2, Decimal('200')))
+
+    def test_versions_bump_once_per_write(self):
+        event = make_event()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = book(event)
+        before = dict(ModelVersion.objects.values_list('name', 'version'))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.is_verified = True
+            booking.save()
+        after = dict(ModelVersion.objects.values_list('name', 'version'))
+        self.assertEqual((after['booking'], after['event']), (before['booking'] + 1, before['event'] + 1))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SQLite takes one database-wide write lock per transaction')
+class ConcurrentBookingTests(TransactionTestCase):
+    """Two events can be booked while the other's booking transaction is still open"""
+
+    def test_two_events_book_at_the_same_time(self):
+        first, second = make_event(), make_event()
+        kpis.refresh_snapshot()
+        booked, release, errors = threading.Event(), threading.Event(), []
+
+        def hold_open():
+            try:
+                with transaction.atomic():
+                    book(first)
+                    booked.set()
+                    release.wait(10)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_open)
+        thread.start()
+        try:
+            self.assertTrue(booked.wait(10))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    # Waiting on a row the first transaction locked fails here instead of hanging
+                    cursor.execute("SET LOCAL lock_timeout = '2s'")
+                self.assertIsNotNone(book(second))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(kpis.get_snapshot().tickets_sold, 2)
+
+
+class ParticipantExportTests(TestCase):
+    """The participant CSV carries contact details, so only staff may download it"""
+
+    def test_requires_staff(self):
+        url = '/download-participants-csv/?columns=name,email'
+        self.assertRedirects(self.client.get(url), f'/login/?next={url.replace(",", "%2C")}', fetch_redirect_response=False)
+        self.client.force_login(User.objects.create_user('guest'))
+        self.assertRedirects(self.client.get(url), '/', fetch_redirect_response=False)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines()[0], 'Name,Email')
+
+
+class WaitingRoomTests(TestCase):
+    """Admissions advance from a stored high-water mark at admit_per_minute"""
+
+    def test_late_burst_is_not_admitted_at_once(self):
+        opened = timezone.now() - timedelta(hours=2)
+        room = WaitingRoom.objects.create(event=make_event(), admit_per_minute=10, initial_batch=5, opened_at=opened)
+        # Nobody queued for two hours, then a surge arrives
+        visitors = [SimpleNamespace(session={}) for _ in range(100)]
+        positions = [waiting_room.join(visitor, room) for visitor in visitors]
+        self.assertEqual(positions, list(range(1, 101)))
+
+        now = timezone.now()
+        self.assertEqual(waiting_room.admitted_through(room, now), 5)
+        self.assertEqual(waiting_room.admitted_through(room, now + timedelta(minutes=1)), 15)
+        self.assertEqual(waiting_room.admitted_through(room, now + timedelta(minutes=3)), 35)
+        self.assertTrue(waiting_room.is_admitted(visitors[34], room, now + timedelta(minutes=3)))
+        self.assertFalse(waiting_room.is_admitted(visitors[35], room, now + timedelta(minutes=3)))
+        # Stored, so a fresh read of the room sees the same mark
+        self.assertEqual(waiting_room.admitted_through(WaitingRoom.objects.get(pk=room.pk), now + timedelta(minutes=3)), 35)
+
+    def test_non_numeric_event_id_means_no_room(self):
+        self.assertIsNone(waiting_room.get_room('abc'))
+        self.assertEqual(self.client.get('/booktickets', {'event': 'abc'}).status_code, 200)
+
+
+class BookingImportTests(TestCase):
+    """CSV booking import: reported line numbers and seats of unpaid rows"""
+
+    def csv(self, event, *rows):
+        return StringIO('event_id,name,contact_number,is_paid\n' + ''.join(f'{row}\n' for row in rows).format(id=event.id))
+
+    def test_error_lines_count_blank_and_multiline_rows(self):
+        event = make_event()
+        source = self.csv(event, '{id},Ann,9876543210,no', '', '{id},"Two\nLines",9876543210,no', '', '{id},,9876543210,no')
+        result = imports.import_csv('bookings', source, size=2)
+        self.assertEqual((result.rows, result.created), (3, 2))
+        self.assertEqual(result.errors, [(7, 'name is required')])
+
+    def test_unpaid_rows_keep_their_seats(self):
+        event = make_event(total_tickets=2)
+        imports.import_csv('bookings', self.csv(event, '{id},Ann,9876543210,no', '{id},Bob,9876543210,no'))
+        self.assertEqual(release_expired_holds(now=timezone.now() + timedelta(days=1)), 0)
+        self.assertFalse(reserve_for_checkout(event.id, 1).ok)
+
+        event = make_event(total_tickets=2)
+        imports.import_csv('bookings', self.csv(event, '{id},Ann,9876543210,no'), hold_minutes=30)
+        self.assertEqual(release_expired_holds(now=timezone.now() + timedelta(minutes=31)), 1)
+
+    def test_notify_confirms_settled_rows_only(self):
+        event = make_event(price_per_ticket=Decimal('250'))
+        source = StringIO(
+            'event_id,name,contact_number,email,is_paid,is_verified,total_cost\n'
+            f'{event.id},Paid,9876543210,paid@example.com,yes,no,\n'
+            f'{event.id},Verified,9876543210,verified@example.com,no,yes,\n'
+            f'{event.id},Unpaid,9876543210,unpaid@example.com,no,no,\n'
+            f'{event.id},Comp,9876543210,comp@example.com,no,no,0\n'
+        )
+        result = imports.import_csv('bookings', source, notify=True)
+        self.assertEqual((result.created, result.notified), (4, 3))
+        queued = OutboxEmail.objects.filter(kind='import_confirmation')
+        self.assertEqual(
+            sorted(email.to[0] for email in queued),
+            ['comp@example.com', 'paid@example.com', 'verified@example.com'],
+        )
+
+
+class IdempotencyTests(TestCase):
+    """Retried POSTs replay the first successful response of the same visitor only"""
+
+    def setUp(self):
+        self.calls = 0
+
+        @idempotency.idempotent('test')
+        def view(request):
+            self.calls += 1
+            status = int(request.POST.get('status', 302))
+            response = HttpResponse(status=status)
+            if status == 302:
+                response['Location'] = f'/done/{self.calls}/'
+            return response
+
+        self.view = view
+
+    def post(self, user=None, **data):
+        request = RequestFactory().post('/book/', {'idempotency_key': 'k1', **data})
+        request.user = user or AnonymousUser()
+        SessionMiddleware(lambda request: None).process_request(request)
+        return self.view(request)
+
+    def test_keys_are_scoped_to_the_visitor(self):
+        ann, bob = User.objects.create_user('ann'), User.objects.create_user('bob')
+        self.assertEqual(self.post(ann)['Location'], '/done/1/')
+        self.assertEqual(self.post(ann)['Location'], '/done/1/')
+        self.assertEqual(self.post(bob)['Location'], '/done/2/')
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_pending_key_is_taken_over(self):
+        user = User.objects.create_user('ann')
+        IdempotencyKey.objects.create(
+            scope='test', owner=f'user:{user.pk}', key='k1', fingerprint=idempotency.fingerprint(
+                RequestFactory().post('/book/', {'idempotency_key': 'k1'})),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.post(user).status_code, 302)
+        self.assertEqual(self.calls, 1)
+
+    def test_errors_are_not_stored(self):
+        user = User.objects.create_user('ann')
+        self.assertEqual(self.post(user, status=400).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post(user, status=400).status_code, 400)
+        self.assertEqual(self.calls, 2)
+
+
+class PageCacheTests(TestCase):
+    """Anonymous pages are cached in the default (per-process) cache and go stale with ModelVersion"""
+
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    def render(self):
+        def render_page():
+            self.renders += 1
+            return HttpResponse('<p>Events</p>')
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        SessionMiddleware(lambda request: None).process_request(request)
+        page_cache.cached_page(request, render_page)
+        return self.renders
+
+    def test_repeats_are_served_from_local_memory_cache(self):
+        self.assertTrue(page_cache.is_enabled())
+        self.render()
+        self.assertEqual(self.render(), 1)
+
+    def test_committed_change_makes_pages_stale(self):
+        self.render()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_event()
+        self.assertEqual(self.render(), 2)
+        self.assertEqual(self.render(), 2)
+
+    def test_change_from_another_process_makes_pages_stale(self):
+        self.render()
+        # Another worker's cache never hears about it, but the shared version row moves on
+        ModelVersion.objects.update_or_create(name='booking', defaults={'version': 99, 'changed_at': timezone.now()})
+        self.assertEqual(self.render(), 2)
+
+
+@override_settings(UPI_VPA='evm@upi')
+class QrPaymentViewTests(TestCase):
+    """The payment page gets the same context on every render path"""
+
+    def test_expired_hold_page_keeps_payment_details(self):
+        booking = book(make_event(total_tickets=1), paid=False)  # sold out, and no hold left to convert
+        get = self.client.get(f'/payment/qr/{booking.id}/')
+        post = self.client.post(f'/payment/qr/{booking.id}/', {'payment_ref': 'UTR123'})
+        self.assertContains(post, 'Your seat hold expired')
+        for name in ('booking', 'hold_expires_at', 'upi_qr'):
+            self.assertEqual(post.context[name], get.context[name])
+        self.assertTrue(post.context['upi_qr'])
+
+
+class BookingAdminSearchTests(TestCase):
+    """Admin search results beyond the listed matches are flagged on the page"""
+
+    def test_truncated_results_are_flagged(self):
+        event = make_event()
+        for _ in range(3):
+            book(event)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        with mock.patch.object(BookingAdmin, 'search_limit', 2):
+            response = self.client.get('/admin/evmapp/booking/', {'q': 'guest'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, 'Showing the best 2 matches only')
+        self.assertNotContains(self.client.get('/admin/evmapp/booking/', {'q': 'guest'}), 'matches only')
+
+
+class SeatReservationTests(TestCase):
+    """reserve_seats claims capacity with one conditional UPDATE and rolls back with the booking"""
+
+    def seats_reserved(self, event):
+        event.refresh_from_db(fields=['seats_reserved'])
+        return event.seats_reserved
+
+    def test_exact_capacity_then_oversell(self):
+        event = make_event(total_tickets=5)
+        self.assertIsNotNone(book(event, tickets=3))
+        self.assertIsNotNone(book(event, tickets=2))  # exactly fills the event
+        self.assertEqual(self.seats_reserved(event), 5)
+
+        reservation = reserve_seats(event.id, 1)
+        self.assertFalse(reservation.ok)
+        self.assertEqual(reservation.remaining, 0)
+        self.assertIsNone(book(event))
+        self.assertEqual(self.seats_reserved(event), 5)
+        self.assertEqual(Booking.objects.filter(event=event).count(), 2)
+
+    def test_request_larger_than_remaining_is_refused(self):
+        event = make_event(total_tickets=5)
+        book(event, tickets=4)
+        reservation = reserve_seats(event.id, 2)
+        self.assertEqual((reservation.ok, reservation.remaining), (False, 1))
+        self.assertEqual(self.seats_reserved(event), 4)
+
+    def test_failed_booking_insert_returns_the_seats(self):
+        event = make_event(total_tickets=5)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                self.assertTrue(reserve_seats(event.id, 3).ok)
+                Booking.objects.create(event=event, number_of_tickets=3, name=None, contact_number='+910000000000')
+        self.assertEqual(self.seats_reserved(event), 0)
+        self.assertFalse(Booking.objects.exists())
+
+
+@override_settings(SEAT_HOLD_MINUTES=15)
+class SeatHoldTests(TestCase):
+    """Unpaid checkouts hold their seats until the payment window closes"""
+
+    def checkout(self, event, tickets=1):
+        booking = book(event, tickets=tickets, paid=False)
+        place_hold(booking)
+        return booking
+
+    def seats_reserved(self, event):
+        event.refresh_from_db(fields=['seats_reserved'])
+        return event.seats_reserved
+
+    def test_expired_holds_are_released_once(self):
+        event = make_event(total_tickets=5)
+        expired, live = self.checkout(event, tickets=2), self.checkout(event, tickets=1)
+        SeatHold.objects.filter(booking=expired).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(release_expired_holds(), 2)
+        self.assertEqual(release_expired_holds(), 0)
+        self.assertEqual(self.seats_reserved(event), 1)
+        self.assertFalse(SeatHold.objects.filter(booking=expired).exists())
+        self.assertTrue(SeatHold.objects.filter(booking=live).exists())
+
+    def test_sold_out_checkout_sweeps_expired_holds(self):
+        event = make_event(total_tickets=2)
+        self.checkout(event, tickets=2)
+        self.assertFalse(reserve_for_checkout(event.id, 1).ok)
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(reserve_for_checkout(event.id, 1).ok)
+        self.assertEqual(self.seats_reserved(event), 1)
+
+    def test_paying_converts_the_hold(self):
+        event = make_event(total_tickets=2)
+        booking = self.checkout(event, tickets=2)
+        booking.is_paid = True
+        booking.save()
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(self.seats_reserved(event), 2)  # not reserved twice
+        self.assertEqual(release_expired_holds(now=timezone.now() + timedelta(days=1)), 0)
+
+
+class BulkVerificationTests(TestCase):
+    """The admin verify action: one UPDATE, exact counters, one queued email per booking"""
+
+    def test_verify_action_updates_counters_and_queues_emails(self):
+        first, second = make_event(total_tickets=10), make_event(total_tickets=10)
+        held = [book(first, tickets=2, paid=False) for _ in range(2)]
+        for booking in held:
+            place_hold(booking)
+        paid = book(second, tickets=3)
+        no_email = book(second, paid=False)
+        Booking.objects.filter(pk=no_email.pk).update(email='')
+        verified = book(second)
+        verified.is_verified = True
+        verified.save()
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        selected = [b.pk for b in (*held, paid, no_email, verified)]
+        response = self.client.post('/admin/evmapp/booking/', {
+            'action': 'verify_payment_and_notify', '_selected_action': selected,
+        }, follow=True)
+        self.assertContains(response, '1 users were already verified')
+
+        self.assertFalse(Booking.objects.filter(pk__in=selected, is_verified=False).exists())
+        self.assertFalse(SeatHold.objects.exists())
+        expected = counters.aggregate_counters()
+        for event in (first, second):
+            event.refresh_from_db()
+            self.assertEqual({field: getattr(event, field) for field in counters.COUNTER_FIELDS}, expected[event.pk])
+        self.assertEqual(first.seats_reserved, 4)  # holds converted, not reserved again
+        self.assertEqual(first.tickets_verified, 4)
+        self.assertEqual(first.revenue, Decimal('400'))
+
+        queued = OutboxEmail.objects.filter(kind='payment_verified')
+        self.assertEqual(queued.count(), 3)  # the booking without an address gets none
+        self.assertEqual(outbox.drain().sent, 3)
+
+
+class QrCacheTests(TestCase):
+    """QR PNGs come from the in-process LRU, then the shared disk cache, and are encoded once"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name, QR_CACHE_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        qr.clear()
+        self.addCleanup(qr.clear)
+
+    def test_memory_then_disk_then_encode(self):
+        payload = 'upi://pay?pa=evm@upi&am=250&cu=INR'
+        with mock.patch.object(qr, 'encode', wraps=qr.encode) as encode:
+            first = qr.png(payload)
+            self.assertEqual(qr.png(payload), first)
+            self.assertEqual(encode.call_count, 1)
+            self.assertTrue(os.path.exists(qr.disk_path(qr.digest(payload))))
+
+            qr.clear()  # a fresh process: the memo is empty but the disk copy is shared
+            self.assertEqual(qr.png(payload), first)
+            self.assertEqual(encode.call_count, 1)
+        self.assertEqual(qr.stats()['disk_hits'], 1)
+        self.assertTrue(first.startswith(b'\x89PNG'))
+
+    def test_lru_evicts_least_recently_used(self):
+        a, b, c = (f'upi://pay?pa=evm@upi&am={amount}&cu=INR' for amount in (1, 2, 3))
+        for payload in (a, b, a, c):
+            qr.png(payload)
+        self.assertEqual(list(qr._cache), [qr.digest(a), qr.digest(c)])
+        self.assertEqual(qr.stats()['memory_hits'], 1)
+        qr.png(b)
+        self.assertEqual(qr.stats()['disk_hits'], 1)
+
+    def test_disk_cache_can_be_cleared(self):
+        payload = 'upi://pay?pa=evm@upi&am=9&cu=INR'
+        qr.png(payload)
+        qr.clear(disk=True)
+        self.assertFalse(os.path.exists(qr.disk_path(qr.digest(payload))))
+        self.assertEqual(qr.stats()['entries'], 0)
+
+
+class EventCounterTests(TestCase):
+    """The denormalized Event counters match a recount after every kind of booking write"""
+
+    def assertCountersExact(self, *events):
+        recount = counters.aggregate_counters()
+        for event in events:
+            event.refresh_from_db()
+            expected = recount.get(event.id) or {field: 0 for field in counters.COUNTER_FIELDS}
+            for field in counters.COUNTER_FIELDS:
+                self.assertEqual(getattr(event, field), expected[field], field)
+
+    def test_create_pay_verify_edit_delete(self):
+        event, other = make_event(), make_event()
+        booking = book(event, tickets=2, paid=False)
+        self.assertCountersExact(event)
+        self.assertEqual((event.booking_count, event.tickets_sold, event.tickets_paid), (1, 2, 0))
+
+        booking.is_paid = booking.paid = True
+        booking.save()
+        self.assertCountersExact(event)
+        self.assertEqual((event.tickets_paid, event.revenue), (2, Decimal('200')))
+
+        booking.is_verified = True
+        booking.save()
+        self.assertCountersExact(event)
+        self.assertEqual(event.tickets_verified, 2)
+
+        booking.number_of_tickets, booking.total_cost = 3, 300
+        booking.save()
+        self.assertCountersExact(event)
+        self.assertEqual((event.tickets_sold, event.revenue), (3, Decimal('300')))
+
+        booking.event = other
+        booking.save()
+        self.assertCountersExact(event, other)
+        self.assertEqual((event.booking_count, other.booking_count), (0, 1))
+
+        booking.delete()
+        self.assertCountersExact(event, other)
+        self.assertEqual((other.booking_count, other.tickets_sold, other.revenue), (0, 0, Decimal('0')))
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        event = make_event()
+        book(event, tickets=2)
+        call_command('rebuild_event_counters', '--check', stdout=StringIO())
+
+        Event.objects.filter(pk=event.pk).update(revenue=999, tickets_paid=7)
+        output = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_event_counters', '--check', stdout=output)
+        self.assertIn('revenue 999.00 -> 200', output.getvalue())
+        event.refresh_from_db()
+        self.assertEqual(event.tickets_paid, 7)  # --check never writes
+
+        call_command('rebuild_event_counters', stdout=StringIO())
+        self.assertCountersExact(event)
+        call_command('rebuild_event_counters', '--check', stdout=StringIO())
+
+
+class TicketIdTests(TransactionTestCase):
+    """Ticket IDs are unique across allocator blocks and restarts, and their check character catches typos"""
+
+    def test_unique_across_blocks_and_restarts(self):
+        allocator = ticket_ids.TicketIdAllocator(block_size=3)
+        ids = allocator.allocate(2) + allocator.allocate(5) + [allocator.next_id() for _ in range(4)]
+        # A restarted process starts a fresh block; the unused rest of the old one is simply skipped
+        ids += ticket_ids.TicketIdAllocator(block_size=3).allocate(4)
+        with transaction.atomic():
+            ids += ticket_ids.TicketIdAllocator(block_size=3).allocate(2)
+        ids += allocator.allocate(3)
+        self.assertEqual(len(ids), 20)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(ticket_ids.is_valid(ticket_id) for ticket_id in ids))
+
+    def test_block_is_served_from_memory(self):
+        allocator = ticket_ids.TicketIdAllocator(block_size=10)
+        allocator.next_id()
+        with self.assertNumQueries(0):
+            allocator.allocate(9)
+
+    def test_check_character_catches_single_character_typos(self):
+        for number in (0, 1, 31, 32, 12345, ticket_ids.SPACE - 1):
+            ticket_id = ticket_ids.format_ticket_id(number)
+            self.assertTrue(ticket_ids.is_valid(ticket_id))
+            self.assertTrue(ticket_ids.is_valid(ticket_id.lower()))
+            for position in range(len(ticket_id)):
+                for char in ticket_ids.ALPHABET:
+                    if char != ticket_id[position]:
+                        typo = ticket_id[:position] + char + ticket_id[position + 1:]
+                        self.assertFalse(ticket_ids.is_valid(typo), typo)
+        self.assertFalse(ticket_ids.is_valid(''))
+        self.assertFalse(ticket_ids.is_valid('0000000U'))
+
+    def test_base32_round_trip(self):
+        for number in (0, 1, 31, 32, 1023, 987654321, ticket_ids.SPACE - 1):
+            body = ticket_ids.encode(number)
+            self.assertEqual(len(body), ticket_ids.BODY_LENGTH)
+            self.assertEqual(ticket_ids.decode(body), number)
+            self.assertEqual(ticket_ids.decode(body.lower()), number)
+        self.assertEqual(ticket_ids.decode('1L1I0O'), ticket_ids.decode('111100'))
+
+
+class KeysetPaginationTests(TestCase):
+    """Keyset pages walk the whole ordering both ways; bad cursors restart at the first page"""
+
+    ordering = ('-booking_date', '-id')
+
+    def setUp(self):
+        self.event = make_event()
+        for _ in range(7):
+            book(self.event)
+        # Ties on booking_date and NULLs must still page by id
+        Booking.objects.filter(pk__in=Booking.objects.order_by('id').values('pk')[:2]).update(booking_date=None)
+        Booking.objects.filter(pk__in=Booking.objects.order_by('id').values('pk')[2:5]).update(booking_date=timezone.now())
+        self.expected = [booking.pk for booking in keyset_order(Booking.objects.all(), self.ordering)]
+
+    def page(self, cursor=None):
+        request = RequestFactory().get('/', {'cursor': cursor} if cursor else {})
+        return keyset_page(request, Booking.objects.all(), self.ordering, per_page=3)
+
+    def test_cursor_round_trip(self):
+        stamp = timezone.now().replace(microsecond=123456)
+        cursor = encode_cursor([stamp, None, Decimal('1.50'), 7], 'prev')
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, 4), ('prev', [stamp.isoformat(), None, '1.50', 7]))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor, 2)
+
+    def test_next_and_previous_navigation(self):
+        pages = [self.page()]
+        self.assertFalse(pages[0].has_previous)
+        while pages[-1].has_next:
+            pages.append(self.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([booking.pk for page in pages for booking in page], self.expected)
+
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(self.page(back[-1].previous_cursor))
+        self.assertEqual([[booking.pk for booking in page] for page in reversed(back)], [[b.pk for b in page] for page in pages])
+        self.assertIn('cursor=', pages[1].previous_url)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = [booking.pk for booking in self.page()]
+        tampered = [
+            'not a cursor!',
+            encode_cursor(['next', 1], 'next')[:-3],
+            encode_cursor([1], 'next'),
+            encode_cursor(['yesterday', 3], 'next'),
+            encode_cursor([None, 'abc'], 'next'),
+            encode_cursor([None, 5], 'sideways'),
+        ]
+        tampered.append(base64.urlsafe_b64encode(b'["next",[[1],{"a":2}]]').decode())
+        for cursor in tampered:
+            page = self.page(cursor)
+            self.assertEqual([booking.pk for booking in page], first, cursor)
+            self.assertFalse(page.has_previous)
+
+    def test_view_ignores_tampered_cursor(self):
+        self.client.force_login(User.objects.create_user('staff', 'staff@example.com', 'x', is_staff=True))
+        response = self.client.get('/viewevent', {'cursor': encode_cursor(['abc'], 'next')})
+        self.assertEqual(response.status_code, 200)
+
+
+class ExportJobTests(TestCase):
+    """run_export_jobs claims queued jobs once each and leaves them done (with a file) or failed"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.event = make_event()
+        book(self.event, tickets=2)
+        book(self.event)
+
+    def test_claim_takes_oldest_queued_job_once(self):
+        first = export_jobs.queue_export(ExportJob.PARTICIPANTS, event=self.event)
+        second = export_jobs.queue_export(ExportJob.PAYMENTS)
+        claimed = export_jobs.claim_next()
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, ExportJob.RUNNING)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(export_jobs.claim_next().pk, second.pk)
+        self.assertIsNone(export_jobs.claim_next())
+
+    def test_worker_completes_job(self):
+        job = export_jobs.queue_export(ExportJob.PARTICIPANTS, event=self.event, columns='name,tickets')
+        output = StringIO()
+        call_command('run_export_jobs', '--once', stdout=output)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertEqual((job.total_rows, job.rows_written, job.progress), (2, 2, 100))
+        self.assertIsNotNone(job.expires_at)
+        self.assertIn('2 row(s)', output.getvalue())
+        with default_storage.open(job.file.name) as handle:
+            self.assertEqual(handle.read().decode().splitlines(), ['Name,Tickets', 'Guest,2', 'Guest,1'])
+
+        # Past retention the file is deleted and the job marked expired
+        self.assertEqual(export_jobs.expire_jobs(job.expires_at), 1)
+        self.assertFalse(default_storage.exists(job.file.name))
+        self.assertEqual(ExportJob.objects.get(pk=job.pk).status, ExportJob.EXPIRED)
+
+    def test_worker_records_failure_and_keeps_going(self):
+        failing = export_jobs.queue_export(ExportJob.PARTICIPANTS)
+        healthy = export_jobs.queue_export(ExportJob.PAYMENTS)
+        errors = StringIO()
+        with mock.patch.object(export_jobs, 'file_chunks', side_effect=[RuntimeError('disk full'), [b'ok\n']]):
+            call_command('run_export_jobs', '--once', stdout=StringIO(), stderr=errors)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.error, failing.file.name), (ExportJob.FAILED, 'disk full', ''))
+        self.assertIsNotNone(failing.finished_at)
+        self.assertIn(f'Export job #{failing.pk} failed: disk full', errors.getvalue())
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'exports')), [os.path.basename(ExportJob.objects.get(pk=healthy.pk).file.name)])
+        self.assertEqual(ExportJob.objects.get(pk=healthy.pk).status, ExportJob.DONE)
+
+    def test_stalled_job_is_requeued(self):
+        job = export_jobs.queue_export(ExportJob.PARTICIPANTS)
+        export_jobs.claim_next()
+        ExportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=2), rows_written=5)
+        self.assertEqual(export_jobs.requeue_stale(minutes=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.started_at, job.rows_written), (ExportJob.QUEUED, None, 0))
+
+
+class TypedExportTests(TestCase):
+    """Typed exports keep column types in every format, including for empty results"""
+
+    def setUp(self):
+        self.event = make_event()
+        self.booking = book(self.event, tickets=2)
+        book(self.event, paid=False)
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.output.name, name)
+
+    def test_frame_dtypes(self):
+        frame = pd.concat(typed_exports.frames('bookings', self.event.id, size=1))
+        self.assertEqual(len(frame), 2)
+        dtypes = frame.dtypes
+        self.assertEqual((str(dtypes['id']), str(dtypes['number_of_tickets'])), ('Int64', 'Int64'))
+        self.assertEqual((str(dtypes['name']), str(dtypes['is_paid'])), ('string', 'boolean'))
+        self.assertEqual(str(dtypes['booking_date'].tz), 'UTC')
+        self.assertEqual(frame['total_cost'].tolist(), [Decimal('200'), Decimal('100')])
+        self.assertEqual(frame['event_date'].iloc[0], date(2030, 1, 1))
+        self.assertEqual(frame['is_paid'].tolist(), [True, False])
+
+    def test_jsonl(self):
+        self.assertEqual(typed_exports.write('bookings', 'jsonl', self.path('bookings.jsonl'), self.event.id), 2)
+        with open(self.path('bookings.jsonl')) as handle:
+            first = json.loads(handle.readline())
+        self.assertEqual(first['total_cost'], 200.0)
+        self.assertIs(first['is_paid'], True)
+        self.assertEqual((first['event_date'], first['event_time']), ('2030-01-01', '18:00:00'))
+        self.assertEqual(datetime.fromisoformat(first['booking_date']), self.booking.booking_date)
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.assertEqual(typed_exports.write('bookings', 'parquet', self.path('bookings.parquet'), self.event.id), 2)
+        table = pq.read_table(self.path('bookings.parquet'))
+        self.assertEqual(table.schema.field('total_cost').type, pa.decimal128(10, 2))
+        self.assertEqual(table.schema.field('is_paid').type, pa.bool_())
+        self.assertEqual(table.schema.field('booking_date').type, pa.timestamp('us', tz='UTC'))
+        self.assertEqual(table.column('total_cost').to_pylist(), [Decimal('200.00'), Decimal('100.00')])
+
+        self.assertEqual(typed_exports.write('payments', 'parquet', self.path('empty.parquet')), 0)
+        self.assertEqual(pq.read_table(self.path('empty.parquet')).schema.field('amount').type, pa.decimal128(10, 2))
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx(self):
+        import openpyxl
+
+        self.assertEqual(typed_exports.write('events', 'xlsx', self.path('events.xlsx')), 1)
+        sheet = openpyxl.load_workbook(self.path('events.xlsx'))['events']
+        header, row = [[cell.value for cell in row] for row in sheet.iter_rows()]
+        values = dict(zip(header, row))
+        self.assertEqual((values['id'], values['tickets_paid'], values['revenue']), (self.event.id, 2, 200))
+        self.assertEqual(values['date'].date(), date(2030, 1, 1))
+        self.assertIsNone(values['starts_at'].tzinfo)  # UTC, without the zone Excel can't store
+
+    def test_unknown_dataset_or_format(self):
+        with self.assertRaises(ValueError):
+            typed_exports.write('volunteers', 'jsonl', self.path('x'))
+        with self.assertRaises(ValueError):
+            typed_exports.write('bookings', 'csv', self.path('x'))
+
+
+class RevenueReportTests(TestCase):
+    """Report totals agree with the event counters, including bookings without a booking_date"""
+
+    def test_undated_bookings_are_counted(self):
+        event = make_event()
+        undated = book(event, tickets=2)
+        book(event)
+        book(event, paid=False)
+        Booking.objects.filter(pk=undated.pk).update(booking_date=None)
+        event.refresh_from_db()
+
+        report = reports.build_report(size=2)
+        self.assertEqual(report['totals']['collected'], float(event.revenue))
+        self.assertEqual(report['totals']['tickets'], event.tickets_sold)
+        self.assertEqual(sum(row['collected'] for row in report['by_day']), float(event.revenue))
+        self.assertIn({'day': reports.UNDATED, 'bookings': 1, 'tickets': 2, 'booked': 200.0, 'collected': 200.0}, report['by_day'])
+
+
+class EventDeletionTests(TestCase):
+    """Deleting an event cascades to its bookings without re-creating rows for it"""
+
+    def test_delete_event_with_paid_and_verified_bookings(self):
+        keep, doomed = make_event(), make_event()
+        kpis.refresh_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            book(keep, tickets=1)
+            book(doomed, tickets=2)
+            verified = book(doomed, tickets=3)
+            verified.is_verified = True
+            verified.save()
+            book(doomed, paid=False)
+        self.assertTrue(SalesRollup.objects.filter(event=doomed).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            doomed.delete()
+        self.assertFalse(Booking.objects.filter(event_id=doomed.pk).exists())
+        self.assertFalse(SalesRollup.objects.filter(event_id=doomed.pk).exists())
+        snapshot = kpis.get_snapshot()
+        self.assertEqual((snapshot.tickets_sold, snapshot.total_funds, snapshot.total_events), (1, Decimal('100'), 1))
+
+
+class SalesRollupTests(TestCase):
+    """Live rollup writes and rebuild() put every sale in the hour the booking was made"""
+
+    def rows(self):
+        # A booking made and deleted in the same hour leaves an all-zero row behind; rebuild() has none
+        rows = SalesRollup.objects.exclude(booking_count=0, tickets_sold=0, tickets_paid=0, tickets_verified=0, revenue=0)
+        return sorted(rows.values_list('event_id', 'bucket', *rollups.ROLLUP_FIELDS))
+
+    def test_live_recording_matches_rebuild(self):
+        event = make_event()
+        earlier = timezone.now() - timedelta(hours=5)
+        with mock.patch('django.utils.timezone.now', return_value=earlier):
+            paid_later = book(event, tickets=2, paid=False)
+            verified_later = book(event, tickets=1, paid=False)
+            book(event, tickets=3)
+        deleted = book(event)
+
+        # Paid and verified hours after the booking was made
+        paid_later.is_paid = True
+        paid_later.save()
+        verification.verify_bookings(Booking.objects.filter(pk=verified_later.pk), notify=False)
+        deleted.delete()
+
+        live = self.rows()
+        self.assertEqual([bucket for _, bucket, *_ in live], [rollups.hour_bucket(earlier)])
+        self.assertEqual(rollups.drift(), [])
+        rollups.rebuild()
+        self.assertEqual(self.rows(), live)
+
+    def test_check_reports_drift(self):
+        book(make_event())
+        SalesRollup.objects.update(revenue=0)
+        self.assertEqual(len(rollups.drift()), 1)
+        rollups.rebuild()
+        self.assertEqual(rollups.drift(), [])
+
+
+class GroupBookingApiTests(TestCase):
+    """Malformed group booking bodies get a JSON 400, not a server error"""
+
+    contact = {'name': 'Lead', 'email': 'lead@example.com', 'contact_number': '+910000000000'}
+
+    def post(self, body):
+        return self.client.post('/booktickets/group/', body, content_type='application/json')
+
+    def test_body_must_be_an_object(self):
+        for body in ('[1]', '"x"', '3'):
+            response = self.post(body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Request body must be a JSON object.'})
+
+    def test_event_must_be_an_integer(self):
+        for event in ('abc', None, [1]):
+            response = self.post({'event': event, 'contact': self.contact, 'attendees': [{'name': 'Ann'}]})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'event must be an event id.'})
+
+    def test_valid_request_books_the_group(self):
+        event = make_event()
+        response = self.post({'event': str(event.id), 'contact': self.contact, 'attendees': [{'name': 'Ann'}, {'name': 'Bob'}]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['tickets']), 2)
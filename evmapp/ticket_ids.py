@@ -0,0 +1,116 @@
+"""
+Collision-free ticket IDs.
+
+Each ID is a number drawn from a database sequence, scrambled with a fixed
+bijection so consecutive bookings don't get consecutive-looking IDs, written in
+Crockford base32 (no I, L, O or U) and followed by a Luhn mod 32 check character.
+Uniqueness comes from the sequence itself, so there is no retry-on-conflict loop.
+
+Outside a transaction the allocator reserves numbers in blocks and hands them out
+from memory, so most IDs cost no query at all. Inside a transaction it reserves
+exactly what the caller asks for: if that transaction rolls back the counter rolls
+back too, and none of those numbers may be reused from memory afterwards.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import TicketSequence
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BASE = len(ALPHABET)
+BODY_LENGTH = 7
+SPACE = BASE ** BODY_LENGTH  # ~34 billion IDs before the body would need to grow
+
+# Affine permutation of [0, SPACE): SPACE is a power of two, so any odd multiplier is invertible
+_MULTIPLIER = 0x2F3A5B69D
+_OFFSET = 0x1D4C3B2A1
+
+_ALIASES = str.maketrans('ILO', '110')
+
+
+def encode(number, length=BODY_LENGTH):
+    chars = []
+    for _ in range(length):
+        number, digit = divmod(number, BASE)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode(body):
+    """Inverse of encode(); reads I/L as 1 and O as 0 like Crockford base32, case-insensitively"""
+    number = 0
+    for char in body.upper().translate(_ALIASES):
+        number = number * BASE + ALPHABET.index(char)
+    return number
+
+
+def check_character(body):
+    """Luhn mod 32 check character over the base32 body"""
+    factor = 2
+    total = 0
+    for char in reversed(body):
+        addend = factor * ALPHABET.index(char)
+        factor = 1 if factor == 2 else 2
+        total += addend // BASE + addend % BASE
+    return ALPHABET[(BASE - total % BASE) % BASE]
+
+
+def is_valid(ticket_id):
+    """True if ticket_id is a well-formed allocator ID (catches typos and transpositions)"""
+    ticket_id = (ticket_id or '').upper()
+    if len(ticket_id) != BODY_LENGTH + 1 or any(c not in ALPHABET for c in ticket_id):
+        return False
+    return check_character(ticket_id[:-1]) == ticket_id[-1]
+
+
+def format_ticket_id(number):
+    body = encode((number * _MULTIPLIER + _OFFSET) % SPACE)
+    return body + check_character(body)
+
+
+def reserve_numbers(count, sequence=TicketSequence.TICKETS):
+    """Claims `count` consecutive sequence numbers and returns the first one"""
+    TicketSequence.objects.get_or_create(name=sequence)
+    with transaction.atomic():
+        TicketSequence.objects.filter(name=sequence).update(next_value=F('next_value') + count)
+        end = TicketSequence.objects.filter(name=sequence).values_list('next_value', flat=True).get()
+    return end - count
+
+
+class TicketIdAllocator:
+    def __init__(self, block_size=100, sequence=TicketSequence.TICKETS):
+        self.block_size = block_size
+        self.sequence = sequence
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def allocate(self, count=1):
+        """Returns `count` unique ticket IDs"""
+        if transaction.get_connection().in_atomic_block:
+            start = reserve_numbers(count, self.sequence)
+            return [format_ticket_id(n) for n in range(start, start + count)]
+
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    size = max(self.block_size, count - len(ids))
+                    self._next = reserve_numbers(size, self.sequence)
+                    self._end = self._next + size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(format_ticket_id(n) for n in range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    def next_id(self):
+        return self.allocate(1)[0]
+
+
+allocator = TicketIdAllocator()
+
+
+def next_ticket_id():
+    return allocator.next_id()
@@ -0,0 +1,249 @@
+"""
+Typed exports of bookings, payments and events for loading straight into pandas.
+
+Unlike the participant CSV, values keep their types: money stays Decimal (decimal128 in
+Parquet), flags stay booleans, dates and UTC datetimes stay temporal. Rows are read and
+written EXPORT_CHUNK_SIZE at a time. Parquet needs pyarrow and XLSX needs openpyxl; both are
+optional and only imported when those formats are asked for.
+"""
+import importlib.util
+from itertools import islice
+
+import pandas as pd
+from django.db import models
+
+from .exports import chunk_size
+from .models import Booking, Event, Payment
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', '.jsonl'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+}
+XLSX_MAX_ROWS = 1048575  # sheet limit, less the header row
+
+# dataset: (model, [(column, value path), ...]); types come from the model fields
+DATASETS = {
+    'bookings': (Booking, [
+        ('id', 'id'),
+        ('ticket_id', 'ticket_id'),
+        ('event_id', 'event_id'),
+        ('event_name', 'event__event_name'),
+        ('event_date', 'event__date'),
+        ('event_time', 'event__time'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('contact_number', 'contact_number'),
+        ('number_of_tickets', 'number_of_tickets'),
+        ('total_cost', 'total_cost'),
+        ('is_paid', 'is_paid'),
+        ('is_verified', 'is_verified'),
+        ('payment_ref', 'payment_ref'),
+        ('group_ref', 'group_ref'),
+        ('booking_date', 'booking_date'),
+    ]),
+    'payments': (Payment, [
+        ('id', 'id'),
+        ('booking_id', 'booking_id'),
+        ('ticket_id', 'booking__ticket_id'),
+        ('event_id', 'booking__event_id'),
+        ('event_name', 'booking__event__event_name'),
+        ('event_date', 'booking__event__date'),
+        ('order_id', 'razorpay_order_id'),
+        ('payment_id', 'razorpay_payment_id'),
+        ('status', 'status'),
+        ('amount', 'amount'),
+        ('currency', 'currency'),
+        ('method', 'method'),
+        ('created_at', 'created_at'),
+    ]),
+    'events': (Event, [
+        ('id', 'id'),
+        ('event_name', 'event_name'),
+        ('category', 'category'),
+        ('organiser', 'organiser'),
+        ('date', 'date'),
+        ('time', 'time'),
+        ('starts_at', 'starts_at'),
+        ('venue', 'venue'),
+        ('status', 'status'),
+        ('total_tickets', 'total_tickets'),
+        ('price_per_ticket', 'price_per_ticket'),
+        ('booking_count', 'booking_count'),
+        ('tickets_sold', 'tickets_sold'),
+        ('tickets_paid', 'tickets_paid'),
+        ('tickets_verified', 'tickets_verified'),
+        ('revenue', 'revenue'),
+    ]),
+}
+
+
+class MissingDependency(Exception):
+    pass
+
+
+OPTIONAL_MODULES = {'parquet': ('pyarrow', 'Parquet export needs pyarrow (pip install pyarrow)'),
+                    'xlsx': ('openpyxl', 'XLSX export needs openpyxl (pip install openpyxl)')}
+
+
+def require(fmt):
+    """Raises MissingDependency if the library behind `fmt` is not installed"""
+    if fmt in OPTIONAL_MODULES:
+        module, message = OPTIONAL_MODULES[fmt]
+        if importlib.util.find_spec(module) is None:
+            raise MissingDependency(message)
+
+
+def resolve_field(model, path):
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    return field.target_field if field.is_relation else field
+
+
+def field_kind(field):
+    if isinstance(field, models.BooleanField):
+        return 'bool'
+    if isinstance(field, models.DecimalField):
+        return 'decimal'
+    if isinstance(field, models.DateTimeField):
+        return 'datetime'
+    if isinstance(field, models.DateField):
+        return 'date'
+    if isinstance(field, models.TimeField):
+        return 'time'
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return 'int'
+    return 'str'
+
+
+def schema(dataset):
+    """[(column, path, kind, field), ...] for a dataset"""
+    model, columns = DATASETS[dataset]
+    fields = [resolve_field(model, path) for _, path in columns]
+    return [(column, path, field_kind(field), field) for (column, path), field in zip(columns, fields)]
+
+
+def queryset(dataset, event_id=None):
+    model, _ = DATASETS[dataset]
+    rows = model.objects.all()
+    if event_id:
+        event_path = {'bookings': 'event_id', 'payments': 'booking__event_id', 'events': 'id'}[dataset]
+        rows = rows.filter(**{event_path: event_id})
+    return rows.order_by('id')
+
+
+DTYPES = {'int': 'Int64', 'str': 'string', 'bool': 'boolean'}
+
+
+def frames(dataset, event_id=None, size=None, progress=None):
+    """Typed DataFrames of at most `size` rows, streaming from the database cursor; progress(rows so far) after each"""
+    size = size or chunk_size()
+    rows = 0
+    columns = schema(dataset)
+    iterator = queryset(dataset, event_id).values_list(*(path for _, path, _, _ in columns)).iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        frame = pd.DataFrame.from_records(chunk, columns=[column for column, _, _, _ in columns])
+        for column, _, kind, _ in columns:
+            if kind in DTYPES:
+                frame[column] = frame[column].astype(DTYPES[kind])
+            elif kind == 'datetime':
+                frame[column] = pd.to_datetime(frame[column], utc=True)
+            # decimal, date and time stay Python objects so no precision is lost
+        yield frame
+        rows += len(frame)
+        if progress:
+            progress(rows)
+
+
+def jsonl_chunks(dataset, event_id=None, progress=None):
+    """Encoded JSON Lines, one chunk of rows per piece; money is written as a JSON number"""
+    columns = schema(dataset)
+    for frame in frames(dataset, event_id, progress=progress):
+        for column, _, kind, _ in columns:
+            if kind == 'decimal':
+                frame[column] = frame[column].map(lambda value: None if value is None else float(value)).astype('Float64')
+            elif kind in ('date', 'time'):
+                frame[column] = frame[column].map(lambda value: None if value is None else value.isoformat())
+        yield frame.to_json(orient='records', lines=True, date_format='iso', date_unit='us').encode()
+
+
+def arrow_schema(dataset):
+    require('parquet')
+    import pyarrow as pa
+
+    types = {
+        'int': lambda field: pa.int64(),
+        'str': lambda field: pa.string(),
+        'bool': lambda field: pa.bool_(),
+        'decimal': lambda field: pa.decimal128(field.max_digits, field.decimal_places),
+        'date': lambda field: pa.date32(),
+        'time': lambda field: pa.time64('us'),
+        'datetime': lambda field: pa.timestamp('us', tz='UTC'),
+    }
+    return pa.schema([pa.field(column, types[kind](field)) for column, _, kind, field in schema(dataset)])
+
+
+def write_parquet(dataset, destination, event_id=None, progress=None):
+    """Writes one Parquet row group per chunk; returns the number of rows"""
+    target = arrow_schema(dataset)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    with pq.ParquetWriter(destination, target, compression='snappy') as writer:
+        for frame in frames(dataset, event_id, progress=progress):
+            writer.write_table(pa.Table.from_pandas(frame, schema=target, preserve_index=False))
+            rows += len(frame)
+        if not rows:
+            writer.write_table(target.empty_table())
+    return rows
+
+
+def write_xlsx(dataset, destination, event_id=None, progress=None):
+    """Writes a single sheet chunk by chunk; returns the number of rows"""
+    require('xlsx')
+    if queryset(dataset, event_id).count() > XLSX_MAX_ROWS:
+        raise ValueError(f'Too many rows for one XLSX sheet ({XLSX_MAX_ROWS}); use Parquet or JSONL')
+
+    columns = schema(dataset)
+    rows = 0
+    with pd.ExcelWriter(destination, engine='openpyxl') as writer:
+        for frame in frames(dataset, event_id, progress=progress):
+            for column, _, kind, _ in columns:
+                if kind == 'datetime':
+                    frame[column] = frame[column].dt.tz_localize(None)  # Excel has no time zones; values are UTC
+            frame.to_excel(writer, sheet_name=dataset, index=False, header=not rows, startrow=rows + 1 if rows else 0)
+            rows += len(frame)
+        if not rows:
+            pd.DataFrame(columns=[column for column, _, _, _ in columns]).to_excel(writer, sheet_name=dataset, index=False)
+    return rows
+
+
+def write_jsonl(dataset, destination, event_id=None, progress=None):
+    rows = 0
+    handle = destination if hasattr(destination, 'write') else open(destination, 'wb')
+    try:
+        for chunk in jsonl_chunks(dataset, event_id, progress):
+            handle.write(chunk)
+            rows += chunk.count(b'\n')
+    finally:
+        if handle is not destination:
+            handle.close()
+    return rows
+
+
+WRITERS = {'jsonl': write_jsonl, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+
+def write(dataset, fmt, destination, event_id=None, progress=None):
+    """Writes `dataset` in `fmt` to a path or binary file object; returns the number of rows"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}. Choose from: {', '.join(DATASETS)}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt}. Choose from: {', '.join(WRITERS)}")
+    return WRITERS[fmt](dataset, destination, event_id, progress)
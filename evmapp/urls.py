@@ -11,6 +11,7 @@ urlpatterns = [
     # Core
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/sales-series/', views.sales_series, name='sales_series'),
     
     # Events
     path('addevent', views.add_event, name='addevent'),
@@ -23,6 +24,9 @@ urlpatterns = [
     
     # Booking & Payment
     path('booktickets', views.ticketbooking, name='bookticket'),
+    path('booktickets/group/', views.group_booking, name='group_booking'),
+    path('waiting-room/<int:event_id>/', views.waiting_room_view, name='waiting_room'),
+    path('waiting-room/<int:event_id>/status/', views.waiting_room_status, name='waiting_room_status'),
     
     # --- THIS IS THE MISSING LINE FIXING YOUR ERROR ---
     path('my-bookings/', views.my_bookings, name='my_bookings'), 
@@ -30,8 +34,11 @@ urlpatterns = [
     path('booking/success/<int:booking_id>/', views.booking_success, name='booking_success'),
 
     path('payment/qr/<int:booking_id>/', views.qr_payment_view, name='qr_payment'),
+    path('payment/qr/<int:booking_id>/code.png', views.payment_qr_code, name='payment_qr_code'),
+    path('qr/stats/', views.qr_cache_stats, name='qr_cache_stats'),
     path('payments/confirm/', views.payment_confirm, name='payment_confirm'),
     path('payments/admin/', views.payments_admin, name='payments_admin'),
+    path('reports/revenue/', views.revenue_report_view, name='revenue_report'),
 
     # Volunteers & Sponsors
     path('sponsor/', views.sponsor, name='sponsor'),
@@ -41,6 +48,11 @@ urlpatterns = [
 
     # CSV & Admin Tools
     path('download-participants-csv/', views.download_participants_csv, name='download_participants_csv'),
+    path('exports/', views.export_jobs_view, name='export_jobs'),
+    path('exports/<int:job_id>/status/', views.export_job_status, name='export_job_status'),
+    path('exports/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    path('exports/data/<str:dataset>/', views.typed_export, name='typed_export'),
+    path('imports/', views.import_csv_view, name='import_csv'),
     path("admin-tools/view-db/", views.view_db, name="view_db"),
     path("admin-tools/download-db/", views.download_db, name="download_db"),
 ]
\ No newline at end of file
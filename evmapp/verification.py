@@ -0,0 +1,109 @@
+"""
+Bulk payment verification for the admin action.
+
+One conditional UPDATE flips every still-unverified booking in the selection; counters, seat
+holds and the "payment verified" emails are then handled per event rather than per booking
+(the email template is compiled once per event by evmapp.notifications). Emails are queued in
+the outbox in the same transaction, so `send_outbox` delivers them in batches over one connection.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+
+from . import notifications, outbox, rollups, versions
+from .counters import apply_counter_delta
+from .holds import claim_holds, is_settled
+from .inventory import reserve_seats
+from .models import Booking, Event
+
+TEMPLATE = 'evmapp/email/payment_verified.html'
+
+
+@dataclass
+class VerificationResult:
+    selected: int = 0
+    verified: int = 0
+    already_verified: int = 0
+    queued: int = 0
+    failed: int = 0  # verified, but no email could be queued (no address or render error)
+
+
+def verified_email(booking, event):
+    subject = f" Payment Verified: {event.event_name}"
+    plain = f"Your booking for {event.event_name} is confirmed. Ticket ID: {booking.ticket_id}"
+    email = EmailMultiAlternatives(subject, plain, settings.EMAIL_HOST_USER, [booking.email])
+    email.attach_alternative(notifications.render(TEMPLATE, booking, event), 'text/html')
+    return email
+
+
+def settle_holds(bookings):
+    """Converts the holds of newly settled bookings, re-reserving seats whose holds lapsed"""
+    by_event = defaultdict(list)
+    for booking in bookings:
+        if not is_settled(booking):
+            by_event[booking.event_id].append(booking)
+    for event_id, group in by_event.items():
+        missing = sum(booking.number_of_tickets for booking in group) - claim_holds(group)
+        if missing > 0:
+            reserve_seats(event_id, missing, force=True)
+
+
+def verification_delta(booking):
+    """What verifying this booking adds to the counters"""
+    tickets = booking.number_of_tickets or 0
+    if booking.is_paid:
+        return {'tickets_paid': 0, 'tickets_verified': tickets, 'revenue': Decimal('0')}
+    return {'tickets_paid': tickets, 'tickets_verified': tickets, 'revenue': Decimal(booking.total_cost or 0)}
+
+
+def counter_deltas(bookings):
+    deltas = defaultdict(lambda: {'tickets_paid': 0, 'tickets_verified': 0, 'revenue': Decimal('0')})
+    for booking in bookings:
+        for field, value in verification_delta(booking).items():
+            deltas[booking.event_id][field] += value
+    return deltas
+
+
+def verify_bookings(queryset, notify=True):
+    """Marks every unverified booking in `queryset` paid and verified and queues its email"""
+    result = VerificationResult()
+    ids = list(queryset.values_list('id', flat=True))
+    result.selected = len(ids)
+
+    with transaction.atomic():
+        pending = list(
+            Booking.objects.select_for_update()
+            .filter(id__in=ids, is_verified=False)
+            .only('id', 'event_id', 'is_paid', 'is_verified', 'booking_date', *notifications.FIELDS)
+        )
+        result.verified = Booking.objects.filter(id__in=[b.id for b in pending], is_verified=False).update(
+            is_verified=True, is_paid=True, paid=True,
+        )
+        result.already_verified = result.selected - result.verified
+
+        settle_holds(pending)
+        for event_id, delta in counter_deltas(pending).items():
+            apply_counter_delta(event_id, delta, rollup=False)
+        rollups.record_bookings((b.event_id, b.booking_date, verification_delta(b)) for b in pending)
+        if pending:
+            # update() skips the model signals that normally mark these stale
+            versions.bump('booking', 'event')
+
+        if notify and pending:
+            events = Event.objects.in_bulk({booking.event_id for booking in pending})
+            messages = []
+            for booking in pending:
+                if not booking.email:
+                    result.failed += 1
+                    continue
+                try:
+                    messages.append(verified_email(booking, events[booking.event_id]))
+                except Exception as e:
+                    result.failed += 1
+                    print(f"EMAIL FAILED for {booking.email}: {e}")
+            result.queued = len(outbox.enqueue_messages(messages, kind='payment_verified'))
+    return result
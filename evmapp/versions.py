@@ -0,0 +1,86 @@
+import hashlib
+from functools import partial, wraps
+
+from django.contrib.messages import get_messages
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import ModelVersion
+
+TRACKED = ('event', 'booking', 'volunteer', 'sponsor')
+
+
+def bump(*names):
+    """
+    Moves the named versions on with one UPDATE once the surrounding transaction commits,
+    so booking transactions never wait on the shared version rows (and a rollback bumps nothing)
+    """
+    transaction.on_commit(partial(write_bump, names), robust=True)
+
+
+def write_bump(names):
+    now = timezone.now()
+    updated = ModelVersion.objects.filter(name__in=names).update(version=F('version') + 1, changed_at=now)
+    if updated == len(names):
+        return
+    for name in names:
+        try:
+            with transaction.atomic():
+                ModelVersion.objects.get_or_create(name=name, defaults={'version': 1, 'changed_at': now})
+        except IntegrityError:
+            pass
+
+
+def current(request, names):
+    """{name: (version, changed_at)} for the named models, read once per request"""
+    cached = getattr(request, '_model_versions', {})
+    missing = [name for name in names if name not in cached]
+    if missing:
+        for name, version, changed_at in ModelVersion.objects.filter(name__in=missing).values_list('name', 'version', 'changed_at'):
+            cached[name] = (version, changed_at)
+        for name in missing:
+            cached.setdefault(name, (0, None))
+        request._model_versions = cached
+    return {name: cached[name] for name in names}
+
+
+def is_personal(request):
+    # Flash messages are rendered into the page, so a 304 would hide them
+    return any(True for _ in get_messages(request))
+
+
+def conditional(*names):
+    """
+    ETag/Last-Modified for a view whose output depends only on the named models and the
+    visitor: a repeat GET with matching validators gets a 304 before the view runs.
+    """
+    def etag(request, *args, **kwargs):
+        if is_personal(request):
+            return None
+        versions = current(request, names)
+        # The session key changes on login/logout, which also changes the page chrome and CSRF token
+        visitor = f'{request.user.pk}:{request.session.session_key}'
+        parts = [visitor] + [f'{name}={versions[name][0]}' for name in names]
+        return 'W/"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()[:32]
+
+    def last_modified(request, *args, **kwargs):
+        if is_personal(request):
+            return None
+        stamps = [changed_at for _, changed_at in current(request, names).values() if changed_at]
+        return max(stamps) if stamps else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Browsers must revalidate every time instead of guessing freshness from Last-Modified
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
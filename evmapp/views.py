@@ -1,26 +1,37 @@
-import csv, string, secrets, json, uuid, os, sqlite3
+import json, uuid, os, sqlite3, tempfile
 from django.views.decorators.csrf import csrf_exempt
 
 # Imports for payment and images
 import razorpay
-import qrcode
-from io import BytesIO
-from urllib.parse import quote_plus
 
 # Django core imports
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.core.mail import EmailMessage, send_mail
+from django.core.mail import EmailMessage
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from decimal import Decimal, InvalidOperation
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.conf import settings
-from .models import Booking, Event, Sponsor, Volunteer, Payment
+from .models import Booking, Event, ExportJob, Sponsor, Volunteer, Payment
+from . import export_jobs, exports, imports, notifications, outbox, qr, reminders, typed_exports
+from .group_booking import GroupBookingError, create_group_booking, group_members, settle_group_payment
+from .idempotency import idempotent
+from .kpis import is_stale as kpis_stale, read_snapshot
+from .page_cache import cache_anonymous_page, cached_page
+from .pagination import keyset_page
+from .reports import revenue_report
+from .search import search_bookings
+from .rollups import parse_range, series as sales_rollup_series
+from .holds import confirm_hold, hold_expires_at, place_hold, reserve_for_checkout
+from .ticket_ids import next_ticket_id
+from .versions import conditional
+from .waiting_room import get_room, is_admitted, queue_status
 from django.contrib import messages
 from django.template.loader import render_to_string
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.views.decorators.http import require_POST, require_GET, require_http_methods
-from django.http import HttpResponse, JsonResponse, FileResponse, Http404
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404, StreamingHttpResponse
 from django.db.models import Sum, F, Min, Count, Q
 from django.db import transaction
 from twilio.rest import Client
@@ -68,56 +79,54 @@ def logout_view(request):
 
 @login_required(login_url='/login/')
 def dashboard(request):
-    events = Event.objects.all()
-    total_events = events.count()
-    volunteers = Volunteer.objects.count()
-    total_sponsors = Sponsor.objects.count()
-
-    # Count ALL Paid bookings (Verified + Pending)
-    paid_bookings = Booking.objects.filter(is_paid=True)
-
-    # Calculate Revenue
-    revenue_data_agg = paid_bookings.aggregate(total=Sum('total_cost'))
-    total_funds = revenue_data_agg['total'] or 0
-    
-    # Calculate Tickets
-    ticket_data_agg = paid_bookings.aggregate(total=Sum('number_of_tickets'))
-    total_tickets_sold = ticket_data_agg['total'] or 0
-    
-    # Calculate Net Profit
-    sponsor_funds = Sponsor.objects.aggregate(total=Sum('cost'))['total'] or 0
-    net_revenue = total_funds - sponsor_funds
-
-    # Chart Data
-    events_with_stats = Event.objects.annotate(
-        tickets_sold=Sum('booking__number_of_tickets'),
-        revenue=Sum('booking__total_cost'),
-        tickets_remaining=F('total_tickets') - Sum('booking__number_of_tickets'),
-        booking_count=Count('booking')
-    ).order_by('-date')
+    # KPIs come from the materialized snapshot (one row) instead of aggregating bookings on every load
+    snapshot = read_snapshot()
 
-    event_labels = [e.event_name for e in events_with_stats]
-    revenue_data = [float(e.revenue or 0) for e in events_with_stats]
+    event_labels = [label for label, _ in snapshot.revenue_series]
+    revenue_data = [float(revenue) for _, revenue in snapshot.revenue_series]
 
     # Recent Bookings
     recent_bookings = Booking.objects.select_related('event').order_by('-booking_date')[:5]
 
     context = {
-        'total_events': total_events,
-        'total_sponsors': total_sponsors,
-        'total_funds': total_funds,
-        'sponsor_funds': sponsor_funds,
-        'net_revenue': net_revenue,
-        'volunteers': volunteers,
-        'events': events_with_stats,
+        'total_events': snapshot.total_events,
+        'total_sponsors': snapshot.total_sponsors,
+        'total_funds': snapshot.total_funds,
+        'sponsor_funds': snapshot.sponsor_funds,
+        'net_revenue': snapshot.net_revenue,
+        'volunteers': snapshot.total_volunteers,
+        'total_volunteers': snapshot.total_volunteers,
         'recent_bookings': recent_bookings,
         'event_labels': event_labels,
         'revenue_data': revenue_data,
-        'total_tickets_sold': total_tickets_sold,
+        'total_tickets_sold': snapshot.tickets_sold,
+        'snapshot': snapshot,
+        'snapshot_stale': kpis_stale(snapshot),
     }
     return render(request, 'evmapp/dashboard.html', context)
 
 
+@login_required(login_url='/login/')
+@require_GET
+def sales_series(request):
+    """Sales over time from the hourly rollup: ?event=<id>&category=<code>&start=<iso>&end=<iso>&granularity=hour|day"""
+    try:
+        start, end = parse_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be ISO dates or datetimes.'}, status=400)
+    granularity = 'day' if request.GET.get('granularity') == 'day' else 'hour'
+    if granularity == 'hour' and end - start > timedelta(days=92):
+        return JsonResponse({'error': 'Hourly ranges are limited to 92 days; use granularity=day.'}, status=400)
+
+    points = sales_rollup_series(
+        start, end,
+        event_id=request.GET.get('event') or None,
+        category=request.GET.get('category') or None,
+        granularity=granularity,
+    )
+    return JsonResponse({'start': start.isoformat(), 'end': end.isoformat(), 'granularity': granularity, 'points': points})
+
+
 def select_venue(request):
     if request.method == 'POST':
         venue = request.POST.get('venue')
@@ -200,9 +209,10 @@ def add_event(request):
 
 
 @login_required(login_url='/login/')
+@conditional('event')
 def view_event(request):
-    events = Event.objects.all()
-    total_tickets_sold = Booking.objects.aggregate(total_tickets_sold=Sum('number_of_tickets'))['total_tickets_sold'] or 0
+    total_tickets_sold = Event.objects.aggregate(total_tickets_sold=Sum('tickets_sold'))['total_tickets_sold'] or 0
+    events = keyset_page(request, Event.objects.all(), ('-id',), per_page=20)
     return render(request, 'evmapp/view_events.html', {'events': events, 'total_tickets_sold': total_tickets_sold})
 
 
@@ -257,38 +267,40 @@ def update_event_status(request):
 
 
 @login_required
+@conditional('event', 'booking', 'sponsor')
 def event_detail(request, event_id):
     event = get_object_or_404(Event, pk=event_id)
-    total_tickets_sold = Booking.objects.filter(event=event).aggregate(total_tickets_sold=Sum('number_of_tickets'))['total_tickets_sold'] or 0
+    total_tickets_sold = event.tickets_sold
     event_cost = event.sponsors.aggregate(total_cost=Sum('cost'))['total_cost'] or 0
     money_collected = total_tickets_sold * event.price_per_ticket
     percentage_collected = round((money_collected / event_cost) * 100, 2) if event_cost else 0
-    bookings = Booking.objects.filter(event=event)
-    
-    # Filters
-    name_filter = request.GET.get('name')
-    contact_number_filter = request.GET.get('contact_number')
-    if name_filter:
-        bookings = bookings.filter(name__icontains=name_filter)
-    if contact_number_filter:
-        bookings = bookings.filter(contact_number__icontains=contact_number_filter)
-        
+
+    # Search (?q=, or the older ?name= / ?contact_number=) returns ranked matches from the attendee index
+    query = ' '.join(filter(None, [request.GET.get(key, '').strip() for key in ('q', 'name', 'contact_number')]))
+    if query:
+        bookings = search_bookings(query, event_id=event.id)
+    else:
+        bookings = keyset_page(request, Booking.objects.filter(event=event), ('-booking_date', '-id'), per_page=50)
+
     return render(request, "evmapp/event_detail.html", {
         'event': event, 
         'total_tickets_sold': total_tickets_sold, 
         'event_cost': event_cost, 
         'percentage_collected': percentage_collected, 
-        'bookings': bookings
+        'bookings': bookings,
+        'query': query,
     })
 
 
+@conditional('event', 'booking', 'volunteer')
+@cache_anonymous_page
 def home(request):
     # 1. Fetch Events
-    events = Event.objects.filter(status=True).order_by('date') 
+    events = Event.objects.filter(status=True).order_by('starts_at')
 
     # 2. Calculate Stats
     total_events = events.count()
-    ticket_data = Booking.objects.filter(is_verified=True).aggregate(total=Sum('number_of_tickets'))
+    ticket_data = Event.objects.aggregate(total=Sum('tickets_verified'))
     total_tickets_sold = ticket_data['total'] if ticket_data['total'] else 0
     total_volunteers = Volunteer.objects.count()
 
@@ -318,23 +330,20 @@ def send_booking_confirmation_email(booking):
     event = booking.event
     subject = f'🎫 Ticket Confirmed: {event.event_name} | Ticket ID: {booking.ticket_id}'
     context = {
-        'booking': booking,
-        'event': event,
         'payment_info': {'amount': booking.total_cost, 'currency': 'INR', 'is_free': booking.total_cost == 0},
     }
     
     # UPI QR generation (Legacy support if UPI_VPA is in settings)
     upi_uri = None
     try:
-        if getattr(settings, 'UPI_VPA', None) and booking.total_cost and float(booking.total_cost) > 0:
-            note = getattr(settings, 'UPI_NOTE', '') or event.event_name
-            upi_uri = f"upi://pay?pa={settings.UPI_VPA}&pn={quote_plus(getattr(settings, 'UPI_NAME', ''))}&am={booking.total_cost}&cu=INR&tn={quote_plus(note)}"
+        upi_uri = qr.upi_uri(booking.total_cost, event.event_name)
+        if upi_uri:
             context['upi_uri'] = upi_uri
     except Exception as e:
         print(f"Error generating UPI URI: {str(e)}")
 
     try:
-        message = render_to_string('evmapp/email/booking_confirmation.html', context)
+        message = notifications.render('evmapp/email/booking_confirmation.html', booking, event, **context)
     except Exception as template_error:
         message = f"Your ticket for {event.event_name} is confirmed. Ticket ID: {booking.ticket_id}"
         
@@ -344,57 +353,27 @@ def send_booking_confirmation_email(booking):
         
         if upi_uri:
             try:
-                qr_img = qrcode.make(upi_uri)
-                buf = BytesIO()
-                qr_img.save(buf, format='PNG')
-                buf.seek(0)
-                email.attach(f'upi_{booking.id}.png', buf.read(), 'image/png')
+                email.attach(f'upi_{booking.id}.png', qr.png(upi_uri), 'image/png')
             except Exception:
                 pass
                 
-        email.send(fail_silently=False)
+        outbox.enqueue_message(email, kind='booking_confirmation')
         return True
     except Exception as e:
-        print(f"Failed to send booking confirmation email to {booking.email}: {str(e)}")
+        print(f"Failed to queue booking confirmation email to {booking.email}: {str(e)}")
         return False
 
 
 def send_event_reminder_email(booking, hours_remaining=24):
-    event = booking.event
-    if hours_remaining == 24:
-        subject = f'⏰ 24 Hours to Go: {event.event_name} Tomorrow!'
-    elif hours_remaining == 2:
-        subject = f'🔔 Starting Soon: {event.event_name} in 2 Hours!'
-    else:
-        subject = f'Reminder: {event.event_name} is Coming Up!'
-    context = {'booking': booking, 'event': event, 'hours_remaining': hours_remaining, 'important_items': ['Your Ticket ID', 'Valid ID proof', 'Comfortable attire']}
-    message = render_to_string('evmapp/email/event_reminder.html', context)
     try:
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [booking.email], html_message=message, fail_silently=False)
+        outbox.enqueue_message(reminders.reminder_message(booking, hours_remaining), kind=reminders.KIND)
     except Exception as e:
-        print(f"Failed to send reminder to {booking.email}: {str(e)}")
+        print(f"Failed to queue reminder to {booking.email}: {str(e)}")
 
 
 def check_and_send_reminders():
-    now = timezone.now()
-    tomorrow = now + timedelta(days=1)
-    day_before_bookings = Booking.objects.filter(event__date=tomorrow.date(), reminder_24h_sent=False)
-    for booking in day_before_bookings:
-        send_event_reminder_email(booking, hours_remaining=24)
-        booking.reminder_24h_sent = True
-        booking.save()
-    
-    two_hours_from_now = now + timedelta(hours=2)
-    upcoming_bookings = Booking.objects.filter(event__date=now.date(), event__time__hour=two_hours_from_now.hour, event__time__minute=two_hours_from_now.minute, reminder_2h_sent=False)
-    for booking in upcoming_bookings:
-        send_event_reminder_email(booking, hours_remaining=2)
-        booking.reminder_2h_sent = True
-        booking.save()
-
-
-def generate_ticket_id(length=5):
-    characters = string.ascii_uppercase + string.digits
-    return ''.join(secrets.choice(characters) for _ in range(length))
+    """Queues every due reminder; see evmapp.reminders and `manage.py send_reminders`"""
+    return reminders.schedule()
 
 
 # -------------------------
@@ -413,14 +392,23 @@ def send_payment_received_email(booking):
 
         email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [booking.email])
         email.content_subtype = "html"
-        email.send(fail_silently=True)
+        outbox.enqueue_message(email, kind='payment_received')
     except Exception as e:
-        print("Failed to send payment received email to user:", e)
+        print("Failed to queue payment received email to user:", e)
 
 
+@idempotent('ticketbooking')
 def ticketbooking(request):
-    events = Event.objects.filter(status=True)
-    if not events.exists():
+    if request.method != 'POST':
+        # The queue check runs per visitor; only the page itself comes from the cache
+        room = get_room(request.GET.get('event'))
+        if room and not is_admitted(request, room):
+            return redirect('waiting_room', event_id=room.event_id)
+        return cached_page(request, lambda: ticketbooking_page(request))
+
+    # Evaluated once and reused by every render below instead of re-querying on each error path
+    events = list(Event.objects.filter(status=True).order_by('starts_at'))
+    if not events:
         messages.warning(request, 'No events are currently available for booking.')
         return render(request, 'evmapp/ticketbooking.html', {'events': []})
 
@@ -431,11 +419,16 @@ def ticketbooking(request):
                 messages.error(request, 'Please select an event')
                 return render(request, 'evmapp/ticketbooking.html', {'events': events})
 
-            event = Event.objects.filter(pk=event_id, status=True).first()
+            event = next((e for e in events if str(e.pk) == str(event_id)), None)
             if not event:
                 messages.error(request, 'Selected event is not available')
                 return render(request, 'evmapp/ticketbooking.html', {'events': events})
 
+            room = get_room(event.id)
+            if room and not is_admitted(request, room):
+                messages.info(request, 'This event is in high demand. Please wait for your turn to book.')
+                return redirect('waiting_room', event_id=event.id)
+
             try:
                 number_of_tickets = int(request.POST.get('number_of_tickets', 0))
                 if number_of_tickets <= 0: raise ValueError
@@ -455,39 +448,125 @@ def ticketbooking(request):
                 contact_number = f'+91{contact_number}'
 
             total_cost = float(event.price_per_ticket * number_of_tickets)
-            ticket_id = generate_ticket_id()
-
-            booking = Booking.objects.create(
-                event=event,
-                number_of_tickets=number_of_tickets,
-                name=name,
-                contact_number=contact_number,
-                email=email,
-                total_cost=total_cost,
-                ticket_id=ticket_id,
-                is_paid=False,
-                is_verified=False,
-                paid=False
-            )
+            ticket_id = next_ticket_id()
+
+            # Claim the seats and create the booking together, so a failed insert hands the seats back.
+            # Paid bookings only hold their seats until the payment window closes.
+            with transaction.atomic():
+                reservation = reserve_for_checkout(event.id, number_of_tickets)
+                if not reservation.ok:
+                    messages.error(request, reservation.message)
+                    return render(request, 'evmapp/ticketbooking.html', {'events': events})
+
+                booking = Booking.objects.create(
+                    event=event,
+                    number_of_tickets=number_of_tickets,
+                    name=name,
+                    contact_number=contact_number,
+                    email=email,
+                    total_cost=total_cost,
+                    ticket_id=ticket_id,
+                    is_paid=False,
+                    is_verified=total_cost <= 0,
+                    paid=False
+                )
+                if total_cost > 0:
+                    place_hold(booking)
+                else:
+                    # Queued in the same transaction; `manage.py send_outbox` delivers it
+                    send_booking_confirmation_email(booking)
 
             if total_cost > 0:
                 return redirect('qr_payment', booking_id=booking.id)
             else:
-                booking.is_verified = True
-                booking.save()
-                send_booking_confirmation_email(booking)
                 return redirect('booking_success', booking_id=booking.id)
 
         except Exception as e:
             messages.error(request, f'An error occurred: {str(e)}')
             return render(request, 'evmapp/ticketbooking.html', {'events': events})
 
+
+def ticketbooking_page(request):
+    events = list(Event.objects.filter(status=True).order_by('starts_at'))
+    if not events:
+        messages.warning(request, 'No events are currently available for booking.')
     return render(request, 'evmapp/ticketbooking.html', {'events': events})
 
 
+def waiting_room_view(request, event_id):
+    event = get_object_or_404(Event, pk=event_id, status=True)
+    room = get_room(event.id)
+    if room is None:
+        return redirect(f"{reverse('bookticket')}?event={event.id}")
+
+    queue = queue_status(request, room)
+    if queue['admitted']:
+        return redirect(f"{reverse('bookticket')}?event={event.id}")
+    return render(request, 'evmapp/waiting_room.html', {'event': event, 'queue': queue})
+
+
+@require_GET
+def waiting_room_status(request, event_id):
+    room = get_room(event_id)
+    if room is None:
+        return JsonResponse({'event_id': event_id, 'admitted': True})
+    return JsonResponse(queue_status(request, room))
+
+
+@require_POST
+@idempotent('group_booking')
+def group_booking(request):
+    """
+    JSON API for booking several attendees at once:
+    {"event": id, "contact": {"name", "email", "contact_number"}, "attendees": [{"name", "email"?, "contact_number"?}, ...]}
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Request body must be valid JSON.'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Request body must be a JSON object.'}, status=400)
+
+    contact = payload.get('contact') or {}
+    if not isinstance(contact, dict) or not all(str(contact.get(field) or '').strip() for field in ('name', 'email', 'contact_number')):
+        return JsonResponse({'error': 'Group contact name, email and contact_number are required.'}, status=400)
+
+    try:
+        event_id = int(payload.get('event'))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'event must be an event id.'}, status=400)
+    event = Event.objects.filter(pk=event_id, status=True).first()
+    if not event:
+        return JsonResponse({'error': 'Selected event is not available.'}, status=404)
+
+    room = get_room(event.id)
+    if room and not is_admitted(request, room):
+        return JsonResponse({'error': 'Please wait for your turn in the waiting room.', 'waiting_room': reverse('waiting_room', args=[event.id])}, status=429)
+
+    try:
+        bookings, reservation = create_group_booking(event, contact, payload.get('attendees'), site_url=request.build_absolute_uri('/')[:-1])
+    except GroupBookingError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if not bookings:
+        return JsonResponse({'error': reservation.message, 'remaining': reservation.remaining}, status=409)
+
+    lead = bookings[0]
+    is_free = lead.total_cost <= 0
+    return JsonResponse({
+        'group_ref': lead.group_ref,
+        'unit_price': str(lead.total_cost),
+        'total_cost': str(lead.total_cost * len(bookings)),
+        'tickets': [{'booking_id': b.id, 'name': b.name, 'ticket_id': b.ticket_id} for b in bookings],
+        'next': reverse('booking_success', args=[lead.id]) if is_free else reverse('qr_payment', args=[lead.id]),
+        'remaining': reservation.remaining,
+    }, status=201)
+
+
 @require_http_methods(["GET", "POST"])
+@idempotent('qr_payment')
 def qr_payment_view(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('event'), id=booking_id)
 
     if request.method == "POST":
         payment_ref = request.POST.get("payment_ref", "").strip()
@@ -495,21 +574,74 @@ def qr_payment_view(request, booking_id):
 
         if not payment_ref:
             messages.error(request, "Please enter the Transaction ID / Reference Number.")
-            return render(request, "evmapp/qr_payment.html", {"booking": booking})
-
-        booking.payment_ref = payment_ref
-        if screenshot:
-            booking.payment_screenshot = screenshot
-        
-        # Force Pending Status
-        booking.is_paid = True
-        booking.is_verified = False
-        booking.save()
+            return render(request, "evmapp/qr_payment.html", qr_payment_context(booking))
+
+        if booking.group_ref:
+            # One payment covers every ticket booked together with this one
+            reservation = settle_group_payment(booking, payment_ref, screenshot)
+            if not reservation.ok:
+                messages.error(request, f"Your seat hold expired. {reservation.message} Please contact the organiser with your transaction ID.")
+                return render(request, "evmapp/qr_payment.html", qr_payment_context(booking))
+            booking.refresh_from_db()
+            send_payment_received_email(booking)
+            return redirect('booking_success', booking_id=booking.id)
+
+        with transaction.atomic():
+            # Convert the seat hold; if it already expired, the seats must still be free
+            if not (booking.is_paid or booking.is_verified):
+                reservation = confirm_hold(booking)
+                if not reservation.ok:
+                    messages.error(request, f"Your seat hold expired. {reservation.message} Please contact the organiser with your transaction ID.")
+                    return render(request, "evmapp/qr_payment.html", qr_payment_context(booking))
+                booking._hold_confirmed = True
+
+            booking.payment_ref = payment_ref
+            if screenshot:
+                booking.payment_screenshot = screenshot
+
+            # Force Pending Status
+            booking.is_paid = True
+            booking.is_verified = False
+            booking.save()
+            send_payment_received_email(booking)
 
-        send_payment_received_email(booking)
         return redirect('booking_success', booking_id=booking.id)
 
-    return render(request, "evmapp/qr_payment.html", {"booking": booking})
+    return render(request, "evmapp/qr_payment.html", qr_payment_context(booking))
+
+
+def qr_payment_context(booking):
+    context = {"booking": booking, "hold_expires_at": hold_expires_at(booking)}
+    if booking.group_ref:
+        context["group"] = group_members(booking.group_ref).aggregate(size=Count('id'), total=Sum('total_cost'))
+    context["upi_qr"] = bool(booking_upi_uri(booking, context.get("group")))
+    return context
+
+
+def booking_upi_uri(booking, group=None):
+    """The UPI URI for what this booking (or its whole group) still has to pay"""
+    if booking.group_ref and group is None:
+        group = group_members(booking.group_ref).aggregate(total=Sum('total_cost'))
+    amount = group['total'] if group else booking.total_cost
+    return qr.upi_uri(amount, booking.event.event_name)
+
+
+def payment_qr_code(request, booking_id):
+    """The UPI QR for a booking's payment page, from the shared QR cache"""
+    booking = get_object_or_404(Booking.objects.select_related('event'), id=booking_id, is_paid=False)
+    upi_uri = booking_upi_uri(booking)
+    if not upi_uri:
+        raise Http404('No UPI payment configured')
+    response = HttpResponse(qr.png(upi_uri), content_type='image/png')
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+@login_required(login_url='/login/')
+def qr_cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return JsonResponse(qr.stats())
 
 
 def booking_success(request, booking_id):
@@ -517,19 +649,21 @@ def booking_success(request, booking_id):
     return render(request, 'evmapp/booking_success.html', {'booking': booking})
 
 
+@conditional('event', 'booking')
 def my_bookings(request):
     bookings = None
     search_email = None
 
     if request.user.is_authenticated:
         search_email = request.user.email
-        bookings = Booking.objects.filter(email=search_email).order_by('-booking_date')
+        bookings = keyset_page(request, Booking.objects.filter(email=search_email).select_related('event'), ('-booking_date', '-id'), per_page=20)
     
     elif request.method == 'POST':
         search_email = request.POST.get('email')
         if search_email:
-            bookings = Booking.objects.filter(email=search_email).order_by('-booking_date')
-            if not bookings.exists():
+            # Anonymous lookups page through POST so the email never lands in a URL
+            bookings = keyset_page(request, Booking.objects.filter(email=search_email).select_related('event'), ('-booking_date', '-id'), per_page=20, params=request.POST)
+            if not bookings.items:
                 messages.error(request, "No tickets found for this email.")
 
     return render(request, 'evmapp/my_bookings.html', {
@@ -560,6 +694,31 @@ def payments_admin(request):
     return render(request, 'evmapp/payments_list.html', {'payments': payments})
 
 
+@login_required(login_url='/login/')
+@require_GET
+def revenue_report_view(request):
+    """Revenue pivots for staff; ?start=<date>&end=<date>&category=<code>&format=json"""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    start, end = request.GET.get('start') or None, request.GET.get('end') or None
+    try:
+        if start or end:
+            start, end = parse_range(start, end)
+    except ValueError:
+        messages.error(request, 'Start and end must be dates (YYYY-MM-DD).')
+        return redirect('revenue_report')
+    category = request.GET.get('category') or None
+    report = revenue_report(start, end, category, refresh=request.GET.get('refresh') == '1')
+    if request.GET.get('format') == 'json':
+        return JsonResponse(report)
+    return render(request, 'evmapp/revenue_report.html', {
+        'report': report,
+        'categories': Event.EVENT_CATEGORIES,
+        'filters': {'start': request.GET.get('start', ''), 'end': request.GET.get('end', ''), 'category': category or ''},
+    })
+
+
 # -------------------------
 # Volunteers & Misc
 # -------------------------
@@ -570,34 +729,146 @@ def sponsor(request):
     return render(request, 'evmapp/sponsor.html', {'sponsors': sponsors})
 
 
+@login_required(login_url='/login/')
 def download_participants_csv(request, event_id=None):
-    response = HttpResponse(content_type='text/csv')
-    
-    if event_id:
-        filename = f"participants_event_{event_id}.csv"
-        bookings = Booking.objects.filter(event_id=event_id)
+    """Streams the participant CSV: ?columns=name,email,... picks columns, ?gzip=1 compresses on the fly"""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    try:
+        columns = exports.parse_columns(request.GET.get('columns'))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+
+    filename = f"participants_event_{event_id}.csv" if event_id else "all_participants.csv"
+    rows = exports.export_rows(exports.participants(event_id), columns)
+    chunks = exports.csv_chunks(rows, exports.headers(columns))
+    if request.GET.get('gzip') in ('1', 'true', 'yes'):
+        response = StreamingHttpResponse(exports.gzip_chunks(chunks), content_type='application/gzip')
+        filename += '.gz'
     else:
-        filename = "all_participants.csv"
-        bookings = Booking.objects.all()
-        
+        response = StreamingHttpResponse(chunks, content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Name', 'Contact Number', 'Tickets', 'Total Cost', 'Ticket ID', 'Payment Ref', 'Verified'])
-    
-    for booking in bookings:
-        writer.writerow([
-            booking.name, 
-            booking.contact_number, 
-            booking.number_of_tickets, 
-            booking.total_cost, 
-            booking.ticket_id,
-            booking.payment_ref,
-            "Yes" if booking.is_verified else "No"
-        ])
     return response
 
 
+@login_required(login_url='/login/')
+def export_jobs_view(request):
+    """Lists recent export jobs; POST queues a new one for `manage.py run_export_jobs`"""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    if request.method == 'POST':
+        event_id = request.POST.get('event_id') or None
+        event = get_object_or_404(Event, id=event_id) if event_id else None
+        try:
+            job = export_jobs.queue_export(
+                request.POST.get('kind', ExportJob.PARTICIPANTS), user=request.user, event=event,
+                columns=request.POST.get('columns'), gzip=request.POST.get('gzip') == '1',
+                fmt=request.POST.get('format', 'csv'),
+            )
+        except ValueError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f'Export #{job.pk} queued.')
+        return redirect('export_jobs')
+    return render(request, 'evmapp/export_jobs.html', {
+        'jobs': ExportJob.objects.select_related('event', 'requested_by')[:50],
+        'events': Event.objects.order_by('-starts_at').only('id', 'event_name', 'date'),
+        'kinds': ExportJob.KIND_CHOICES,
+        'formats': ['csv', *typed_exports.FORMATS],
+        'datasets': typed_exports.DATASETS,
+        'retention_hours': int(export_jobs.retention().total_seconds() // 3600),
+    })
+
+
+@login_required(login_url='/login/')
+@require_GET
+def typed_export(request, dataset):
+    """Typed bookings/payments/events export: ?format=jsonl|parquet|xlsx&event_id=<id>&gzip=1 (JSONL only)"""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    fmt = request.GET.get('format', 'jsonl')
+    if dataset not in typed_exports.DATASETS or fmt not in typed_exports.FORMATS:
+        return HttpResponse(
+            f"Choose a dataset ({', '.join(typed_exports.DATASETS)}) and format ({', '.join(typed_exports.FORMATS)})",
+            status=400, content_type='text/plain',
+        )
+    event_id = request.GET.get('event_id') or None
+    content_type, extension = typed_exports.FORMATS[fmt]
+    filename = f"{dataset}_event_{event_id}{extension}" if event_id else f"{dataset}{extension}"
+
+    if fmt == 'jsonl':
+        chunks = typed_exports.jsonl_chunks(dataset, event_id)
+        if request.GET.get('gzip') in ('1', 'true', 'yes'):
+            chunks, content_type, filename = exports.gzip_chunks(chunks), 'application/gzip', filename + '.gz'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # Parquet and XLSX need the whole file (footer / zip directory) before the first byte can go out
+    handle = tempfile.TemporaryFile()
+    try:
+        typed_exports.write(dataset, fmt, handle, event_id)
+    except (typed_exports.MissingDependency, ValueError) as e:
+        handle.close()
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+    handle.seek(0)
+    return FileResponse(handle, as_attachment=True, filename=filename, content_type=content_type)
+
+
+@login_required(login_url='/login/')
+@require_GET
+def export_job_status(request, job_id):
+    """Progress of one export job, polled by the export page"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return JsonResponse(export_jobs.status(get_object_or_404(ExportJob, id=job_id)))
+
+
+@login_required(login_url='/login/')
+def export_job_download(request, job_id):
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    job = get_object_or_404(ExportJob, id=job_id)
+    if job.status != ExportJob.DONE or not job.file:
+        raise Http404('Export is not available')
+    extension = job.file.name.rsplit('/', 1)[-1].split('.', 1)[1]
+    filename = f'{job.kind}_export_{job.pk}.{extension}'
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=filename)
+
+
+@login_required(login_url='/login/')
+def import_csv_view(request):
+    """Staff CSV upload for events, bookings or volunteers (see evmapp.imports for the columns)"""
+    if not request.user.is_staff:
+        messages.error(request, 'Permission denied')
+        return redirect('home')
+    result = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, 'Please choose a CSV file.')
+            return redirect('import_csv')
+        try:
+            result = imports.import_csv(
+                request.POST.get('kind'), upload, notify=request.POST.get('notify') == '1',
+                ignore_capacity=request.POST.get('ignore_capacity') == '1', dry_run=request.POST.get('dry_run') == '1',
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            messages.error(request, f'Could not read the file: {e}')
+            return redirect('import_csv')
+        verb = 'Checked' if request.POST.get('dry_run') == '1' else 'Imported'
+        messages.success(request, f'{verb} {result.created} of {result.rows} row(s); {result.failed} rejected.')
+    return render(request, 'evmapp/import_csv.html', {
+        'result': result,
+        'errors': result.errors[:200] if result else [],
+        'kinds': imports.KINDS,
+    })
+
+
 def add_volunteer(request):
     if request.method == 'POST':
         try:
@@ -620,34 +891,36 @@ def add_volunteer(request):
             if not phone.startswith('+91'):
                 phone = f'+91{phone}'
 
-            new_volunteer = Volunteer.objects.create(
-                first_name=first_name,
-                last_name=last_name,
-                email=email,
-                phone=phone,
-                address=address,
-                city=city,
-                state=state,
-                volunteer_role=volunteer_role,
-                skills=skills,
-                availability=availability,
-                status='Pending'
-            )
+            # The volunteer and the confirmation email are committed together
+            with transaction.atomic():
+                new_volunteer = Volunteer.objects.create(
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=email,
+                    phone=phone,
+                    address=address,
+                    city=city,
+                    state=state,
+                    volunteer_role=volunteer_role,
+                    skills=skills,
+                    availability=availability,
+                    status='Pending'
+                )
 
-            try:
-                subject = 'Volunteer Application Received'
-                context = {'volunteer': new_volunteer}
                 try:
-                    message = render_to_string('evmapp/email/volunteer_confirmation.html', context)
-                except:
-                    message = f"Hello {first_name}, thanks for volunteering!"
+                    subject = 'Volunteer Application Received'
+                    context = {'volunteer': new_volunteer}
+                    try:
+                        message = render_to_string('evmapp/email/volunteer_confirmation.html', context)
+                    except:
+                        message = f"Hello {first_name}, thanks for volunteering!"
                 
-                email_message = EmailMessage(subject=subject, body=message, from_email=settings.DEFAULT_FROM_EMAIL, to=[email])
-                email_message.content_subtype = "html"
-                email_message.send(fail_silently=False)
-            except Exception as email_error:
-                print(f"Failed to send email: {str(email_error)}")
-                messages.warning(request, 'Application received, but confirmation email failed.')
+                    email_message = EmailMessage(subject=subject, body=message, from_email=settings.DEFAULT_FROM_EMAIL, to=[email])
+                    email_message.content_subtype = "html"
+                    outbox.enqueue_message(email_message, kind='volunteer_confirmation')
+                except Exception as email_error:
+                    print(f"Failed to queue email: {str(email_error)}")
+                    messages.warning(request, 'Application received, but confirmation email failed.')
 
             messages.success(request, 'Thank you for your interest in volunteering! We will contact you soon.')
             return redirect('home')
@@ -659,7 +932,7 @@ def add_volunteer(request):
 
 @login_required(login_url='/login/')
 def view_volunteers(request):
-    volunteers = Volunteer.objects.all()
+    volunteers = keyset_page(request, Volunteer.objects.all(), ('-created_at', '-id'), per_page=50)
     return render(request, 'evmapp/view_volunteers.html', {'volunteers': volunteers})
 
 @require_POST
@@ -0,0 +1,94 @@
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import WaitingRoom
+
+SESSION_KEY = 'waiting_room_positions'
+
+
+def get_room(event_id):
+    """Returns the event's active waiting room, or None when booking is open to everyone (or the id is not a number)"""
+    try:
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return None
+    return WaitingRoom.objects.filter(event_id=event_id, is_active=True).first()
+
+
+def admitted_through(room, now=None):
+    """
+    Highest queue position admitted so far. The stored high-water mark moves on by at most
+    admit_per_minute per minute since it last moved, and never past the last position handed
+    out: allowance nobody was queued to use is dropped, so a late surge still trickles in.
+    """
+    now = now or timezone.now()
+    mark = room.initial_batch if room.admitted_position is None else room.admitted_position
+    since = room.opened_at if room.admitted_at is None else room.admitted_at
+    elapsed = max((now - since).total_seconds(), 0)
+    steps = int(elapsed * room.admit_per_minute / 60)
+    if not steps:
+        return mark
+
+    if mark + steps <= room.last_position:
+        # Keep the fraction of a step already waited, so frequent polling doesn't slow the queue
+        new_mark, new_since = mark + steps, since + timedelta(seconds=steps * 60 / room.admit_per_minute)
+    else:
+        new_mark, new_since = max(mark, room.last_position), now
+
+    # Conditional on the values read, so concurrent polls advance the mark once
+    advanced = WaitingRoom.objects.filter(
+        pk=room.pk, admitted_position=room.admitted_position, admitted_at=room.admitted_at,
+    ).update(admitted_position=new_mark, admitted_at=new_since)
+    if not advanced:
+        room.refresh_from_db(fields=['admitted_position', 'admitted_at', 'last_position'])
+        return room.initial_batch if room.admitted_position is None else room.admitted_position
+    room.admitted_position, room.admitted_at = new_mark, new_since
+    return new_mark
+
+
+def session_position(request, room):
+    return request.session.get(SESSION_KEY, {}).get(str(room.event_id))
+
+
+def join(request, room):
+    """Gives this session a position token in the queue (or returns the one it already has)"""
+    position = session_position(request, room)
+    if position is not None:
+        return position
+
+    # Settle the admissions owed so far before this position exists, so they can't be spent on it
+    admitted_through(room)
+    # Same single conditional-UPDATE pattern as seat reservations: no two sessions share a position
+    with transaction.atomic():
+        WaitingRoom.objects.filter(pk=room.pk).update(last_position=F('last_position') + 1)
+        position = WaitingRoom.objects.filter(pk=room.pk).values_list('last_position', flat=True).get()
+    room.last_position = max(room.last_position, position)
+
+    positions = request.session.get(SESSION_KEY, {})
+    positions[str(room.event_id)] = position
+    request.session[SESSION_KEY] = positions
+    return position
+
+
+def is_admitted(request, room, now=None):
+    position = session_position(request, room)
+    return position is not None and position <= admitted_through(room, now)
+
+
+def queue_status(request, room, now=None):
+    position = join(request, room)
+    admitted = admitted_through(room, now)
+    ahead = max(position - admitted, 0)
+    wait_seconds = math.ceil(ahead * 60 / room.admit_per_minute) if room.admit_per_minute else None
+    return {
+        'event_id': room.event_id,
+        'position': position,
+        'admitted_through': admitted,
+        'ahead': ahead,
+        'admitted': ahead == 0,
+        'wait_seconds': wait_seconds,
+    }
@@ -74,6 +74,11 @@ DATABASES = {
 db_from_env = dj_database_url.config(conn_max_age=600)
 DATABASES['default'].update(db_from_env)
 
+# SQLite: wait for the write lock instead of failing, and take it at BEGIN so
+# concurrent bookings queue up rather than deadlocking on lock upgrades.
+if 'sqlite3' in DATABASES['default']['ENGINE']:
+    DATABASES['default'].setdefault('OPTIONS', {}).update({'timeout': 20, 'transaction_mode': 'IMMEDIATE'})
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -108,7 +113,8 @@ STATICFILES_DIRS = []
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Export files (`manage.py run_export_jobs`) land here, so every process must see the same directory
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT') or os.path.join(BASE_DIR, 'media')
 
 # --- EMAIL SETTINGS (SSL Fix for Render) ---
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -133,6 +139,63 @@ RAZORPAY_API_KEY = os.environ.get('RAZORPAY_API_KEY', 'razorpay_api_key')
 RAZORPAY_API_SECRET = os.environ.get('RAZORPAY_API_SECRET', 'razorpay_api_secret')
 RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
 
+# --- CACHE ---
+# Local memory by default (one process); set CACHE_DIR to share the cache between workers on one host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'evmapp',
+    }
+}
+if os.environ.get('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['CACHE_DIR'],
+    }
+# Anonymous home/booking pages are cached until an Event, Booking or Volunteer changes (or this many seconds)
+PAGE_CACHE_SECONDS = 300
+PAGE_CACHE_LOCK_SECONDS = 10
+
+# --- BOOKING SETTINGS ---
+# Unpaid QR checkouts hold their seats this long; run `manage.py release_expired_holds` from cron
+SEAT_HOLD_MINUTES = int(os.environ.get('SEAT_HOLD_MINUTES', 15))
+# Event.group_discount applies to group bookings with at least this many attendees
+GROUP_BOOKING_MIN_SIZE = 2
+GROUP_BOOKING_MAX_SIZE = 200
+# Retried booking/payment POSTs with the same Idempotency-Key replay the stored response; purge with `manage.py purge_idempotency_keys`
+IDEMPOTENCY_KEY_HOURS = 24
+# A key whose first request never stored a response (e.g. the worker died) can be taken over after this
+IDEMPOTENCY_STALE_SECONDS = 120
+# Most attendee search results returned to event pages and the admin (evmapp.search)
+ATTENDEE_SEARCH_LIMIT = 100
+
+# --- DASHBOARD ---
+# KPIs are materialized and updated incrementally; `manage.py refresh_dashboard_snapshot` does a full recompute
+DASHBOARD_SERIES_LENGTH = 30
+DASHBOARD_SNAPSHOT_MAX_AGE_MINUTES = 60
+# Revenue reports stream bookings this many rows at a time; results are cached per filter set
+REPORT_CHUNK_SIZE = 50000
+REPORT_CACHE_SECONDS = 900
+# Participant exports read this many rows per database round trip (evmapp.exports)
+EXPORT_CHUNK_SIZE = 2000
+# Background export files (`manage.py run_export_jobs`) are deleted this long after they finish
+EXPORT_RETENTION_HOURS = 48
+# CSV imports (`manage.py import_csv`, /imports/) validate and insert this many rows per batch
+IMPORT_BATCH_SIZE = 2000
+# Emails are queued in evmapp.OutboxEmail and sent by `manage.py send_outbox`
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_BACKOFF_SECONDS = 60  # doubles after each failed attempt
+OUTBOX_MAX_BACKOFF_SECONDS = 6 * 3600
+OUTBOX_WORKERS = 1  # sending threads per worker process
+OUTBOX_RATE_PER_SECOND = None  # e.g. 10 to stay under the SMTP provider's quota
+# `manage.py send_reminders` claims due reminders this many bookings per transaction
+REMINDER_BATCH_SIZE = 1000
+# Booking emails compiled once per event and template (evmapp.notifications), LRU-evicted
+NOTIFICATION_TEMPLATE_CACHE_SIZE = 256
+# UPI QR PNGs memoized in-process (this many) and on disk under MEDIA_ROOT/qr/ (evmapp.qr)
+QR_CACHE_SIZE = 512
+
 
 # --- CSRF SETTINGS ---
 CSRF_TRUSTED_ORIGINS = ['https://*.onrender.com', 'http://127.0.0.1:8000', 'http://localhost:8000']
@@ -0,0 +1,79 @@
+"""
+Notification email rendering throughput: render_to_string per recipient vs evmapp.notifications.
+
+Builds unsaved events and bookings in memory, so no database rows are touched:
+
+    python scripts/bench_notifications.py --recipients 10000 --events 5
+
+Every pre-rendered email is compared with the per-booking render and mismatches are counted.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, time as clock
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'evmproject.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.template.loader import render_to_string  # noqa: E402
+
+from evmapp import notifications  # noqa: E402
+from evmapp.models import Booking, Event  # noqa: E402
+from evmapp.reminders import IMPORTANT_ITEMS  # noqa: E402
+
+TEMPLATES = {
+    'reminder': ('evmapp/email/event_reminder.html', {'hours_remaining': 24, 'important_items': IMPORTANT_ITEMS}),
+    'confirmation': ('evmapp/email/booking_confirmation.html', {}),
+    'verified': ('evmapp/email/payment_verified.html', {}),
+}
+
+
+def fixtures(recipients, events):
+    events = [
+        Event(pk=i + 1, event_name=f'Event {i} & Friends', organiser='Bench', date=date(2030, 1, 1 + i % 28),
+              time=clock(18, 30), venue='Main <Hall>', theme='Bench', total_tickets=recipients)
+        for i in range(events)
+    ]
+    return [
+        Booking(pk=i + 1, event=events[i % len(events)], name=f"Guest O'Brien {i}", email=f'guest{i}@example.com',
+                contact_number='+910000000000', ticket_id=f'T{i:08d}', number_of_tickets=1 + i % 4,
+                total_cost=Decimal('250.00') * (1 + i % 4), payment_ref=f'UTR{i:010d}')
+        for i in range(recipients)
+    ]
+
+
+def run(label, template_name, extra, bookings):
+    started = time.perf_counter()
+    slow = [render_to_string(template_name, {'booking': b, 'event': b.event, **extra}) for b in bookings]
+    per_booking = time.perf_counter() - started
+
+    notifications.clear()
+    started = time.perf_counter()
+    fast = [notifications.render(template_name, b, b.event, **extra) for b in bookings]
+    prerendered = time.perf_counter() - started
+
+    mismatches = sum(a != b for a, b in zip(slow, fast))
+    print(f"{label:<13} render_to_string {len(bookings) / per_booking:>9.0f}/s   "
+          f"pre-rendered {len(bookings) / prerendered:>9.0f}/s   x{per_booking / prerendered:>5.1f}   mismatches={mismatches}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=5)
+    args = parser.parse_args()
+
+    bookings = fixtures(args.recipients, args.events)
+    failures = sum(run(label, name, extra, bookings) for label, (name, extra) in TEMPLATES.items())
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
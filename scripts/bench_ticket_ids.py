@@ -0,0 +1,67 @@
+"""
+Ticket ID allocation throughput under concurrent booking.
+
+Runs against the configured database (migrate first):
+
+    python scripts/bench_ticket_ids.py --threads 16 --per-thread 2000
+
+For each block size every thread allocates IDs the way ticketbooking does,
+then all IDs are checked for duplicates and check-character validity.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'evmproject.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from evmapp.ticket_ids import TicketIdAllocator, is_valid  # noqa: E402
+
+
+def run(block_size, threads, per_thread):
+    allocator = TicketIdAllocator(block_size=block_size)
+    results = [[] for _ in range(threads)]
+
+    def worker(index):
+        try:
+            for _ in range(per_thread):
+                results[index].append(allocator.next_id())
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ids = [ticket_id for chunk in results for ticket_id in chunk]
+    duplicates = len(ids) - len(set(ids))
+    invalid = sum(1 for ticket_id in ids if not is_valid(ticket_id))
+    print(f"block={block_size:>5}  ids={len(ids):>7}  {len(ids) / elapsed:>10.0f} ids/s  duplicates={duplicates}  invalid={invalid}")
+    return duplicates + invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--per-thread', type=int, default=1000)
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    failures = sum(run(size, args.threads, args.per_thread) for size in args.block_sizes)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()